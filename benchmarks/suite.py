@@ -0,0 +1,393 @@
+# Offline benchmark suite for the scraper agent and the SBOM registration hot paths
+#
+#   python benchmarks/suite.py list
+#   python benchmarks/suite.py run [-o results.json] [--only extract] [--repeat 5] [--quick]
+#   python benchmarks/suite.py compare results.json [--baseline benchmarks/baselines/default.json]
+#                                                   [--threshold 0.15]
+#
+# every case builds its own input with the synthetic generators (gen_fr_xml.py,
+# gen_sbom.py) in a temp directory, so nothing is downloaded. each case is timed
+# `repeat` times after one untimed warm-up call and the median is kept. cases whose optional dependencies are
+# missing (transformers/torch for the summarizer, eqty_sdk for registration) are
+# recorded as skipped rather than failing the run.
+#
+# compare exits 1 if any case is slower than the baseline by more than the threshold.
+# baselines are machine specific: re-record one with `run --save-baseline` on the
+# machine that will do the comparing. a case that was skipped (or is missing) in the
+# baseline is not compared, and compare lists it as such. a baseline's "notes" (run
+# --note, repeatable) say how it was recorded and are printed before the comparison.
+# the summarizer case runs a random two-layer BART built locally (bench_inference.py
+# --tiny) unless BENCH_TINY_MODEL names another model
+
+import argparse
+import fnmatch
+import importlib.metadata
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRAPER_DIR = os.path.join(ROOT, "prototypes", "scraper-agent")
+SBOM_DIR = os.path.join(ROOT, "sdk-tests", "eqtylabs")
+sys.path[:0] = [SCRAPER_DIR, SBOM_DIR]
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "default.json")
+TINY_MODEL = os.environ.get("BENCH_TINY_MODEL")     # default: a random two-layer BART built locally
+
+
+class Skip(Exception):
+    pass
+
+
+# name -> (sizes, quick sizes, unit, setup). setup(tmp_dir, size) returns (fn, items):
+# fn is timed, items is how many `unit`s it processes per call (for the per-second column)
+CASES: Dict[str, Tuple[List[int], List[int], str, Callable]] = {}
+
+
+def case(name: str, sizes: List[int], unit: str, quick: Optional[List[int]] = None):
+    def register(setup):
+        CASES[name] = (sizes, quick or sizes[:1], unit, setup)
+        return setup
+    return register
+
+
+def _issue_xml(tmp: str, documents: int) -> str:
+    from gen_fr_xml import write_issue_xml
+
+    path = os.path.join(tmp, f"fr_{documents}.xml")
+    if not os.path.exists(path):
+        write_issue_xml(path, documents)
+    return path
+
+
+def _sbom(tmp: str, components: int) -> str:
+    from gen_sbom import write_sbom
+
+    path = os.path.join(tmp, f"sbom_{components}.json")
+    if not os.path.exists(path):
+        write_sbom(path, components)
+    return path
+
+
+# -- Federal Register extraction
+
+@case("extract.xml_to_text", sizes=[80, 400], unit="bytes", quick=[80])
+def bench_xml_to_text(tmp, documents):
+    from frscraperagent import xml_to_text
+
+    with open(_issue_xml(tmp, documents), encoding="utf-8") as f:
+        xml_text = f.read()
+    return (lambda: xml_to_text(xml_text)), len(xml_text.encode("utf-8"))
+
+
+@case("extract.iterparse", sizes=[80, 400, 2000], unit="bytes", quick=[80])
+def bench_iterparse(tmp, documents):
+    from frscraperagent import extract_to_file
+
+    xml_path = _issue_xml(tmp, documents)
+    out_path = os.path.join(tmp, "extract.txt")
+    return (lambda: extract_to_file(xml_path, out_path)), os.path.getsize(xml_path)
+
+
+# -- summarizer
+
+@case("summarize.map_reduce_tiny", sizes=[20], unit="chunks", quick=[5])
+def bench_summarize(tmp, documents):
+    try:
+        from transformers import pipeline
+    except ImportError:
+        raise Skip("transformers not installed")
+    from frscraperagent import extract_to_file
+    from summarize import summarize_map_reduce
+
+    text_path = os.path.join(tmp, "summarize.txt")
+    extract_to_file(_issue_xml(tmp, documents), text_path)
+    model = TINY_MODEL
+    if not model:
+        import torch
+        from bench_inference import make_tiny_model
+
+        # seeded, so every run times the same weights (and the same output lengths)
+        model = os.path.join(tmp, "tiny_model")
+        if not os.path.isdir(model):
+            torch.manual_seed(0)
+            make_tiny_model(model, source=text_path)
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    try:
+        summarizer = pipeline("summarization", model=model)
+    except Exception as e:
+        raise Skip(f"{model} not available offline ({type(e).__name__}: {e})")
+
+    with open(text_path, encoding="utf-8") as f:
+        text = f.read()
+    stats = {}
+
+    def run():
+        _, run_stats = summarize_map_reduce(text, summarizer, batch_size=4, max_length=60, min_length=10)
+        stats.update(run_stats)
+    run()   # gives the chunk count
+    return run, stats["chunks"]
+
+
+# -- SBOM parsing and content IDs
+
+@case("sbom.parse", sizes=[1000, 10000, 100000], unit="components", quick=[1000])
+def bench_sbom_parse(tmp, components):
+    from cyclonedx import parse_cyclonedx_components
+
+    path = _sbom(tmp, components)
+    return (lambda: parse_cyclonedx_components(path)), components
+
+
+@case("sbom.sha256_to_content_id", sizes=[1000, 10000, 100000], unit="digests", quick=[1000])
+def bench_content_id(tmp, n):
+    import hashlib
+    from content_id import sha256_to_content_id
+
+    digests = [hashlib.sha256(str(i).encode()).hexdigest() for i in range(n)]
+    return (lambda: [sha256_to_content_id(d) for d in digests]), n
+
+
+@case("sbom.index_build", sizes=[1000, 10000, 100000], unit="components", quick=[1000])
+def bench_sbom_index(tmp, components):
+    from cyclonedx import iter_components
+    from sbom_index import SbomIndex
+
+    parsed = list(iter_components(_sbom(tmp, components)))
+    return (lambda: SbomIndex.from_components(parsed)), components
+
+
+# -- manifest index
+
+def _manifest(tmp: str, issues: int) -> str:
+    from gen_manifest import write_manifest
+
+    path = os.path.join(tmp, f"manifest_{issues}.json")
+    if not os.path.exists(path):
+        write_manifest(path, issues)
+    return path
+
+
+@case("manifest.index_build", sizes=[200, 2000], unit="statements", quick=[200])
+def bench_manifest_index_build(tmp, issues):
+    from manifest_index import ManifestIndex
+
+    path = _manifest(tmp, issues)
+    index = ManifestIndex.build(path)
+    statements = len(index)
+    index.close()
+    return (lambda: ManifestIndex.build(path).close()), statements
+
+
+@case("manifest.upstream", sizes=[2000], unit="queries", quick=[2000])
+def bench_manifest_upstream(tmp, issues):
+    from gen_manifest import data_cid
+    from manifest_index import ManifestIndex
+
+    index = ManifestIndex.open(_manifest(tmp, issues))
+    targets = [data_cid(0, "digest", i) for i in range(4, issues, 5)]
+    return (lambda: [index.upstream(target) for target in targets]), len(targets)
+
+
+# -- registration (needs eqty_sdk)
+
+def _sdk_store(tmp: str, name: str):
+    try:
+        import eqty_sdk
+    except ImportError:
+        raise Skip("eqty_sdk not installed")
+    # the API the agent and the SBOM scripts are written against; eqty-sdk 2.4 on PyPI
+    # replaced it (Signer, Context.export), so those cases cannot be timed with it
+    missing = [name for name in ("DID_ALGORITHMS", "generate_manifest") if not hasattr(eqty_sdk, name)]
+    if missing:
+        raise Skip(f"eqty-sdk {importlib.metadata.version('eqty-sdk')} has no {' or '.join(missing)}")
+    store = os.path.join(tmp, name)
+    os.makedirs(store, exist_ok=True)
+    os.chdir(store)
+    eqty_sdk.init()
+    eqty_sdk.DID.new(eqty_sdk.DID_ALGORITHMS.ED25519, name="bench").set_active()
+    return eqty_sdk
+
+
+@case("register.custom", sizes=[100, 1000], unit="statements", quick=[100])
+def bench_register(tmp, n):
+    eqty_sdk = _sdk_store(tmp, f"register_{n}")
+    from content_id import sha256_to_content_id
+    import hashlib
+
+    rounds = [0]
+
+    def run():
+        rounds[0] += 1
+        for i in range(n):
+            cid = sha256_to_content_id(hashlib.sha256(f"{rounds[0]}-{i}".encode()).hexdigest())
+            eqty_sdk.Custom.from_cid(cid, "library", name=f"component-{i}", version="1.0.0")
+    return run, n
+
+
+@case("register.generate_manifest", sizes=[100, 1000], unit="statements", quick=[100])
+def bench_generate_manifest(tmp, n):
+    eqty_sdk = _sdk_store(tmp, f"manifest_{n}")
+    for i in range(n):
+        eqty_sdk.Dataset.from_object({"i": i}, name=f"dataset {i}")
+    manifest = os.path.join(tmp, f"manifest_{n}.json")
+    return (lambda: eqty_sdk.generate_manifest(manifest)), n
+
+
+MIN_SAMPLE_SECONDS = 0.2    # short cases are looped so each sample is at least this long
+
+
+def run_case(setup, tmp: str, size: int, repeat: int) -> dict:
+    cwd = os.getcwd()
+    try:
+        fn, items = setup(tmp, size)
+        start = time.perf_counter()
+        fn()    # warm-up: imports, caches, first-touch page faults
+        first = time.perf_counter() - start
+        number = max(1, math.ceil(MIN_SAMPLE_SECONDS / first)) if first else 1
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            times.append((time.perf_counter() - start) / number)
+    except Skip as e:
+        return {"skipped": str(e)}
+    finally:
+        os.chdir(cwd)
+    median = statistics.median(times)
+    return {
+        "median_seconds": round(median, 6),
+        "min_seconds": round(min(times), 6),
+        "repeat": repeat,
+        "loops": number,
+        "items": items,
+        "items_per_sec": round(items / median, 1) if median else None,
+    }
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "packages": {name: _version(name) for name in ("numpy", "torch", "transformers", "eqty-sdk")},
+    }
+
+
+def _version(name: str) -> Optional[str]:
+    try:
+        return importlib.metadata.version(name)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+def cmd_run(args) -> int:
+    selected = [name for name in CASES if not args.only or any(fnmatch.fnmatch(name, f"*{p}*") for p in args.only)]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in selected:
+            sizes, quick_sizes, unit, setup = CASES[name]
+            for size in (quick_sizes if args.quick else sizes):
+                key = f"{name}[{size}]"
+                result = run_case(setup, tmp, size, args.repeat)
+                result["unit"] = unit
+                results[key] = result
+                if "skipped" in result:
+                    print(f"{key:<40} skipped: {result['skipped']}")
+                else:
+                    print(f"{key:<40} {result['median_seconds'] * 1000:10.1f} ms  {result['items_per_sec']:>14,.0f} {unit}/s")
+
+    report = {"created": time.time(), "environment": environment(), **({"notes": args.note} if args.note else {}),
+              "results": results}
+    out = BASELINE if args.save_baseline else args.output
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {out}")
+    return 0
+
+
+def compare(current: dict, baseline: dict, threshold: float, metric: str = "median_seconds") -> List[dict]:
+    rows = []
+    for key, result in current["results"].items():
+        base = baseline["results"].get(key)
+        if not base or metric not in result or metric not in base:
+            continue
+        ratio = result[metric] / base[metric] if base[metric] else 1.0
+        status = "REGRESSION" if ratio > 1 + threshold else "faster" if ratio < 1 - threshold else "ok"
+        rows.append({"case": key, "baseline": base[metric], "current": result[metric],
+                     "ratio": round(ratio, 3), "status": status})
+    return rows
+
+
+def cmd_compare(args) -> int:
+    with open(args.results, encoding="utf-8") as f:
+        current = json.load(f)
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    if current["environment"] != baseline["environment"]:
+        print("warning: baseline was recorded on a different environment:")
+        print(f"  baseline: {baseline['environment']}")
+        print(f"  current:  {current['environment']}")
+
+    for note in baseline.get("notes", []):
+        print(f"baseline note: {note}")
+
+    rows = compare(current, baseline, args.threshold, f"{args.metric}_seconds")
+    for row in rows:
+        print(f"{row['case']:<40} {row['baseline'] * 1000:10.1f} ms -> {row['current'] * 1000:10.1f} ms"
+              f"  x{row['ratio']:<6} {row['status']}")
+    compared = {row["case"] for row in rows}
+    for key in current["results"]:
+        if key not in compared:
+            base = baseline["results"].get(key)
+            reason = f"baseline skipped: {base['skipped']}" if base and "skipped" in base else \
+                "skipped in this run" if "skipped" in current["results"][key] else "no baseline"
+            print(f"{key:<40} not compared ({reason})")
+    regressions = [row for row in rows if row["status"] == "REGRESSION"]
+    print(f"{len(rows)} cases compared, {len(regressions)} regression(s) past {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="offline benchmark suite")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("list", help="list benchmark cases and sizes")
+
+    p = sub.add_parser("run", help="run the benchmarks and write results json")
+    p.add_argument("-o", "--output", default="bench_results.json")
+    p.add_argument("--only", nargs="*", help="substring(s) of case names to run")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--quick", action="store_true", help="smallest size of each case only")
+    p.add_argument("--save-baseline", action="store_true", help=f"write to {os.path.relpath(BASELINE, ROOT)}")
+    p.add_argument("--note", action="append", help="how this run was recorded; compare prints it (repeatable)")
+
+    p = sub.add_parser("compare", help="compare results against a baseline, exit 1 on regression")
+    p.add_argument("results")
+    p.add_argument("--baseline", default=BASELINE)
+    p.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown, default 0.15 = 15%%")
+    p.add_argument("--metric", choices=["median", "min"], default="median",
+                   help="min (best of repeats) is steadier on noisy machines")
+
+    args = parser.parse_args(argv)
+    if args.command == "list":
+        for name, (sizes, quick_sizes, unit, _) in CASES.items():
+            print(f"{name:<32} sizes {sizes}  quick {quick_sizes}  ({unit})")
+        return 0
+    if args.command == "run":
+        return cmd_run(args)
+    return cmd_compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# run instrumentation: per-stage wall time, call counts and peak memory, free-form
+# counters, and a JSON / Prometheus textfile report at the end of a run
+#
+#   with METRICS.stage("extract"):        # time + peak RSS, for coarse phases
+#       ...
+#   with METRICS.timer("register.custom"): # time only, cheap enough per item
+#       ...
+#   METRICS.count("stage_cache.hit")
+#
+# stage() nests on the calling thread and is meant for the main flow; worker threads
+# should use timer() and count(), which are thread-safe.
+#
+# peak RSS per stage uses the kernel high-water mark (VmHWM), reset at stage entry
+# through /proc/self/clear_refs. where that is not available the stage reports the
+# process-wide ru_maxrss instead, which only shows the peak so far.
+# peak_rss_mb() is that process-wide peak, for the bench_*.py child processes.
+#
+# this is the one copy; sdk-tests/eqtylabs/instrument.py and
+# prototypes/scraper-agent/instrument.py are symlinks to it, so both script
+# directories import it as `instrument` without path setup
+
+
+def _read_hwm_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/status", "rb") as f:
+            for line in f:
+                if line.startswith(b"VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _reset_hwm() -> bool:
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _maxrss_bytes() -> int:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process so far, in MiB."""
+    return _maxrss_bytes() / (1 << 20)
+
+
+class Metrics:
+    def __init__(self, namespace: str, run_id: Optional[str] = None):
+        self.namespace = namespace
+        self.run_id = run_id
+        self.started = time.time()
+        self.stages: Dict[str, dict] = {}
+        self.counters: Dict[str, float] = {}
+        self._open = []         # [name, start, peak bytes of finished inner stages]
+        self._hwm_resettable = None
+        self._run_peak = 0      # resetting VmHWM also resets ru_maxrss, so keep our own
+        self._lock = threading.Lock()
+
+    def _entry(self, name: str) -> dict:
+        entry = self.stages.get(name)
+        if entry is None:
+            entry = self.stages[name] = {"calls": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0}
+        return entry
+
+    def _record(self, name: str, seconds: float, ok: bool) -> dict:
+        with self._lock:
+            entry = self._entry(name)
+            entry["calls"] += 1
+            entry["errors"] += not ok
+            entry["seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+        return entry
+
+    def _peak(self) -> int:
+        if self._hwm_resettable:
+            return _read_hwm_bytes() or 0
+        return _maxrss_bytes()
+
+    @contextmanager
+    def stage(self, name: str):
+        if self._hwm_resettable is None:
+            self._hwm_resettable = _read_hwm_bytes() is not None and _reset_hwm()
+        if self._open:
+            # the outer stage's peak so far, before the reset below forgets it
+            self._open[-1][2] = max(self._open[-1][2], self._peak())
+        if self._hwm_resettable:
+            _reset_hwm()
+        frame = [name, time.perf_counter(), 0]
+        self._open.append(frame)
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self._open.pop()
+            peak = max(frame[2], self._peak())
+            if self._open:
+                self._open[-1][2] = max(self._open[-1][2], peak)
+            entry = self._record(name, time.perf_counter() - frame[1], ok)
+            entry["peak_rss_bytes"] = max(entry.get("peak_rss_bytes", 0), peak)
+            self._run_peak = max(self._run_peak, peak)
+
+    @contextmanager
+    def timer(self, name: str):
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self._record(name, time.perf_counter() - start, ok)
+
+    def count(self, name: str, n: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def report(self) -> dict:
+        stages = {}
+        for name, entry in self.stages.items():
+            stages[name] = {
+                "calls": entry["calls"],
+                "errors": entry["errors"],
+                "seconds": round(entry["seconds"], 6),
+                "max_seconds": round(entry["max_seconds"], 6),
+            }
+            if "peak_rss_bytes" in entry:
+                stages[name]["peak_rss_mb"] = round(entry["peak_rss_bytes"] / (1 << 20), 1)
+        return {
+            "run_id": self.run_id,
+            "started": self.started,
+            "wall_seconds": round(time.time() - self.started, 3),
+            "peak_rss_mb": round(max(self._run_peak, self._peak()) / (1 << 20), 1),
+            "stages": stages,
+            "counters": dict(self.counters),
+        }
+
+    def write_json(self, path: str) -> dict:
+        report = self.report()
+        _atomic_write(path, json.dumps(report, indent=2) + "\n")
+        return report
+
+    # node_exporter textfile collector format
+    def write_prometheus(self, path: str) -> None:
+        ns = self.namespace
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {ns}_{name} {help_text}")
+            lines.append(f"# TYPE {ns}_{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{ns}_{name}{{{labels}}} {value}")
+
+        stages = sorted(self.stages.items())
+        metric("stage_seconds_total", "counter", "Wall time spent in the stage.",
+               [(f'stage="{n}"', round(e["seconds"], 6)) for n, e in stages])
+        metric("stage_calls_total", "counter", "Times the stage ran.",
+               [(f'stage="{n}"', e["calls"]) for n, e in stages])
+        metric("stage_errors_total", "counter", "Times the stage raised.",
+               [(f'stage="{n}"', e["errors"]) for n, e in stages])
+        metric("stage_peak_rss_bytes", "gauge", "Peak resident memory while the stage ran.",
+               [(f'stage="{n}"', e["peak_rss_bytes"]) for n, e in stages if "peak_rss_bytes" in e])
+        metric("events_total", "counter", "Run counters.",
+               [(f'name="{n}"', v) for n, v in sorted(self.counters.items())])
+        lines.append(f"# TYPE {ns}_last_run_timestamp_seconds gauge")
+        lines.append(f"{ns}_last_run_timestamp_seconds {round(self.started, 3)}")
+        _atomic_write(path, "\n".join(lines) + "\n")
+
+
+def _atomic_write(path: str, text: str) -> None:
+    # textfile collectors may read at any time, so never expose a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+from typing import Dict, Optional, Tuple
+
+# registers each distinct blob exactly once and hands out CID references to it, so
+# bundles point at artifacts instead of embedding another copy of them.
+# artifacts that are already on disk (the issue XML, the extracted text) go through
+# register_file: the SDK registers the file from its path and the digest is read in
+# chunks, so no copy of the content is held in memory or JSON-serialized for hashing.
+# blobs are deduplicated on their sha256 and the metadata together: the same bytes
+# registered under another name or description get their own statement, registered
+# by the first one's CID (Dataset.from_cid) so the content is not hashed or stored
+# again, and the second label is not silently dropped. text and files are kept apart:
+# Dataset.from_object stores a text as a JSON string and Document.from_path stores the
+# raw bytes, so the same utf-8 bytes have a different CID as each
+
+HASH_CHUNK_CHARS = 1 << 20
+
+
+# sha256 and byte length of the utf-8 encoding, in one pass over the text in slices
+# so a large artifact is never encoded into a second full-size copy
+def text_digest(text: str) -> Tuple[str, int]:
+    h = hashlib.sha256()
+    size = 0
+    for i in range(0, len(text), HASH_CHUNK_CHARS):
+        block = text[i:i + HASH_CHUNK_CHARS].encode("utf-8")
+        h.update(block)
+        size += len(block)
+    return h.hexdigest(), size
+
+
+_file_digests: Dict[Tuple[str, int, int], str] = {}
+
+
+def _file_key(path: str) -> Tuple[str, int, int]:
+    st = os.stat(path)
+    return os.path.abspath(path), st.st_size, st.st_mtime_ns
+
+
+# sha256 of a file, read in chunks. remembered by path, size and mtime, so the stage
+# cache lookup and the registration of the same file read it once
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    key = _file_key(path)
+    if key in _file_digests:
+        return _file_digests[key]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    _file_digests[key] = h.hexdigest()
+    return _file_digests[key]
+
+
+def _metadata_key(metadata: dict) -> str:
+    return json.dumps(metadata, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class ArtifactStore:
+    def __init__(self):
+        self.by_digest: Dict[Tuple[str, str], object] = {}
+        self.by_key: Dict[Tuple[str, str, str], object] = {}
+        self.bytes_hashed = 0
+        self.registered = 0
+        self.reused = 0
+        self.relabelled = 0
+
+    # register text as a Dataset unless the same bytes were registered already with the
+    # same metadata. digest is the sha256 of the utf-8 text if the caller has it
+    def register_text(self, text: str, digest: Optional[str] = None, **metadata):
+        from eqty_sdk import Dataset
+
+        if digest is None:
+            digest, size = text_digest(text)
+            self.bytes_hashed += size
+        return self._register("text", digest, metadata, lambda: Dataset.from_object(text, **metadata))
+
+    # register a file as a Document from its path unless a file with the same bytes was
+    # registered already with the same metadata. text registered with register_text is
+    # never a match, since its CID is that of the JSON string, not of the raw bytes
+    def register_file(self, path: str, digest: Optional[str] = None, **metadata):
+        from eqty_sdk import Document
+
+        if digest is None:
+            if _file_key(path) not in _file_digests:
+                self.bytes_hashed += os.path.getsize(path)
+            digest = file_digest(path)
+        return self._register("file", digest, metadata, lambda: Document.from_path(path, **metadata))
+
+    def _register(self, kind: str, digest: str, metadata: dict, register):
+        from eqty_sdk import Dataset
+
+        key = (kind, digest, _metadata_key(metadata))
+        if key in self.by_key:
+            self.reused += 1
+            return self.by_key[key]
+
+        if (kind, digest) in self.by_digest:
+            # same content, other metadata: a new statement for the content already stored
+            ds = Dataset.from_cid(self.by_digest[kind, digest].cid, **metadata)
+            self.relabelled += 1
+        else:
+            ds = register()
+            self.by_digest[kind, digest] = ds
+            self.registered += 1
+        self.by_key[key] = ds
+        return ds
+
+    def stats(self) -> dict:
+        return {
+            "registered": self.registered,
+            "reused": self.reused,
+            "relabelled": self.relabelled,
+            "bytes_hashed": self.bytes_hashed,
+        }
+
+
+# reference to a registered artifact, used in place of an inline copy
+def ref(ds, **extra) -> dict:
+    return {"cid": ds.cid, **extra}
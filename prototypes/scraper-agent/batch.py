@@ -0,0 +1,273 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from http_cache import HttpCache
+
+# date-range backfill as a staged pipeline
+#
+#   fetch      threads sharing one pooled requests.Session, rate limited per host
+#   parse      XML -> text in worker processes (CPU bound, off the GIL)
+#   summarize  single consumer on a bounded queue, so the model stays in one process
+#              and inference overlaps with downloads and parsing of later issues
+#
+# stages are connected by bounded queues; a full queue blocks the stage in front of
+# it instead of piling issues up in memory
+
+_DONE = object()
+
+
+def issue_dates(start: date, end: date) -> List[date]:
+    # the Federal Register is not published on weekends
+    days = (end - start).days + 1
+    return [d for d in (start + timedelta(n) for n in range(days)) if d.weekday() < 5]
+
+
+class RateLimiter:
+    """Minimum spacing between requests to the same host, shared by all fetch threads."""
+
+    def __init__(self, requests_per_second: float):
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self.next_slot: Dict[str, float] = {}
+        self.lock = threading.Lock()
+
+    def wait(self, url: str) -> None:
+        if not self.interval:
+            return
+        host = urlparse(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class StageStats:
+    def __init__(self, name: str, q: Optional[queue.Queue] = None):
+        self.name = name
+        self.queue = q
+        self.items = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.depth_samples: List[int] = []
+        self.lock = threading.Lock()
+
+    def record(self, seconds: float, ok: bool = True) -> None:
+        with self.lock:
+            self.items += ok
+            self.errors += not ok
+            self.busy_seconds += seconds
+            if self.queue is not None:
+                self.depth_samples.append(self.queue.qsize())
+
+    def report(self, wall_seconds: float) -> dict:
+        samples = self.depth_samples or [0]
+        return {
+            "items": self.items,
+            "errors": self.errors,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "issues_per_hour": round(self.items * 3600 / wall_seconds, 1) if wall_seconds else None,
+            "input_queue_depth_max": max(samples),
+            "input_queue_depth_mean": round(sum(samples) / len(samples), 2),
+        }
+
+
+def pooled_session(pool_size: int) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# runs in a worker process; through the stage cache, so an issue extracted before
+# (by an earlier backfill or a single-issue run) is copied rather than parsed again
+def _parse_issue(xml_path: str, text_path: str) -> str:
+    from frscraperagent import stage_extract
+
+    return stage_extract(xml_path, text_path)
+
+
+def run_batch(
+    start: date,
+    end: date,
+    process_issue: Callable[[str, str, str, str], None],
+    url_template: str,
+    out_dir: str = ".",
+    cache_dir: str = ".fr_cache",
+    fetch_workers: int = 4,
+    parse_workers: int = 2,
+    requests_per_second: float = 2.0,
+    queue_size: int = 4,
+) -> dict:
+    """
+    Fetch, parse and process every issue between start and end (inclusive).
+    process_issue(issue_date, url, xml_path, text_path) runs on the calling thread
+    for each parsed issue, in completion order. Returns per-stage stats.
+    """
+    dates = issue_dates(start, end)
+    date_q: queue.Queue = queue.Queue()
+    parse_q: queue.Queue = queue.Queue(maxsize=queue_size)
+    summarize_q: queue.Queue = queue.Queue(maxsize=queue_size)
+    for d in dates:
+        date_q.put(d.isoformat())
+
+    stats = {
+        # each stage samples the depth of the queue it reads from
+        "fetch": StageStats("fetch", date_q),
+        "parse": StageStats("parse", parse_q),
+        "summarize": StageStats("summarize", summarize_q),
+    }
+    missing: List[str] = []
+    failed: Dict[str, str] = {}
+
+    session = pooled_session(fetch_workers)
+    cache = HttpCache(cache_dir, session=session)
+    limiter = RateLimiter(requests_per_second)
+
+    def fetcher():
+        while True:
+            try:
+                issue_date = date_q.get_nowait()
+            except queue.Empty:
+                return
+            url = url_template.format(date=issue_date)
+            limiter.wait(url)
+            t = time.perf_counter()
+            try:
+                xml_path = cache.fetch(url)
+            except requests.HTTPError as e:
+                if e.response is not None and e.response.status_code == 404:
+                    missing.append(issue_date)  # holiday, no issue published
+                else:
+                    failed[issue_date] = str(e)
+                stats["fetch"].record(time.perf_counter() - t, ok=False)
+                continue
+            except Exception as e:
+                # a network error, or anything else (a full disk, a bad cache entry): the
+                # issue fails and the thread moves on, rather than dying with the queue unread
+                failed[issue_date] = str(e) or type(e).__name__
+                stats["fetch"].record(time.perf_counter() - t, ok=False)
+                continue
+            stats["fetch"].record(time.perf_counter() - t)
+            parse_q.put((issue_date, url, xml_path))
+
+    def parser(pool: ProcessPoolExecutor):
+        while True:
+            item = parse_q.get()
+            if item is _DONE:
+                return
+            issue_date, url, xml_path = item
+            text_path = os.path.join(out_dir, f"fr_{issue_date.replace('-', '_')}_full.txt")
+            t = time.perf_counter()
+            try:
+                pool.submit(_parse_issue, xml_path, text_path).result()
+            except Exception as e:
+                failed[issue_date] = f"parse: {e}"
+                stats["parse"].record(time.perf_counter() - t, ok=False)
+                continue
+            stats["parse"].record(time.perf_counter() - t)
+            summarize_q.put((issue_date, url, xml_path, text_path))
+
+    wall_start = time.perf_counter()
+    with ProcessPoolExecutor(parse_workers) as pool:
+        fetchers = [threading.Thread(target=fetcher, daemon=True) for _ in range(fetch_workers)]
+        parsers = [threading.Thread(target=parser, args=(pool,), daemon=True) for _ in range(parse_workers)]
+        for t in fetchers + parsers:
+            t.start()
+
+        def close_stages():
+            for t in fetchers:
+                t.join()
+            for _ in parsers:
+                parse_q.put(_DONE)
+            for t in parsers:
+                t.join()
+            summarize_q.put(_DONE)
+
+        threading.Thread(target=close_stages, daemon=True).start()
+
+        while True:
+            item = summarize_q.get()
+            if item is _DONE:
+                break
+            t = time.perf_counter()
+            try:
+                process_issue(*item)
+            except Exception as e:
+                failed[item[0]] = f"summarize: {e}"
+                stats["summarize"].record(time.perf_counter() - t, ok=False)
+                continue
+            stats["summarize"].record(time.perf_counter() - t)
+
+    wall_seconds = time.perf_counter() - wall_start
+    report = {name: s.report(wall_seconds) for name, s in stats.items()}
+    report.update({
+        "issues": len(dates),
+        "missing": sorted(missing),
+        "failed": failed,
+        "wall_seconds": round(wall_seconds, 3),
+        "issues_per_hour": round(stats["summarize"].items * 3600 / wall_seconds, 1) if wall_seconds else None,
+    })
+    return report
+
+
+# backfill: python batch.py 2025-07-01 2025-07-31
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from eqty_sdk import purge_integrity_store
+
+    import frscraperagent as agent
+
+    parser = argparse.ArgumentParser(description="Federal Register date-range backfill")
+    parser.add_argument("start", type=date.fromisoformat)
+    parser.add_argument("end", type=date.fromisoformat)
+    parser.add_argument("--url-template", default=agent.FEDERAL_REGISTER_URL_TEMPLATE)
+    parser.add_argument("--out-dir", default=".")
+    parser.add_argument("--fetch-workers", type=int, default=4)
+    parser.add_argument("--parse-workers", type=int, default=2)
+    parser.add_argument("--rps", type=float, default=2.0, help="max requests/sec per host")
+    parser.add_argument("--queue-size", type=int, default=4)
+    parser.add_argument("--report", default="batch_report.json")
+    parser.add_argument("--manifest-dir", default=agent.MANIFEST_DIR,
+                        help="export only new statements, as a shard in this directory")
+    args = parser.parse_args()
+
+    agent.init_signer()
+    artifacts = agent.ArtifactStore()   # shared, so identical blobs across issues register once
+
+    # summaries go through the stage cache too; the model is only loaded on the first
+    # miss, so re-running a backfill over summarized issues does not load it at all
+    def process_issue(issue_date, url, xml_path, text_path):
+        summary_path = text_path.replace("_full.txt", "_summary.json")
+        result = agent.stage_summarize(text_path, summary_path, url, load=agent.load_summarizer_once)
+        agent.register_result(issue_date, xml_path, text_path, result, artifacts)
+        cached = (result.get("cache") or {}).get("computation_cid")
+        print(f"{issue_date}: registered" + (" (summary from stage cache)" if cached else ""))
+
+    report = run_batch(
+        args.start, args.end, process_issue, args.url_template,
+        out_dir=args.out_dir,
+        cache_dir=agent.HTTP_CACHE_DIR,
+        fetch_workers=args.fetch_workers,
+        parse_workers=args.parse_workers,
+        requests_per_second=args.rps,
+        queue_size=args.queue_size,
+    )
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+    agent.export_manifest("./manifest.json", args.manifest_dir)
+    purge_integrity_store()
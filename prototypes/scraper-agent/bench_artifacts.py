@@ -0,0 +1,73 @@
+# Benchmark: bytes hashed / stored per issue, inline bundle vs CID-referenced artifacts
+#
+# The SDK hashes the JCS serialization of every object it registers, so the byte counts
+# below use the same canonical JSON (sorted keys, no whitespace). With store_all_blobs
+# enabled these are also the bytes written to .eqty_sdk/store/json-jcs.
+#
+#   python bench_artifacts.py [--scale N]
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from artifacts import text_digest
+from bench_extract import SOURCE_TEXT, build_issue_xml
+
+
+def jcs_len(obj) -> int:
+    return len(json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="inline vs deduplicated artifact registration")
+    parser.add_argument("--scale", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        xml_path = os.path.join(tmp, "issue.xml")
+        build_issue_xml(xml_path, args.scale)
+        with open(xml_path, encoding="utf-8") as f:
+            xml_text = f.read()
+    with open(SOURCE_TEXT, encoding="utf-8") as f:
+        full_text = "\n\n".join([f.read()] * args.scale)
+    summary = full_text[:2000]
+    metadata = {"agent_name": "fr-summariser", "agent_version": "v0.1", "run_id": "0" * 32}
+    fake_cid = "bafkr4i" + "a" * 52
+
+    # before: bundle embeds full_text, model_input and xml, then full_text and summary
+    # are registered again on their own
+    inline = {"full_text": full_text, "model_input": full_text, "summary": summary,
+              "metadata": metadata, "xml": xml_text}
+    before = {
+        "bundle": jcs_len(inline),
+        "full_text": jcs_len(full_text),
+        "summary": jcs_len(summary),
+    }
+
+    # after: each blob once, bundle holds CID references
+    refs = {"full_text": {"cid": fake_cid}, "model_input": {"cid": fake_cid, "chars": len(full_text)},
+            "summary": {"cid": fake_cid}, "metadata": metadata, "xml": {"cid": fake_cid}}
+    after = {
+        "xml": jcs_len(xml_text),
+        "full_text": jcs_len(full_text),
+        "summary": jcs_len(summary),
+        "bundle": jcs_len(refs),
+    }
+
+    start = time.perf_counter()
+    for blob in (xml_text, full_text, summary):
+        text_digest(blob)
+    digest_seconds = time.perf_counter() - start
+
+    total_before, total_after = sum(before.values()), sum(after.values())
+    print(f"issue: xml {len(xml_text) / 1e6:.2f} MB, text {len(full_text) / 1e6:.2f} MB")
+    print(f"inline bundle:   {total_before / 1e6:8.2f} MB hashed/stored  {before}")
+    print(f"CID references:  {total_after / 1e6:8.2f} MB hashed/stored  {after}")
+    print(f"saved:           {(total_before - total_after) / 1e6:8.2f} MB ({1 - total_after / total_before:.0%})")
+    print(f"streaming sha256 of all artifacts: {digest_seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
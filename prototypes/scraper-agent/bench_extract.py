@@ -0,0 +1,99 @@
+# Benchmark: BeautifulSoup xml_to_text vs streaming iter_paragraphs/extract_to_file
+#
+# There is no XML checked in, so a Federal Register-shaped issue is rebuilt from the
+# paragraphs in fr_2025_07_28_full.txt (plus a TOC and inline markup). Each mode runs in
+# its own child process so peak RSS of one does not leak into the other.
+#
+#   python bench_extract.py [--scale N]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from xml.sax.saxutils import escape
+
+from instrument import peak_rss_mb
+
+SOURCE_TEXT = "fr_2025_07_28_full.txt"
+
+
+def build_issue_xml(out_path: str, scale: int = 1) -> None:
+    with open(SOURCE_TEXT, encoding="utf-8") as f:
+        paragraphs = f.read().split("\n\n")  # keep empty <P>s, they show up in the output too
+
+    with open(out_path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<FEDREG>\n<CNTNTS>\n<TOC>\n')
+        for p in paragraphs[:200]:
+            f.write(f"<P>{escape(p[:80])}</P>\n")
+        f.write("</TOC>\n</CNTNTS>\n<RULES>\n")
+        for _ in range(scale):
+            for i, p in enumerate(paragraphs):
+                if i % 50 == 0:
+                    f.write("</RULE>\n<RULE>\n" if i else "<RULE>\n")
+                words = escape(p).split(" ")
+                if len(words) > 4:
+                    # inline emphasis like the real issue XML, text must still come out the same
+                    words[2] = f'<E T="03">{words[2]}</E>'
+                f.write(f"<P>\n  {' '.join(words)} </P>\n")
+            f.write("</RULE>\n")
+        f.write("</RULES>\n</FEDREG>\n")
+
+
+def _child(mode: str, xml_path: str, out_path: str) -> None:
+    import frscraperagent as agent
+
+    base_rss = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "bs4":
+        with open(xml_path, encoding="utf-8") as f:
+            full_text = agent.xml_to_text(f.read())
+        with open(out_path, "w", encoding="utf-8") as f:
+            f.write(full_text)
+    else:
+        agent.extract_to_file(xml_path, out_path)
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "mode": mode,
+        "wall_s": round(elapsed, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "extract_rss_mb": round(peak_rss_mb() - base_rss, 1),  # on top of import cost
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="xml_to_text vs streaming extraction benchmark")
+    parser.add_argument("--scale", type=int, default=1, help="repeat the issue body N times")
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        xml_path = os.path.join(tmp, "issue.xml")
+        build_issue_xml(xml_path, args.scale)
+        print(f"issue xml: {os.path.getsize(xml_path) / 1e6:.1f} MB")
+
+        outputs = {}
+        for mode in ("bs4", "stream"):
+            outputs[mode] = os.path.join(tmp, f"{mode}.txt")
+            result = subprocess.run(
+                [sys.executable, __file__, "--child", mode, xml_path, outputs[mode]],
+                check=True, capture_output=True, text=True,
+            )
+            print(result.stdout.strip().splitlines()[-1])
+
+        with open(outputs["bs4"], "rb") as a, open(outputs["stream"], "rb") as b:
+            same = a.read() == b.read()
+        print("outputs identical:", same)
+        if not same:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# Benchmark: fp32 vs dynamic int8 summarization backends (inference.py)
+#
+# each run is its own child process, since torch only lets inter-op threads be set once
+# per process. a child loads the backend and summarizes the first --samples map-stage
+# chunks of the issue (the inputs summarize_map_reduce feeds the model):
+#   latency     one chunk per call, median and p90
+#   throughput  all chunks in batches of --batch-size
+# int8 runs twice: first with an empty model cache (quantize + save), then loading the
+# cached model; the two must summarize every chunk identically. drift is ROUGE-1/2/L F1
+# of each int8 summary against the fp32 summary of the same chunk (1.0 = identical
+# output). --tiny swaps in a randomly initialised two-layer BART with a small byte-level
+# BPE tokenizer trained on the issue text, so it runs offline in seconds but is only good
+# for checking the plumbing; --model also takes a local checkpoint directory
+#
+#   python bench_inference.py [--model sshleifer/distilbart-cnn-12-6] [--samples 8] [--threads 4]
+#   python bench_inference.py --tiny --samples 4
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from instrument import peak_rss_mb
+
+SOURCE_TEXT = "fr_2025_07_28_full.txt"
+
+
+def _child(model: str, backend: str, threads: int, samples: int, batch_size: int, cache_dir: str) -> None:
+    from inference import load_summarizer
+    from summarize import CHUNK_SUMMARY_PARAMS, chunk_paragraphs
+
+    summarizer = load_summarizer(model, backend, threads, 1, cache_dir=cache_dir)
+    load_rss = peak_rss_mb()
+    with open(SOURCE_TEXT, encoding="utf-8") as f:
+        text = f.read(samples * 8000)
+    chunks = chunk_paragraphs(text.split("\n\n"), summarizer.tokenizer)[:samples]
+    params = {"truncation": True, "do_sample": False, **CHUNK_SUMMARY_PARAMS}
+
+    summaries, latencies = [], []
+    for chunk in chunks:
+        start = time.perf_counter()
+        summaries.append(summarizer(chunk, **params)[0]["summary_text"])
+        latencies.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    summarizer(chunks, batch_size=batch_size, **params)
+    batch_seconds = time.perf_counter() - start
+
+    print(json.dumps({
+        "backend": backend,
+        "info": summarizer.info,
+        "chunks": len(chunks),
+        "latency_ms": {"median": round(statistics.median(latencies) * 1000, 1),
+                       "p90": round(sorted(latencies)[int(0.9 * (len(latencies) - 1))] * 1000, 1)},
+        "chunks_per_sec": round(len(chunks) / batch_seconds, 3),
+        "load_rss_mb": round(load_rss, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "summaries": summaries,
+    }))
+
+
+def _tokens(text: str):
+    return re.findall(r"\w+", text.lower())
+
+
+def _f1(overlap: int, hyp: int, ref: int) -> float:
+    if not overlap:
+        return 0.0
+    precision, recall = overlap / hyp, overlap / ref
+    return 2 * precision * recall / (precision + recall)
+
+
+def rouge_n(ref: str, hyp: str, n: int) -> float:
+    ref_grams = Counter(zip(*(_tokens(ref)[i:] for i in range(n))))
+    hyp_grams = Counter(zip(*(_tokens(hyp)[i:] for i in range(n))))
+    if not ref_grams and not hyp_grams:
+        return 1.0
+    return _f1(sum((ref_grams & hyp_grams).values()), sum(hyp_grams.values()), sum(ref_grams.values()))
+
+
+def rouge_l(ref: str, hyp: str) -> float:
+    a, b = _tokens(ref), _tokens(hyp)
+    if not a and not b:
+        return 1.0
+    row = [0] * (len(b) + 1)
+    for x in a:
+        prev = 0
+        for j, y in enumerate(b, 1):
+            prev, row[j] = row[j], prev + 1 if x == y else max(row[j], row[j - 1])
+    return _f1(row[-1], len(b), len(a))
+
+
+def make_tiny_model(directory: str, vocab_size: int = 2000, source: str = SOURCE_TEXT) -> str:
+    from tokenizers import ByteLevelBPETokenizer, processors
+    from transformers import BartConfig, BartForConditionalGeneration, BartTokenizerFast
+
+    # BART's special token ids (<s> 0, <pad> 1, </s> 2), which BartConfig defaults to
+    bpe = ByteLevelBPETokenizer()
+    with open(source, encoding="utf-8") as f:
+        bpe.train_from_iterator(f.read(400_000).split("\n\n"), vocab_size=vocab_size, min_frequency=2,
+                                special_tokens=["<s>", "<pad>", "</s>", "<unk>", "<mask>"])
+    bpe.post_processor = processors.RobertaProcessing(("</s>", 2), ("<s>", 0))
+    tokenizer = BartTokenizerFast(tokenizer_object=bpe._tokenizer, model_max_length=1024)
+    config = BartConfig(vocab_size=len(tokenizer), d_model=64, encoder_layers=2, decoder_layers=2,
+                        encoder_attention_heads=4, decoder_attention_heads=4, encoder_ffn_dim=128,
+                        decoder_ffn_dim=128, max_position_embeddings=1024)
+    model = BartForConditionalGeneration(config)
+    # distilbart-cnn's length settings; without a max_length the pipeline generates 256 new tokens
+    model.generation_config.update(max_length=142, min_length=56, num_beams=4, length_penalty=2.0,
+                                   no_repeat_ngram_size=3)
+    model.save_pretrained(directory)
+    tokenizer.save_pretrained(directory)
+    return directory
+
+
+def _run(args, model: str, backend: str, cache_dir: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, __file__, "--child", model, backend, str(args.threads), str(args.samples),
+         str(args.batch_size), cache_dir],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="fp32 vs int8 summarization latency, throughput and drift")
+    parser.add_argument("--model", default="sshleifer/distilbart-cnn-12-6")
+    parser.add_argument("--tiny", action="store_true", help="random two-layer BART with a locally trained tokenizer")
+    parser.add_argument("--samples", type=int, default=8, help="map-stage chunks to summarize")
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--child", nargs=6, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        model, backend, threads, samples, batch_size, cache_dir = args.child
+        _child(model, backend, int(threads), int(samples), int(batch_size), cache_dir)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model = make_tiny_model(os.path.join(tmp, "tiny")) if args.tiny else args.model
+        cache_dir = os.path.join(tmp, "model_cache")
+        runs = [("fp32", _run(args, model, "fp32", cache_dir)),
+                ("int8 (quantize)", _run(args, model, "int8", cache_dir)),
+                ("int8 (cached)", _run(args, model, "int8", cache_dir))]
+
+    print(f"{args.samples} chunks, {args.threads} threads, batch size {args.batch_size}")
+    print(f"{'backend':<16} {'load s':>7} {'median ms':>10} {'p90 ms':>8} {'chunks/s':>9} {'load MB':>8} {'peak MB':>8}")
+    for name, run in runs:
+        print(f"{name:<16} {run['info']['load_seconds']:>7} {run['latency_ms']['median']:>10} "
+              f"{run['latency_ms']['p90']:>8} {run['chunks_per_sec']:>9} {run['load_rss_mb']:>8} {run['peak_rss_mb']:>8}")
+
+    fp32, int8 = runs[0][1], runs[2][1]
+    drift = {
+        "rouge1": [rouge_n(r, h, 1) for r, h in zip(fp32["summaries"], int8["summaries"])],
+        "rouge2": [rouge_n(r, h, 2) for r, h in zip(fp32["summaries"], int8["summaries"])],
+        "rougeL": [rouge_l(r, h) for r, h in zip(fp32["summaries"], int8["summaries"])],
+    }
+    print("int8 vs fp32 ROUGE F1 (mean / min): " + ", ".join(
+        f"{name} {statistics.mean(scores):.3f} / {min(scores):.3f}" for name, scores in drift.items()))
+    print(f"speedup: {fp32['latency_ms']['median'] / int8['latency_ms']['median']:.2f}x latency, "
+          f"{int8['chunks_per_sec'] / fp32['chunks_per_sec']:.2f}x throughput; "
+          f"identical summaries: {sum(a == b for a, b in zip(fp32['summaries'], int8['summaries']))}/{fp32['chunks']}")
+    cold, warm = runs[1][1], runs[2][1]
+    same = sum(a == b for a, b in zip(cold["summaries"], warm["summaries"]))
+    print(f"int8 cached vs quantized: {same}/{cold['chunks']} identical summaries")
+    if cold["info"]["quantization"]["cache_hit"] or not warm["info"]["quantization"]["cache_hit"]:
+        raise SystemExit("quantized model cache was not used as expected")
+    if same != cold["chunks"]:
+        raise SystemExit("the cached int8 model does not summarize like the one it was saved from")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# Benchmark: daily manifest export, full re-export vs incremental shards
+#
+# a local integrity store is filled with `--issues` issues worth of statements (written
+# the way the SDK lays them out, one file per statement / blob), then each simulated day
+# adds `--daily` more issues and exports. the full export reads every store file and
+# writes one manifest.json, which is the work generate_manifest has to do; the
+# incremental export writes only the new files as a shard. at the end the shards are
+# compacted and checked against the last full export
+#
+#   python bench_manifest_export.py [--issues 2000] [--daily 1] [--days 5]
+
+import argparse
+import base64
+import json
+import os
+import tempfile
+import time
+
+from gen_manifest import write_manifest
+from manifest_export import ShardedManifest, scan_store
+from manifest_index import iter_manifest
+
+STATEMENT_DIRS = {
+    "ComputationRegistration": "computations",
+    "DataRegistration": "data-registrations",
+    "MetadataRegistration": "metadata",
+    "CredentialRegistration": "vc-registrations",
+}
+
+
+def add_to_store(store_root: str, manifest_path: str) -> int:
+    """Explode a manifest into store files; returns the number of files written."""
+    written = 0
+    for section, key, value in iter_manifest(manifest_path):
+        if section == "statements":
+            directory = os.path.join(store_root, "statements", STATEMENT_DIRS.get(value["@type"], "other"))
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, key[len("urn:cid:"):] + ".jsonld"), "w", encoding="utf-8") as f:
+                json.dump(value, f, indent=2)
+        elif section == "blobs":
+            os.makedirs(os.path.join(store_root, "json-jcs"), exist_ok=True)
+            with open(os.path.join(store_root, "json-jcs", key), "wb") as f:
+                f.write(base64.b64decode(value))
+        else:
+            continue
+        written += 1
+    return written
+
+
+def full_export(store_root: str, manifest_path: str) -> None:
+    statements, blobs = {}, {}
+    for kind, cid, path, _ in scan_store(store_root):
+        with open(os.path.join(store_root, path), "rb") as f:
+            raw = f.read()
+        if kind == "statement":
+            statements[cid] = json.loads(raw)
+        else:
+            blobs[cid] = base64.b64encode(raw).decode("ascii")
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump({"version": "2", "contexts": {}, "statements": statements, "blobs": blobs}, f,
+                  separators=(",", ":"))
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="full vs incremental manifest export")
+    parser.add_argument("--issues", type=int, default=2000, help="issues already in the store")
+    parser.add_argument("--daily", type=int, default=1, help="issues registered per day")
+    parser.add_argument("--days", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = os.path.join(tmp, "store")
+        batch = os.path.join(tmp, "batch.json")
+        write_manifest(batch, args.issues)
+        files = add_to_store(store, batch)
+        sharded = ShardedManifest(os.path.join(tmp, "manifest.d"))
+        _, first_s = timed(sharded.export, store)
+        print(f"store: {files} files; first export (everything): {first_s:.2f} s")
+
+        full_path = os.path.join(tmp, "manifest.json")
+        print(f"{'day':>4} {'new files':>10} {'full export':>13} {'incremental':>13}")
+        for day in range(1, args.days + 1):
+            write_manifest(batch, args.daily, seed=day)
+            new = add_to_store(store, batch)
+            _, full_s = timed(full_export, store, full_path)
+            shard, incremental_s = timed(sharded.export, store)
+            assert shard and shard["statements"] + shard["blobs"] == new, shard
+            print(f"{day:>4} {new:>10} {full_s * 1000:>10.0f} ms {incremental_s * 1000:>10.1f} ms")
+
+        compact_path = os.path.join(tmp, "compacted.json")
+        counts, compact_s = timed(sharded.compact, compact_path)
+        print(f"compact {counts['shards']} shards -> {os.path.getsize(compact_path) / 1e6:.1f} MB: {compact_s:.2f} s")
+        with open(full_path, encoding="utf-8") as a, open(compact_path, encoding="utf-8") as b:
+            same = json.load(a) == json.load(b)
+        print("compacted manifest matches full export:", same)
+        if not same:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
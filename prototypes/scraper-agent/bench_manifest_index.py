@@ -0,0 +1,129 @@
+# Benchmark: lineage queries against a large manifest, json.load + scan vs the on-disk index
+#
+# each mode runs in its own process so peak RSS is per mode:
+#   load   json.load the manifest, scan it for computations, walk upstream from each target
+#   build  stream the manifest once into manifest_index.ManifestIndex
+#   query  open the existing index in a fresh process and run the same upstream walks
+# the targets are digest outputs (three hops from the raw XML). both modes must agree
+# on every answer
+#
+#   python bench_manifest_index.py [--issues 5000] [--queries 200]
+
+import argparse
+import hashlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from gen_manifest import data_cid, write_manifest
+from instrument import peak_rss_mb
+
+DIGEST_EVERY = 5
+
+
+def _targets(issues: int, queries: int):
+    digests = [data_cid(0, "digest", i) for i in range(DIGEST_EVERY - 1, issues, DIGEST_EVERY)]
+    step = max(1, len(digests) // queries)
+    return digests[::step][:queries]
+
+
+def _scan_upstream(statements: dict, producers: dict, cid: str):
+    found, frontier, depth = set(), [cid], 0
+    while frontier:
+        depth += 1
+        next_frontier = []
+        for artifact in frontier:
+            for computation in producers.get(artifact, ()):
+                for source in statements[computation]["input"]:
+                    if (source, computation) not in found:
+                        found.add((source, computation))
+                        next_frontier.append(source)
+        frontier = next_frontier
+    return found
+
+
+def _answer_digest(answers) -> str:
+    return hashlib.sha256(json.dumps(sorted(map(sorted, answers))).encode()).hexdigest()[:16]
+
+
+def _child(mode: str, manifest_path: str, issues: int, queries: int) -> None:
+    from manifest_index import ManifestIndex
+
+    targets = _targets(issues, queries)
+    result = {"mode": mode}
+    start = time.perf_counter()
+    if mode == "build":
+        ManifestIndex.build(manifest_path)
+        result["build_s"] = round(time.perf_counter() - start, 3)
+    elif mode == "load":
+        with open(manifest_path, encoding="utf-8") as f:
+            statements = json.load(f)["statements"]
+        producers = {}
+        for cid, statement in statements.items():
+            for output in statement.get("output", ()):
+                producers.setdefault(output, []).append(cid)
+        result["load_s"] = round(time.perf_counter() - start, 3)
+        times, answers = [], []
+        for target in targets:
+            t = time.perf_counter()
+            answers.append(_scan_upstream(statements, producers, target))
+            times.append(time.perf_counter() - t)
+    else:
+        index = ManifestIndex(manifest_path + ".index.sqlite")
+        result["open_s"] = round(time.perf_counter() - start, 4)
+        times, answers = [], []
+        for target in targets:
+            t = time.perf_counter()
+            answers.append({(artifact, computation) for artifact, computation, _ in index.upstream(target)})
+            times.append(time.perf_counter() - t)
+
+    if mode != "build":
+        result["first_answer_s"] = round(time.perf_counter() - start - sum(times[1:]), 4)
+        result["query_median_ms"] = round(statistics.median(times) * 1000, 3)
+        result["upstream_rows"] = sum(map(len, answers))
+        result["answers"] = _answer_digest(answers)
+    result["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="json.load + scan vs indexed manifest lineage queries")
+    parser.add_argument("--issues", type=int, default=5000, help="synthetic issues (about 21 statements each)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--child", nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        mode, path, issues, queries = args.child
+        _child(mode, path, int(issues), int(queries))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest_path = os.path.join(tmp, "manifest.json")
+        n = write_manifest(manifest_path, args.issues, digest_every=DIGEST_EVERY)
+        print(f"manifest: {n} statements, {os.path.getsize(manifest_path) / 1e6:.1f} MB")
+
+        results = {}
+        for mode in ("load", "build", "query"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", mode, manifest_path, str(args.issues), str(args.queries)],
+                check=True, capture_output=True, text=True,
+            )
+            results[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+            print(json.dumps(results[mode]))
+        print(f"index: {os.path.getsize(manifest_path + '.index.sqlite') / 1e6:.1f} MB")
+
+    load, query = results["load"], results["query"]
+    print(f"time to first answer: {load['first_answer_s']:.3f} s cold load vs "
+          f"{query['first_answer_s']:.4f} s from the index ({load['first_answer_s'] / query['first_answer_s']:.0f}x)")
+    print("answers identical:", load["answers"] == query["answers"])
+    if load["answers"] != query["answers"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
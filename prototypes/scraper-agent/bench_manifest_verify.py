@@ -0,0 +1,176 @@
+# Benchmark: offline manifest verification (manifest_verify.py)
+#
+# gen_manifest writes placeholder CIDs and signatures, so the generated manifest is
+# first re-issued for real: every statement and blob gets its actual CID and every
+# CredentialRegistration a real Ed25519Signature2018 proof from a throwaway did:key per
+# signer, with the JSON-LD contexts copied from a manifest written by the SDK. then:
+#   cold       verify everything with each --workers setting, no cache
+#   grown      add --grow issues to the manifest and verify again against the cache
+#              from the cold run, so only the new entries are checked
+#   tampered   change one credential and one blob and check both are reported, along
+#              with the statement the credential no longer binds
+# needs pyld, rfc8785, blake3 and cryptography (the verifier's optional dependencies)
+#
+#   python bench_manifest_verify.py [--issues 500] [--grow 25] [--workers 0,1,4]
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+import manifest_verify
+from gen_manifest import write_manifest
+from manifest_verify import B58_ALPHABET, CODEC_JSON_JCS, CODEC_RDFC, HASH_BLAKE3, VerifyCache, verify_manifest
+
+JWS_HEADER = base64.urlsafe_b64encode(b'{"alg":"EdDSA","crit":["b64"],"b64":false}').decode().rstrip("=")
+CREDENTIAL_CONTEXT = ["https://www.w3.org/ns/credentials/v2", "https://w3id.org/security/v2"]
+
+
+def _b58encode(data: bytes) -> str:
+    n, out = int.from_bytes(data, "big"), ""
+    while n:
+        n, r = divmod(n, 58)
+        out = B58_ALPHABET[r] + out
+    return "1" * (len(data) - len(data.lstrip(b"\x00"))) + out
+
+
+def _varint(n: int) -> bytes:
+    out = b""
+    while n >= 0x80:
+        out += bytes([n & 0x7F | 0x80])
+        n >>= 7
+    return out + bytes([n])
+
+
+def _cid(codec: int, content: bytes) -> str:
+    data = _varint(1) + _varint(codec) + _varint(HASH_BLAKE3) + _varint(32) + manifest_verify.blake3.blake3(content).digest()
+    return "b" + base64.b32encode(data).decode("ascii").lower().rstrip("=")
+
+
+def _statement_cid(statement: dict) -> str:
+    return "urn:cid:" + _cid(CODEC_RDFC, manifest_verify._canonical(
+        {k: v for k, v in statement.items() if k != "@id"}))
+
+
+def _did_key(key: Ed25519PrivateKey) -> str:
+    public = key.public_key().public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+    return "did:key:z" + _b58encode(manifest_verify.ED25519_PUB + public)
+
+
+def _sign(credential: dict, key: Ed25519PrivateKey) -> dict:
+    proof = {"@context": credential["@context"], "type": "Ed25519Signature2018", "proofPurpose": "assertionMethod",
+             "verificationMethod": f"{credential['issuer']}#{credential['issuer'][len('did:key:'):]}",
+             "created": credential["issuanceDate"]}
+    payload = hashlib.sha256(manifest_verify._canonical(proof)).digest() + \
+        hashlib.sha256(manifest_verify._canonical(credential)).digest()
+    signature = key.sign(JWS_HEADER.encode("ascii") + b"." + payload)
+    del proof["@context"]
+    proof["jws"] = JWS_HEADER + ".." + base64.urlsafe_b64encode(signature).decode().rstrip("=")
+    return {**credential, "proof": proof}
+
+
+def write_signed_manifest(path: str, contexts: dict, n_issues: int, seed: int = 0) -> int:
+    """A gen_manifest manifest re-issued with real CIDs and signatures; returns the statement count."""
+    write_manifest(path, n_issues, seed=seed)
+    with open(path, encoding="utf-8") as f:
+        fake = json.load(f)
+    keys, renamed, statements, blobs = {}, {}, {}, {}
+    for old_blob, data in fake["blobs"].items():
+        renamed["urn:cid:" + old_blob] = "urn:cid:" + _cid(CODEC_JSON_JCS, manifest_verify._jcs(
+            json.loads(base64.b64decode(data))))
+        blobs[renamed["urn:cid:" + old_blob][len("urn:cid:"):]] = data
+    manifest_verify._init_worker(contexts)
+    for old_cid, statement in fake["statements"].items():
+        signer = statement.get("registeredBy") or statement["credential"]["issuer"]
+        if signer not in keys:
+            keys[signer] = Ed25519PrivateKey.generate()
+            renamed[signer] = _did_key(keys[signer])
+        statement = {k: renamed.get(v, v) if isinstance(v, str) else v for k, v in statement.items()}
+        if statement["@type"] == "CredentialRegistration":
+            credential = {"@context": CREDENTIAL_CONTEXT, "id": f"urn:uuid:{old_cid[-32:]}", "type": ["VerifiableCredential"],
+                          "credentialSubject": {"id": renamed[statement["credential"]["credentialSubject"]["id"]]},
+                          "issuer": renamed[signer], "issuanceDate": statement["credential"]["issuanceDate"]}
+            statement["credential"] = _sign(credential, keys[signer])
+            statement["registeredBy"] = renamed[signer]
+            statement["timestamp"] = credential["issuanceDate"]
+        statement["@id"] = renamed[old_cid] = _statement_cid(statement)
+        statements[statement["@id"]] = statement
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": "2", "contexts": contexts, "statements": statements, "blobs": blobs}, f,
+                  separators=(",", ":"))
+    return len(statements)
+
+
+def merge(path: str, *paths: str) -> None:
+    merged = {"version": "2", "contexts": {}, "statements": {}, "blobs": {}}
+    for p in paths:
+        with open(p, encoding="utf-8") as f:
+            manifest = json.load(f)
+        for section in ("contexts", "statements", "blobs"):
+            merged[section].update(manifest[section])
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(merged, f, separators=(",", ":"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="parallel, incremental manifest verification")
+    parser.add_argument("--issues", type=int, default=500)
+    parser.add_argument("--grow", type=int, default=25, help="issues added before the incremental run")
+    parser.add_argument("--workers", default=f"0,1,{os.cpu_count() or 1}", help="comma-separated pool sizes")
+    parser.add_argument("--contexts-from", default="manifest.json", help="SDK manifest to copy contexts from")
+    args = parser.parse_args()
+
+    with open(args.contexts_from, encoding="utf-8") as f:
+        contexts = json.load(f)["contexts"]
+    with tempfile.TemporaryDirectory() as tmp:
+        base, extra, grown = (os.path.join(tmp, name) for name in ("base.json", "extra.json", "grown.json"))
+        start = time.perf_counter()
+        n = write_signed_manifest(base, contexts, args.issues)
+        write_signed_manifest(extra, contexts, args.grow, seed=1)
+        merge(grown, base, extra)
+        print(f"signed manifest: {n} statements, {os.path.getsize(base) / 1e6:.1f} MB "
+              f"(generated in {time.perf_counter() - start:.1f} s)")
+
+        print(f"{'run':<10} {'workers':>7} {'checked':>8} {'cached':>7} {'failed':>7} {'seconds':>8} "
+              f"{'entries/s':>10} {'sigs/s':>8}")
+
+        def row(name, report):
+            t = report["throughput"]
+            print(f"{name:<10} {report['workers']:>7} {report['checked']:>8} {report['cached']:>7} "
+                  f"{len(report['failures']):>7} {report['seconds']:>8} {t['entries_per_sec']:>10} "
+                  f"{t['signatures_per_sec']:>8}")
+            return report
+
+        ok = True
+        for workers in sorted({int(w) for w in args.workers.split(",")}):
+            ok &= row("cold", verify_manifest(base, workers))["passed"]
+
+        cache = VerifyCache(os.path.join(tmp, "cache.sqlite"))
+        workers = max(int(w) for w in args.workers.split(","))
+        verify_manifest(base, workers, cache)
+        report = row("grown", verify_manifest(grown, workers, cache))
+        ok &= report["passed"] and report["checked"] == report["statements"] + report["blobs"] - report["cached"]
+
+        with open(grown, encoding="utf-8") as f:
+            manifest = json.load(f)
+        credential = next(s for s in manifest["statements"].values() if s["@type"] == "CredentialRegistration")
+        credential["credential"]["issuanceDate"] = "2001-01-01T00:00:00Z"
+        manifest["blobs"][next(iter(manifest["blobs"]))] = base64.b64encode(b'{"name":"tampered"}').decode()
+        with open(grown, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, separators=(",", ":"))
+        report = row("tampered", verify_manifest(grown, workers, cache))
+        failed = sorted({failure["check"] for failure in report["failures"]})
+        print("tampering reported:", failed)
+        ok &= failed == ["binding", "blob", "signature", "statement"]
+        if not ok:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# Benchmark: paragraph Merkle tree vs single-blob sha256 of the extracted text
+#
+#   python bench_merkle.py [--scale N]
+
+import argparse
+import hashlib
+import time
+
+from merkle import MerkleTree, rehash_changed, verify_proof
+
+SOURCE_TEXT = "fr_2025_07_28_full.txt"
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merkle vs single-blob hashing")
+    parser.add_argument("--scale", type=int, default=1, help="repeat the issue N times")
+    args = parser.parse_args()
+
+    with open(SOURCE_TEXT, encoding="utf-8") as f:
+        text = "\n\n".join([f.read()] * args.scale)
+    paragraphs = text.split("\n\n")
+    print(f"{len(text) / 1e6:.2f} MB, {len(paragraphs)} paragraphs")
+
+    _, blob_ms = timed(lambda: hashlib.sha256(text.encode("utf-8")).hexdigest())
+    tree, build_ms = timed(MerkleTree.from_paragraphs, paragraphs)
+    _, file_ms = timed(MerkleTree.from_file, SOURCE_TEXT)
+    print(f"single blob sha256:        {blob_ms:8.1f} ms")
+    print(f"merkle build:              {build_ms:8.1f} ms")
+    print(f"merkle build, from file:   {file_ms:8.1f} ms (scale 1, as register_issue builds it)")
+
+    # one-paragraph correction
+    corrected = list(paragraphs)
+    target = len(corrected) // 2
+    corrected[target] = corrected[target] + " (corrected)"
+    _, blob_fix_ms = timed(lambda: hashlib.sha256("\n\n".join(corrected).encode("utf-8")).hexdigest())
+    (tree, changed), fix_ms = timed(rehash_changed, tree, paragraphs, corrected)
+    print(f"1-paragraph fix, blob:     {blob_fix_ms:8.1f} ms (whole text re-hashed)")
+    print(f"1-paragraph fix, merkle:   {fix_ms:8.1f} ms ({changed} leaf re-hashed, incl. diff)")
+
+    proof, proof_ms = timed(tree.proof, target)
+    ok, verify_ms = timed(verify_proof, corrected[target], proof, tree.root)
+    proof_bytes = sum(len(h) // 2 for _, h in proof)
+    print(f"inclusion proof:           {proof_ms:8.3f} ms build, {verify_ms:.3f} ms verify, "
+          f"{len(proof)} hashes / {proof_bytes} bytes (vs {len(text.encode('utf-8'))} bytes for the blob), valid={ok}")
+
+
+if __name__ == "__main__":
+    main()
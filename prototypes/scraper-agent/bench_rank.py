@@ -0,0 +1,121 @@
+# Benchmark: extractive pre-ranking (rank.py) on a full issue
+#
+# times the vectorised TF-IDF centroid scoring against a straightforward per-paragraph
+# dict implementation of the same formula (and checks both give the same scores), then
+# reports how many model tokens each summary mode sends to the abstractive model
+# and lists the paragraphs ranked mode picks, best first, with their share of common
+# (boilerplate) terms:
+#   map_reduce  every paragraph, in MAX_CHUNK_TOKENS chunks (reduce passes not counted)
+#   prefix      the first MAX_MODEL_CHARS characters
+#   ranked      the selected paragraphs, at most --budget tokens
+# token counts come from the model's tokenizer when transformers is installed, otherwise
+# from a words * 1.3 estimate
+#
+#   python bench_rank.py [--text fr_2025_07_28_full.txt] [--budget 3600] [--scale 1]
+
+import argparse
+import math
+import statistics
+import time
+from collections import Counter
+
+import numpy as np
+
+import rank
+from summarize import MAX_CHUNK_TOKENS
+
+MAX_MODEL_CHARS = 5000    # frscraperagent.MAX_MODEL_CHARS, without importing the agent
+
+
+def python_scores(paragraphs):
+    """The rank.py formula with dicts and loops, one paragraph at a time."""
+    docs = []
+    for p in paragraphs:
+        words = [w for w in rank.WORD.findall(p.lower()) if w not in rank.STOPWORDS]
+        docs.append(Counter(words) if len(words) >= rank.MIN_WORDS else Counter())
+    n_docs = sum(1 for d in docs if d)
+    df = Counter(term for d in docs for term in d)
+    vectors = []
+    for d in docs:
+        v = {t: (1 + math.log(c)) * (math.log((1 + n_docs) / (1 + df[t])) + 1) for t, c in d.items()}
+        norm = math.sqrt(sum(x * x for x in v.values())) or 1
+        vectors.append({t: x / norm for t, x in v.items()})
+    centroid = Counter()
+    for v in vectors:
+        for t, x in v.items():
+            centroid[t] += x
+    norm = math.sqrt(sum(x * x for x in centroid.values())) or 1
+    return [sum(x * centroid[t] for t, x in v.items()) / norm * (1 - common_share(v, df, n_docs)) ** 2
+            for v in vectors]
+
+
+def common_share(terms, df, n_docs):
+    return sum(df[t] >= rank.COMMON_DF * n_docs for t in terms) / len(terms) if terms else 0.0
+
+
+def token_counter(model: str):
+    try:
+        from transformers import AutoTokenizer
+    except ImportError:
+        return lambda texts: [round(len(t.split()) * 1.3) for t in texts], "words * 1.3"
+    tokenizer = AutoTokenizer.from_pretrained(model)
+    return lambda texts: [len(ids) for ids in tokenizer(list(texts), add_special_tokens=False)["input_ids"]], model
+
+
+def timed(fn, *args, repeat: int = 3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        times.append(time.perf_counter() - start)
+    return result, statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="extractive pre-ranking time and model tokens saved")
+    parser.add_argument("--text", default="fr_2025_07_28_full.txt")
+    parser.add_argument("--budget", type=int, default=3600, help="ranked mode token budget")
+    parser.add_argument("--scale", type=int, default=1, help="repeat the issue to simulate a larger one")
+    parser.add_argument("--model", default="sshleifer/distilbart-cnn-12-6", help="tokenizer for token counts")
+    args = parser.parse_args()
+
+    with open(args.text, encoding="utf-8") as f:
+        text = "\n\n".join([f.read()] * args.scale)
+    paragraphs = text.split("\n\n")
+    count_tokens, counted_with = token_counter(args.model)
+    tokens, tokenize_s = timed(count_tokens, paragraphs, repeat=1)
+
+    scores, numpy_s = timed(rank.score_paragraphs, paragraphs)
+    reference, python_s = timed(python_scores, paragraphs, repeat=1)
+    same = np.allclose(scores, reference)
+    selection, select_s = timed(rank.select, paragraphs, tokens, args.budget)
+    print(f"{len(paragraphs)} paragraphs, {len(text) / 1e6:.1f} MB; tokens counted with {counted_with} "
+          f"in {tokenize_s:.2f} s")
+    print(f"scoring: numpy {numpy_s * 1000:.0f} ms, python {python_s * 1000:.0f} ms "
+          f"({python_s / numpy_s:.1f}x); scores match: {same}")
+    print(f"select (score + budget + redundancy): {select_s * 1000:.0f} ms, kept {len(selection['selected'])} "
+          f"paragraphs, skipped {selection['skipped_redundant']} near duplicates")
+
+    total = int(sum(tokens))
+    map_chunks = math.ceil(total / MAX_CHUNK_TOKENS)
+    prefix = count_tokens([text[:MAX_MODEL_CHARS]])[0]
+    ranked_chunks = math.ceil(selection["selected_tokens"] / MAX_CHUNK_TOKENS)
+    print(f"{'mode':<11} {'model tokens':>13} {'map chunks':>11} {'share':>7}")
+    for mode, n, chunks in (("map_reduce", total, map_chunks), ("prefix", prefix, 1),
+                            ("ranked", selection["selected_tokens"], ranked_chunks)):
+        print(f"{mode:<11} {n:>13,} {chunks:>11,} {n / total:>7.1%}")
+    print(f"ranked saves {total - selection['selected_tokens']:,} model tokens against map_reduce")
+
+    docs = [Counter(w for w in rank.WORD.findall(p.lower()) if w not in rank.STOPWORDS) for p in paragraphs]
+    docs = [d if sum(d.values()) >= rank.MIN_WORDS else Counter() for d in docs]
+    df, n_docs = Counter(t for d in docs for t in d), sum(1 for d in docs if d)
+    print(f"ranked picks (max similarity {rank.MAX_SIMILARITY}, common terms: df >= {rank.COMMON_DF:.0%}):")
+    for p in sorted(selection["selected"], key=lambda p: -p["score"]):
+        print(f"  #{p['index']:<5} score {p['score']:.3f}  common {common_share(docs[p['index']], df, n_docs):4.0%}  "
+              f"{paragraphs[p['index']][:72]!r}")
+    if not same:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
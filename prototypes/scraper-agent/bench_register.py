@@ -0,0 +1,99 @@
+# Benchmark: registering an issue's artifacts from in-memory strings vs from their files
+#
+# the register step registers the source XML, the extracted text and the paragraph
+# Merkle tree. "memory" is the old path: both files are read into strings, registered
+# with Dataset.from_object (which JSON-serializes the string to hash it), and the tree
+# is built from the text and registered as a JSON string. "file" registers all three
+# with Document.from_path: the digests are read in chunks, the tree is built from the
+# text file and written to its own file (ArtifactStore.register_file,
+# MerkleTree.from_file / write_json). each run is its own child process with a fresh
+# SDK store, and the RSS it reports is the peak on top of the process after imports and
+# SDK init. --scales repeats the issue body, so the issue grows between rows
+#
+#   python bench_register.py [--scales 1,4,16]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_extract import build_issue_xml
+from instrument import peak_rss_mb
+
+
+def _child(mode: str, xml_path: str, text_path: str) -> None:
+    import frscraperagent as agent
+    from artifacts import ArtifactStore
+    from merkle import MerkleTree
+
+    agent.init_signer()
+    artifacts = ArtifactStore()
+    base_rss = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "memory":
+        with open(xml_path, encoding="utf-8") as f:
+            xml_text = f.read()
+        with open(text_path, encoding="utf-8") as f:
+            full_text = f.read()
+        xml_ds = artifacts.register_text(xml_text, name="bench source XML")
+        text_ds = artifacts.register_text(full_text, name="bench full text")
+        tree = MerkleTree.from_text(full_text)
+        artifacts.register_text(json.dumps(tree.to_dict()), name="bench paragraph merkle tree")
+    else:
+        xml_ds = artifacts.register_file(xml_path, name="bench source XML")
+        text_ds = artifacts.register_file(text_path, name="bench full text")
+        tree = MerkleTree.from_file(text_path)
+        tree.write_json(f"{text_path}.merkle.json")
+        artifacts.register_file(f"{text_path}.merkle.json", name="bench paragraph merkle tree")
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "mode": mode,
+        "wall_s": round(elapsed, 3),
+        "register_rss_mb": round(peak_rss_mb() - base_rss, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "merkle_root": tree.root,
+        "cids": [xml_ds.cid, text_ds.cid],
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="in-memory vs file-backed artifact registration")
+    parser.add_argument("--scales", default="1,4,16", help="issue sizes to try, as repeats of the issue body")
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(*args.child)
+        return
+
+    import frscraperagent as agent
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [here, os.environ.get("PYTHONPATH")]))}
+    print(f"{'xml MB':>7} {'text MB':>8} {'mode':>7} {'seconds':>8} {'register MB':>12} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in (int(s) for s in args.scales.split(",")):
+            xml_path, text_path = os.path.join(tmp, f"issue-{scale}.xml"), os.path.join(tmp, f"issue-{scale}.txt")
+            build_issue_xml(xml_path, scale)
+            agent.extract_to_file(xml_path, text_path)
+            roots = set()
+            for mode in ("memory", "file"):
+                store_dir = tempfile.mkdtemp(dir=tmp)
+                result = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--child", mode, xml_path, text_path],
+                    cwd=store_dir, env=env, check=True, capture_output=True, text=True,
+                )
+                r = json.loads(result.stdout.strip().splitlines()[-1])
+                roots.add(r["merkle_root"])
+                print(f"{os.path.getsize(xml_path) / 1e6:>7.1f} {os.path.getsize(text_path) / 1e6:>8.1f} {mode:>7} "
+                      f"{r['wall_s']:>8.2f} {r['register_rss_mb']:>12.1f} {r['peak_rss_mb']:>8.1f}")
+            if len(roots) != 1:
+                raise SystemExit(f"merkle roots differ at scale {scale}")
+
+
+if __name__ == "__main__":
+    main()
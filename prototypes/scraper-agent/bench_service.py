@@ -0,0 +1,95 @@
+# Benchmark: cold (in-process model load) vs warm (summarizer service) per-issue latency
+#
+# Every run is a fresh agent-like process timed from launch to summary, so the cold
+# numbers include imports, model deserialization and torch start-up, which is what
+# each invocation of frscraperagent.py used to pay.
+#
+#   python bench_service.py --model sshleifer/distilbart-cnn-12-6 --runs 3
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+import requests
+
+SOURCE_TEXT = "fr_2025_07_28_full.txt"
+
+
+def _child(mode: str, model: str, url: str, max_chars: int) -> None:
+    from summarize import summarize_map_reduce
+
+    if mode == "warm":
+        from summarizer_service import connect_summarizer
+
+        summarizer = connect_summarizer(url, model)
+        if summarizer is None:
+            sys.exit(f"no summarizer service for {model} at {url}")
+    else:
+        from transformers import pipeline
+
+        summarizer = pipeline("summarization", model=model)
+
+    with open(SOURCE_TEXT, encoding="utf-8") as f:
+        text = f.read()[:max_chars]
+    _, stats = summarize_map_reduce(text, summarizer)
+    print(json.dumps(stats))
+
+
+def _run(mode: str, args) -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, __file__, "--child", mode, args.model, args.url, str(args.max_chars)],
+        check=True, capture_output=True, text=True,
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="cold vs warm summarizer latency")
+    parser.add_argument("--model", default="sshleifer/distilbart-cnn-12-6")
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--max-chars", type=int, default=20_000)
+    parser.add_argument("--child", nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.url = f"http://127.0.0.1:{args.port}"
+
+    if args.child:
+        mode, args.model, url, max_chars = args.child
+        _child(mode, args.model, url, int(max_chars))
+        return
+
+    cold = [_run("cold", args) for _ in range(args.runs)]
+
+    service = subprocess.Popen(
+        [sys.executable, "summarizer_service.py", "--model", args.model, "--port", str(args.port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        start = time.perf_counter()
+        while True:
+            try:
+                health = requests.get(f"{args.url}/health", timeout=1).json()
+                break
+            except requests.RequestException:
+                if service.poll() is not None:
+                    sys.exit("summarizer service exited during start-up")
+                time.sleep(0.2)
+        startup = time.perf_counter() - start
+        warm = [_run("warm", args) for _ in range(args.runs)]
+    finally:
+        service.terminate()
+        service.wait()
+
+    def fmt(xs):
+        return f"mean {sum(xs) / len(xs):6.2f}s  min {min(xs):6.2f}s"
+
+    print(f"service start-up:    {startup:6.2f}s (model load {health['load_seconds']}s, paid once)")
+    print(f"cold per-issue:      {fmt(cold)}")
+    print(f"warm per-issue:      {fmt(warm)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# Startup benchmark: parses `python -X importtime` for the agent module and for the
+# imports each CLI stage pulls in, and reports total import time plus the slowest
+# top-level imports. --max-base-ms turns it into a regression check for the
+# module import that every subcommand pays.
+#
+#   python bench_startup.py [--runs 3] [--max-base-ms 150] [--json startup.json]
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List
+
+# what each subcommand imports on top of `import frscraperagent`
+STAGE_IMPORTS = {
+    "base": [],
+    "fetch": ["http_cache"],
+    "extract": [],
+    "summarize": ["summarizer_service", "transformers", "torch"],
+    "register": ["eqty_sdk"],
+}
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    rows = []
+    for line in stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            rows.append({
+                "module": m.group(4),
+                "self_us": int(m.group(1)),
+                "cumulative_us": int(m.group(2)),
+                "depth": (len(m.group(3)) - 1) // 2,
+            })
+    return rows
+
+
+def measure(stage: str) -> Dict:
+    modules = ["frscraperagent"] + STAGE_IMPORTS[stage]
+    code = "; ".join(f"import {m}" for m in modules)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if result.returncode != 0:
+        return {"stage": stage, "error": result.stderr.strip().splitlines()[-1]}
+    rows = parse_importtime(result.stderr)
+    top = [r for r in rows if r["depth"] == 0]
+    return {
+        "stage": stage,
+        "total_ms": round(sum(r["cumulative_us"] for r in top) / 1000, 1),
+        "modules": len(rows),
+        "slowest": [
+            {"module": r["module"], "ms": round(r["cumulative_us"] / 1000, 1)}
+            for r in sorted(top, key=lambda r: r["cumulative_us"], reverse=True)[:5]
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="agent import-time / startup benchmark")
+    parser.add_argument("--runs", type=int, default=3, help="best of N per stage")
+    parser.add_argument("--max-base-ms", type=float, help="fail if `import frscraperagent` is slower")
+    parser.add_argument("--json", help="also write the report here")
+    args = parser.parse_args()
+
+    report = []
+    for stage in STAGE_IMPORTS:
+        runs = [measure(stage) for _ in range(args.runs)]
+        ok = [r for r in runs if "error" not in r] or runs
+        best = min(ok, key=lambda r: r.get("total_ms", 0))
+        report.append(best)
+        if "error" in best:
+            print(f"{stage:>10}: not importable here ({best['error']})")
+            continue
+        slowest = ", ".join(f"{s['module']} {s['ms']}ms" for s in best["slowest"][:3])
+        print(f"{stage:>10}: {best['total_ms']:8.1f} ms  {best['modules']:5d} modules  [{slowest}]")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    base = report[0]
+    if args.max_base_ms and base.get("total_ms", 0) > args.max_base_ms:
+        sys.exit(f"import frscraperagent took {base['total_ms']} ms, budget {args.max_base_ms} ms")
+
+
+if __name__ == "__main__":
+    main()
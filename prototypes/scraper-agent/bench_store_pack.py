@@ -0,0 +1,162 @@
+# Benchmark: loose-file integrity store vs packs + catalogue (store_pack.py)
+#
+# fills a store with `--issues` issues worth of statements and blobs in the SDK's
+# one-file-per-object layout, then measures on both layouts:
+#   lookup     fetch and parse random statements by CID. a loose lookup has to try
+#              each statements/<kind>/ directory, since the CID does not say which
+#   scan       read and parse every object
+#   consumers  computations that take a given CID as input (a full scan when loose)
+# plus files / disk blocks used, pack time, and gc after removing part of the store.
+# files and disk are reported for the default `pack` (loose files kept, packs added on
+# top) and for `pack --remove-loose`; lookups and scans read the same catalogue in both.
+# a second default `pack` shows the cost of re-running it on an already packed store.
+# the page cache is warm for both layouts; cold-cache numbers favour packs further
+#
+#   python bench_store_pack.py [--issues 2000] [--lookups 2000]
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from bench_manifest_export import add_to_store
+from gen_manifest import data_cid, write_manifest
+from manifest_export import scan_store
+from store_pack import PackedStore
+
+
+def disk_usage(root: str):
+    files, blocks = 0, 0
+    for directory, _, names in os.walk(root):
+        for name in names:
+            files += 1
+            blocks += os.stat(os.path.join(directory, name)).st_blocks
+    return files, blocks * 512
+
+
+def loose_get(store_root: str, kinds, cid: str):
+    name = cid[len("urn:cid:"):] + ".jsonld"
+    for kind in kinds:
+        try:
+            with open(os.path.join(store_root, "statements", kind, name), "rb") as f:
+                return json.loads(f.read())
+        except FileNotFoundError:
+            continue
+    return None
+
+
+def loose_scan(store_root: str) -> int:
+    n = 0
+    for kind, _, path, _ in scan_store(store_root):
+        with open(os.path.join(store_root, path), "rb") as f:
+            data = f.read()
+        if kind == "statement":
+            json.loads(data)
+        n += 1
+    return n
+
+
+def loose_consumers(store_root: str, cid: str):
+    found = []
+    directory = os.path.join(store_root, "statements", "computations")
+    for name in os.listdir(directory):
+        with open(os.path.join(directory, name), "rb") as f:
+            if cid in json.loads(f.read()).get("input", ()):
+                found.append("urn:cid:" + name[:-len(".jsonld")])
+    return sorted(found)
+
+
+def packed_scan(store: PackedStore) -> int:
+    n = 0
+    for kind, _, data in store.iter_objects():
+        if kind == "statement":
+            json.loads(data)
+        n += 1
+    return n
+
+
+def per_call_us(fn, args):
+    times = []
+    for arg in args:
+        start = time.perf_counter()
+        fn(arg)
+        times.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(times)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="loose vs packed integrity store")
+    parser.add_argument("--issues", type=int, default=2000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store_root = os.path.join(tmp, "store")
+        manifest = os.path.join(tmp, "manifest.json")
+        write_manifest(manifest, args.issues)
+        add_to_store(store_root, manifest)
+        kinds = sorted(os.listdir(os.path.join(store_root, "statements")))
+        cids = sorted(cid for kind, cid, _, _ in scan_store(store_root) if kind == "statement")
+        sample = random.Random(0).sample(cids, min(args.lookups, len(cids)))
+        text_cid = data_cid(0, "issue-000007", "text")
+
+        files, size = disk_usage(store_root)
+        loose = {
+            "files": files,
+            "disk_mb": round(size / 1e6, 1),
+            "lookup_us": round(per_call_us(lambda c: loose_get(store_root, kinds, c), sample), 1),
+            "scan_s": round(timed(loose_scan, store_root)[1], 3),
+            "consumers_ms": round(timed(loose_consumers, store_root, text_cid)[1] * 1000, 2),
+        }
+        expected = {cid: loose_get(store_root, kinds, cid) for cid in sample}
+        expected_consumers = loose_consumers(store_root, text_cid)
+
+        store = PackedStore(store_root)
+        pack_stats, pack_s = timed(store.pack)
+        files, size = disk_usage(store_root)
+        packed = {
+            "files": files,
+            "disk_mb": round(size / 1e6, 1),
+            "lookup_us": round(per_call_us(store.statement, sample), 1),
+            "scan_s": round(timed(packed_scan, store)[1], 3),
+            "consumers_ms": round(timed(store.consumers, text_cid)[1] * 1000, 2),
+        }
+        repack_stats, repack_s = timed(store.pack)
+        _, remove_s = timed(store.pack, 0.0, False)
+        files, size = disk_usage(store_root)
+        removed_loose = {**packed, "files": files, "disk_mb": round(size / 1e6, 1)}
+        print(f"pack: {pack_stats['packed']} objects, {pack_stats['bytes'] / 1e6:.1f} MB in {pack_s:.2f} s; "
+              f"again: {repack_stats['already_packed']} already packed in {repack_s:.2f} s; "
+              f"--remove-loose: {remove_s:.2f} s")
+        print(f"{'':<14} {'files':>8} {'disk MB':>8} {'lookup us':>10} {'scan s':>8} {'consumers ms':>13}")
+        for name, row in (("loose", loose), ("packed", packed), ("remove-loose", removed_loose)):
+            print(f"{name:<14} {row['files']:>8} {row['disk_mb']:>8} {row['lookup_us']:>10} "
+                  f"{row['scan_s']:>8} {row['consumers_ms']:>13}")
+
+        same = all(store.statement(cid) == expected[cid] for cid in sample) and \
+            store.consumers(text_cid) == expected_consumers
+        print("packed lookups match loose files:", same)
+
+        removed = cids[::3] + cids[1::3]
+        store.remove(removed)
+        gc_stats, gc_s = timed(store.gc)
+        kept = [cid for cid in sample if cid not in set(removed)]
+        same = same and all(store.statement(cid) == expected[cid] for cid in kept)
+        print(f"gc after removing {len(removed)} statements: {gc_stats} in {gc_s:.2f} s; "
+              f"remaining lookups match: {same}")
+        store.close()
+        if not same:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
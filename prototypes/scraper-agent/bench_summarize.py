@@ -0,0 +1,64 @@
+# Benchmark: map-reduce summarization throughput across batch sizes and torch thread counts
+#
+# Each (batch size, threads) combination runs in its own child process because torch
+# only lets inter-op threads be set once per process. Point --model at a small local
+# seq2seq checkpoint to keep runs short on CPU-only machines.
+#
+#   python bench_summarize.py --model sshleifer/distilbart-cnn-12-6 --batch-sizes 1,4,8 --threads 2,4
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+SOURCE_TEXT = "fr_2025_07_28_full.txt"
+
+
+def _child(model: str, batch_size: int, threads: int, max_chars: int) -> None:
+    from summarize import configure_threads, summarize_map_reduce
+
+    configure_threads(threads, 1)
+    from transformers import pipeline
+
+    load_start = time.perf_counter()
+    summarizer = pipeline("summarization", model=model)
+    load_seconds = time.perf_counter() - load_start
+
+    with open(SOURCE_TEXT, encoding="utf-8") as f:
+        text = f.read()[:max_chars] if max_chars else f.read()
+
+    _, stats = summarize_map_reduce(text, summarizer, batch_size=batch_size)
+    stats.update({"threads": threads, "load_seconds": round(load_seconds, 3)})
+    print(json.dumps(stats))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="map-reduce summarization benchmark")
+    parser.add_argument("--model", default="sshleifer/distilbart-cnn-12-6")
+    parser.add_argument("--batch-sizes", default="1,4,8")
+    parser.add_argument("--threads", default="1,2,4")
+    parser.add_argument("--max-chars", type=int, default=100_000, help="0 = whole issue")
+    parser.add_argument("--child", nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        model, batch_size, threads, max_chars = args.child
+        _child(model, int(batch_size), int(threads), int(max_chars))
+        return
+
+    print(f"{'batch':>5} {'threads':>7} {'chunks':>6} {'chunks/s':>9} {'latency_s':>9}")
+    for threads in [int(t) for t in args.threads.split(",")]:
+        for batch_size in [int(b) for b in args.batch_sizes.split(",")]:
+            result = subprocess.run(
+                [sys.executable, __file__, "--child", args.model,
+                 str(batch_size), str(threads), str(args.max_chars)],
+                check=True, capture_output=True, text=True,
+            )
+            stats = json.loads(result.stdout.strip().splitlines()[-1])
+            print(f"{batch_size:>5} {threads:>7} {stats['chunks']:>6} "
+                  f"{stats['chunks_per_sec'] or 0:>9.2f} {stats['latency_seconds']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import io
+import json
+import os
+import re
+from typing import Dict, List
+from xml.parsers import expat
+
+from artifacts import file_digest
+
+# per-document segmentation of a Federal Register issue
+#
+# an issue is a run of separate documents, one element each under RULES / PRORULES /
+# NOTICES / PRESDOCS. segment() streams the XML once with expat (no tree is built) and
+# returns a record per document:
+#   type         RULE, PRORULE, NOTICE or PRESDOCU
+#   agency, subagency, subject, cfr, depdoc, rin, frdoc
+#                the first of each in the document (preamble and FR Doc line)
+#   document_number  from the FR Doc line, e.g. 2025-14123
+#   bytes        [start, end) of the element in the XML file
+#   paragraphs   [first, end) positions in the issue's full text, in iter_paragraphs
+#                order, so they are also leaves of the paragraph Merkle tree
+# a document can be re-extracted on its own from its byte range (document_text)
+# without parsing the rest of the issue. write_index() stores the records as JSON next
+# to the sha256 of the XML they were taken from
+
+DOCUMENT_TAGS = ("RULE", "PRORULE", "NOTICE", "PRESDOCU")
+FIELDS = {"AGENCY": "agency", "SUBAGY": "subagency", "SUBJECT": "subject", "CFR": "cfr",
+          "DEPDOC": "depdoc", "RIN": "rin", "FRDOC": "frdoc"}
+FRDOC_NUMBER = re.compile(r"FR Doc\.?\s*([0-9][0-9-]*[0-9])")
+INDEX_VERSION = 1
+
+
+class _Segmenter:
+    def __init__(self):
+        self.parser = expat.ParserCreate()
+        self.parser.buffer_text = True
+        self.parser.StartElementHandler = self.start
+        self.parser.EndElementHandler = self.end
+        self.parser.CharacterDataHandler = self.text
+        self.documents: List[Dict] = []
+        self.doc = None             # document being read, and its element depth
+        self.doc_depth = 0
+        self.depth = 0
+        self.toc_depth = 0          # >0 inside the first TOC, which iter_paragraphs skips
+        self.toc_seen = False
+        self.paragraph = 0          # paragraphs of the full text seen so far
+        self.field = None           # (tag, depth) of the metadata element being collected
+        self.nodes: List[str] = []  # its text nodes, split at element boundaries like get_text(" ")
+
+    def start(self, tag, attrs):
+        self.depth += 1
+        if self.field:
+            self.nodes.append("")
+        if self.toc_depth:
+            self.toc_depth += 1
+        elif tag == "TOC" and not self.toc_seen:
+            self.toc_seen, self.toc_depth = True, 1
+        elif self.doc is None:
+            if tag in DOCUMENT_TAGS:
+                self.doc = {"n": len(self.documents), "type": tag, "bytes": [self.parser.CurrentByteIndex, None],
+                            "paragraphs": [self.paragraph, None]}
+                self.doc_depth = self.depth
+        elif not self.field and tag in FIELDS and FIELDS[tag] not in self.doc:
+            self.field, self.nodes = (tag, self.depth), [""]
+
+    def end(self, tag):
+        if self.toc_depth:
+            self.toc_depth -= 1
+        elif tag == "P":
+            self.paragraph += 1
+        if self.field == (tag, self.depth):
+            self.doc[FIELDS[tag]] = " ".join(s.strip() for s in self.nodes if s.strip())
+            self.field = None
+            number = FRDOC_NUMBER.search(self.doc[FIELDS[tag]]) if tag == "FRDOC" else None
+            if number:
+                self.doc["document_number"] = number.group(1)
+        elif self.field:
+            self.nodes.append("")
+        if self.doc is not None and self.depth == self.doc_depth:
+            # the end handler fires at the "<" of "</TAG>"
+            self.doc["bytes"][1] = self.parser.CurrentByteIndex + len(tag) + 3
+            self.doc["paragraphs"][1] = self.paragraph
+            self.documents.append(self.doc)
+            self.doc = None
+        self.depth -= 1
+
+    def text(self, data):
+        if self.field:
+            self.nodes[-1] += data
+
+
+def segment(xml_path: str) -> List[Dict]:
+    """One record per document in the issue, in document order."""
+    segmenter = _Segmenter()
+    with open(xml_path, "rb") as f:
+        segmenter.parser.ParseFile(f)
+    return segmenter.documents
+
+
+def document_xml(xml_path: str, document: Dict) -> bytes:
+    start, end = document["bytes"]
+    with open(xml_path, "rb") as f:
+        f.seek(start)
+        return f.read(end - start)
+
+
+def document_text(xml_path: str, document: Dict) -> str:
+    """The document's paragraphs, extracted from its byte range alone."""
+    from frscraperagent import iter_paragraphs
+
+    return "\n\n".join(iter_paragraphs(io.BytesIO(document_xml(xml_path, document))))
+
+
+def write_index(xml_path: str, index_path: str) -> Dict:
+    index = {
+        "version": INDEX_VERSION,
+        "xml": os.path.basename(xml_path),
+        "xml_sha256": file_digest(xml_path),
+        "xml_bytes": os.path.getsize(xml_path),
+        "documents": segment(xml_path),
+    }
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp_path, index_path)
+    return index
+
+
+def load_index(xml_path: str, index_path: str) -> Dict:
+    """The index for xml_path, rebuilt if it is missing or was made from other XML."""
+    if os.path.exists(index_path):
+        with open(index_path, encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("version") == INDEX_VERSION and index.get("xml_bytes") == os.path.getsize(xml_path) \
+                and index.get("xml_sha256") == file_digest(xml_path):
+            return index
+    return write_index(xml_path, index_path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="split an issue XML into its documents")
+    parser.add_argument("xml")
+    parser.add_argument("-o", "--output", help="write the index here (default: print a listing)")
+    args = parser.parse_args()
+
+    if args.output:
+        index = write_index(args.xml, args.output)
+        print(f"{len(index['documents'])} documents -> {args.output}")
+    else:
+        for doc in segment(args.xml):
+            print(f"{doc['n']:>4} {doc['type']:<8} {doc.get('document_number', ''):<12} {doc.get('agency', ''):<40.40} "
+                  f"{doc['bytes'][1] - doc['bytes'][0]:>9,} bytes  {doc.get('subject', '')[:60]}")
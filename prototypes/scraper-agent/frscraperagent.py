@@ -1,11 +1,13 @@
-import requests
-import uuid, platform
+import uuid, platform, os, json, argparse, logging
+import xml.etree.ElementTree as ET
 from datetime import datetime, timezone
-from bs4 import BeautifulSoup
-import transformers
-from transformers import pipeline
-import torch
-from eqty_sdk import init, Did, Dataset, Signer, SIGNER_ALGORITHMS, set_active_signer, Computation, generate_manifest,  purge_integrity_store
+from summarize import summarize_map_reduce
+from artifacts import ArtifactStore, ref, file_digest
+from instrument import Metrics
+
+# heavy dependencies (bs4, transformers, torch, eqty_sdk, requests) are imported inside
+# the stage that needs them, so e.g. a fetch-only or register-only run does not pay for
+# loading torch. bench_startup.py tracks the import cost of each stage
 
 
 
@@ -13,22 +15,58 @@ from eqty_sdk import init, Did, Dataset, Signer, SIGNER_ALGORITHMS, set_active_s
 FEDERAL_REGISTER_URL = (
         "https://www.govinfo.gov/content/pkg/FR-2025-07-28/xml/FR-2025-07-28.xml"
 )
+# same location for any issue date, used by batch mode
+FEDERAL_REGISTER_URL_TEMPLATE = os.environ.get(
+    "FR_URL_TEMPLATE", "https://www.govinfo.gov/content/pkg/FR-{date}/xml/FR-{date}.xml"
+)
 
 FULL_FR_TEXT = "fr_2025_07_28_full.txt"
+HTTP_CACHE_DIR = os.environ.get("FR_HTTP_CACHE_DIR", ".fr_cache")
+# memoized extract/summarize outputs keyed by input digest + params ("" disables)
+STAGE_CACHE_DIR = os.environ.get("FR_STAGE_CACHE_DIR", ".fr_stage_cache")
+STAGE_CACHE_MAX_MB = int(os.environ.get("FR_STAGE_CACHE_MB", "512"))
+# incremental manifest export: shards of what each run registered ("" = one full manifest.json)
+MANIFEST_DIR = os.environ.get("FR_MANIFEST_DIR", "")
+# worker processes for per-document mode; each loads its own model unless the
+# summarizer service is up
+DOCUMENT_WORKERS = int(os.environ.get("FR_DOCUMENT_WORKERS", "2"))
+EQTY_STORE_DIR = ".eqty_sdk/store"
 RUN_ID = uuid.uuid4().hex
 MAX_MODEL_CHARS = 5000
+SUMMARY_MODEL = "sshleifer/distilbart-cnn-12-6"
+# warm summarizer service (summarizer_service.py); used when it is up
+SUMMARIZER_URL = os.environ.get("FR_SUMMARIZER_URL")   # None = summarizer_service.DEFAULT_URL
+
+# "map_reduce" summarizes the whole issue, "prefix" only the first MAX_MODEL_CHARS,
+# "ranked" the paragraphs rank.py scores highest, up to RANK_TOKEN_BUDGET model tokens
+SUMMARY_MODE = os.environ.get("FR_SUMMARY_MODE", "map_reduce")
+RANK_TOKEN_BUDGET = int(os.environ.get("FR_RANK_TOKEN_BUDGET", "3600"))
+SUMMARY_BATCH_SIZE = int(os.environ.get("FR_SUMMARY_BATCH_SIZE", "4"))
+TORCH_THREADS = int(os.environ.get("FR_TORCH_THREADS", "0"))          # 0 = torch default
+TORCH_INTEROP_THREADS = int(os.environ.get("FR_TORCH_INTEROP_THREADS", "0"))
+# "fp32" runs the pipeline as loaded, "int8" a dynamically quantized copy (inference.py)
+SUMMARY_BACKEND = os.environ.get("FR_SUMMARY_BACKEND", "fp32")
+
+# per-stage timings, counters and peak memory for this run (see instrument.py).
+# status lines are logged at INFO, full dumps (summary text, statement) at DEBUG
+METRICS = Metrics("fr_agent", RUN_ID)
+log = logging.getLogger("frscraperagent")
 
 
 # helpers
 
-# Get XML from the Federal Register site and return it as plain text
-def fetch_xml(url: str) -> str:
-    r = requests.get(url, timeout=30)
-    r.raise_for_status()
-    return r.text
+# Get XML from the Federal Register site and return the path of the local copy.
+# goes through the on-disk cache, so re-runs on the same issue only revalidate
+def fetch_xml(url: str, cache=None) -> str:
+    from http_cache import HttpCache
+
+    cache = cache or HttpCache(HTTP_CACHE_DIR)
+    return cache.fetch(url, timeout=30)
 
 # convert XML into text paragraphs
 def xml_to_text(xml_text: str) -> str:
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(xml_text, "xml") # use xml parser
     if soup.TOC:
         soup.TOC.decompose()
@@ -38,34 +76,109 @@ def xml_to_text(xml_text: str) -> str:
     ]
     return "\n\n".join(paragraphs)
 
+# streaming version of xml_to_text: walks the XML incrementally and yields one
+# paragraph at a time. elements are dropped from the tree as soon as they close so
+# memory stays flat regardless of issue size. output matches xml_to_text
+def iter_paragraphs(source):
+    stack = []          # open elements, so finished ones can be detached from their parent
+    toc_depth = 0       # >0 while inside the TOC subtree
+    toc_seen = False    # xml_to_text only decomposes the first TOC (soup.TOC)
+    p_depth = 0         # >0 while inside a <P>, whose children are needed for its text
+
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            if toc_depth:
+                toc_depth += 1
+            elif elem.tag == "TOC" and not toc_seen:
+                toc_seen = True
+                toc_depth = 1
+            elif elem.tag == "P":
+                p_depth += 1
+            continue
+
+        stack.pop()
+        if toc_depth:
+            toc_depth -= 1
+        elif elem.tag == "P":
+            p_depth -= 1
+            # same as get_text(" ", strip=True): strip every text node, drop empty ones
+            text = " ".join(s.strip() for s in elem.itertext() if s.strip())
+            yield text
+
+        if p_depth == 0 and stack:
+            stack[-1].remove(elem)  # finished children always sit at index 0
+
+# stream paragraphs from source straight into out_path, never holding the full text
+def extract_to_file(source, out_path: str) -> int:
+    written = 0
+    with open(out_path, "w", encoding="utf-8") as f:
+        for i, paragraph in enumerate(iter_paragraphs(source)):
+            if i:
+                written += f.write("\n\n")
+            written += f.write(paragraph)
+    return written
+
+
+# use the warm summarizer service if one is running, otherwise load the model here
+def load_summarizer():
+    from summarizer_service import DEFAULT_URL, connect_summarizer
+
+    url = SUMMARIZER_URL or DEFAULT_URL
+    remote = connect_summarizer(url, SUMMARY_MODEL, SUMMARY_BACKEND)
+    if remote:
+        log.info("using summarizer service at %s", url)
+        return remote
+    from inference import load_summarizer as load_backend
+
+    summarizer = load_backend(SUMMARY_MODEL, SUMMARY_BACKEND, TORCH_THREADS, TORCH_INTEROP_THREADS)
+    log.info("loaded %s (%s backend) in %ss", SUMMARY_MODEL, SUMMARY_BACKEND, summarizer.info["load_seconds"])
+    return summarizer
+
+
+# summarize the extracted text with the configured SUMMARY_MODE.
+# returns the summary, the exact text the model was given and map-reduce stats (or None);
+# in "ranked" mode the stats include the selected paragraphs and their scores
+def summarize_text(full_text: str, summarizer):
+    summary_stats = None
+    ranking = None
+    if SUMMARY_MODE == "ranked":
+        from rank import model_input as ranked_input, rank_text
+
+        ranking = rank_text(full_text, summarizer.tokenizer, RANK_TOKEN_BUDGET)
+        METRICS.count("summarize.ranked_tokens_skipped", ranking["total_tokens"] - ranking["selected_tokens"])
+        if ranking["fallback"]:
+            METRICS.count(f"summarize.ranked_fallback.{ranking['fallback']['mode']}")
+            log.warning("ranking kept no paragraph (%s), model reads the %s instead",
+                        ranking["fallback"]["reason"], ranking["fallback"]["mode"].replace("_", " "))
+        log.info(
+            "ranked %s paragraphs in %ss: model reads %s of them, %s of %s tokens",
+            ranking["paragraphs"], ranking["seconds"], len(ranking["selected"]),
+            ranking["selected_tokens"], ranking["total_tokens"],
+        )
+    if SUMMARY_MODE in ("map_reduce", "ranked"):
+        model_input = ranked_input(full_text, ranking["selected"]) if ranking else full_text
+        summary, summary_stats = summarize_map_reduce(
+            model_input, summarizer, batch_size=SUMMARY_BATCH_SIZE, max_length=400, min_length=30)
+        if ranking:
+            summary_stats["ranking"] = ranking
+        METRICS.count("summarize.chunks", summary_stats["chunks"])
+        log.info(
+            "summarized %s chunks (%s chunks/sec, %ss end to end)",
+            summary_stats["chunks"], summary_stats["chunks_per_sec"], summary_stats["latency_seconds"],
+        )
+    else:
+        model_input = full_text[:MAX_MODEL_CHARS]
+        summary = summarizer(
+            model_input, max_length=400, min_length=30, do_sample=False) [0] ["summary_text"]
+    return summary, model_input, summary_stats
 
-# download xml and parse
-if __name__ == "__main__":
-    xml_text = fetch_xml(FEDERAL_REGISTER_URL)
-    full_text = xml_to_text(xml_text)
-
-    
-    # save as plain text for any future manual checks/reviews
-    with open(FULL_FR_TEXT, "w", encoding="utf-8") as f:
-        f.write(full_text)
-    
-    print("saved federal register contents")
-
-
-    model_input = full_text[:MAX_MODEL_CHARS]
-
-    summarizer = pipeline("summarization", model="sshleifer/distilbart-cnn-12-6")
-    summary = summarizer(
-        model_input, max_length=400, min_length=30, do_sample=False) [0] ["summary_text"]
-    
-    print(
-        "created federal registry summary\n"
-        "--- SUMMARY ---\n"
-        f"{summary}\n"
-        "----------------"
-    )
 
-    agent_info = {
+def build_agent_info(src_url: str, summary_stats=None, inference=None) -> dict:
+    import transformers
+    import torch
+
+    return {
         "agent_name":        "fr-summariser",
         "agent_version":     "v0.1",
         "model":             "sshleifer/distilbart-cnn-12-6",
@@ -75,17 +188,17 @@ if __name__ == "__main__":
         "run_id":            RUN_ID,
         "run_timestamp":     datetime.now(timezone.utc).isoformat(),
         "summary_params":    {"max_length": 200, "min_length": 30},
-        "src_url":           FEDERAL_REGISTER_URL,
+        "summary_mode":      SUMMARY_MODE,
+        "summary_stats":     summary_stats,
+        "torch_threads":     torch.get_num_threads(),
+        "inference":         inference,
+        "src_url":           src_url,
     }
 
-    output = {
-        "full_text":   full_text,
-        "model_input": model_input,
-        "summary":     summary,
-        "metadata":    agent_info,
-        "xml":         xml_text,       # raw source 
-    }
 
+# init the SDK and make a fresh signing key active for this run
+def init_signer():
+    from eqty_sdk import init, Did, Signer, SIGNER_ALGORITHMS, set_active_signer
 
     init()
 
@@ -97,64 +210,567 @@ if __name__ == "__main__":
         name="fr-provenance-key", 
         description="Signing key for Federal Register dataset integrity statements."
     )
-
-    ds = Dataset.from_object(
-        output,
-        name="FR 2025-07-28",
-        description="Federal Register issue and web scraper agent provenance",
+    return did
+
+
+# register one issue: the source XML, the extracted text and the summary are each
+# registered once, the bundle references them by CID, and a computation links
+# text -> summary. returns the finalized computation.
+# the XML, the text and its Merkle tree (written next to the text) are registered from
+# their files, so none of them is read into memory here; model_input_chars is the length of what the model read (a prefix of the text,
+# or the ranked paragraphs).
+# if computation_cid is given the summary came from the stage cache: the computation
+# still links text -> summary in this run's export, and it and the summary point at
+# the computation that originally produced it (reused_from / produced_by)
+def register_issue(issue_date: str, xml_path: str, text_path: str, model_input_chars: int, summary: str,
+                   agent_info: dict, artifacts: ArtifactStore = None, computation_cid: str = None):
+    from eqty_sdk import Dataset, Computation
+    from merkle import MerkleTree
+
+    artifacts = artifacts or ArtifactStore()
+    pulled_on = datetime.now(timezone.utc).date().isoformat()
+
+    xml_ds = artifacts.register_file(
+        xml_path,
+        name=f"FR {issue_date} source XML",
+        description=f"Federal Register issue XML pulled on {pulled_on}",
+        src_url=agent_info.get("src_url"),
     )
 
-    # Add computation provanence for summary generation
+    fulltext_ds = artifacts.register_file(
+        text_path,
+        name=f"FR {issue_date} full extraction of text",
+        descriptions=f" Extracted Federal Register from XML pulled on {pulled_on}"
+    )
 
-    fulltext_ds = Dataset.from_object(
-        full_text,
-        name="FR 2025-07-28 full extraction of text",
-        descriptions=" Extracted Federal Register from XML pulled on 2025-08-02"
+    # paragraph-level Merkle tree over the same text, so a single paragraph can be
+    # verified with an inclusion proof and a correction only re-hashes what changed
+    tree = MerkleTree.from_file(text_path)
+    merkle_path = text_path.replace("_full.txt", "_merkle.json") if text_path.endswith("_full.txt") \
+        else f"{text_path}.merkle.json"
+    tree.write_json(merkle_path)
+    merkle_ds = artifacts.register_file(
+        merkle_path,
+        name=f"FR {issue_date} paragraph merkle tree",
+        description="sha256 Merkle tree over the paragraphs of the extracted text",
+        merkle_root=tree.root,
+        paragraphs=len(tree.leaves),
     )
 
-    summary_ds = Dataset.from_object(
+    summary_ds = artifacts.register_text(
         summary,
-        name="FR 2025-07-28 summary",
+        name=f"FR {issue_date} summary",
         description="summary of FR",
         model="sshleifer/distilbart-cnn-12-6",
-        run_id=RUN_ID
+        run_id=agent_info.get("run_id", RUN_ID),
+        **({"produced_by": computation_cid} if computation_cid else {})
     )
 
+    # the model reads a prefix of the text, or in ranked mode the selected paragraphs
+    # (indices are leaves of the merkle tree) with their scores
+    ranking = (agent_info.get("summary_stats") or {}).get("ranking")
+    output = {
+        "full_text":   ref(fulltext_ds, merkle_root=tree.root, merkle_tree=merkle_ds.cid),
+        "model_input": ref(fulltext_ds, chars=model_input_chars,
+                           **({"paragraphs": ranking["selected"]} if ranking else {})),
+        "summary":     ref(summary_ds, **({"produced_by": computation_cid} if computation_cid else {})),
+        "metadata":    agent_info,
+        "xml":         ref(xml_ds),       # raw source 
+    }
+
+    with METRICS.timer("register.dataset"):
+        ds = Dataset.from_object(
+            output,
+            name=f"FR {issue_date}",
+            description="Federal Register issue and web scraper agent provenance",
+        )
+
+    if computation_cid:
+        log.info("summary reused from cache, produced by %s", computation_cid)
+
+    # Add computation provanence for summary generation
+
     comp = (
         Computation
         .new(name="fr-summariser v0.1 run",
-            description="XML ➜ plain text ➜ BART summary on 2025-08-02",
+            description=f"XML ➜ plain text ➜ BART summary on {pulled_on}"
+                        + (" (summary reused from the stage cache)" if computation_cid else ""),
             model="sshleifer/distilbart-cnn-12-6",
             run_id=RUN_ID,
-            fr_outputs=ds.cid
+            fr_outputs=ds.cid,
+            **({"reused_from": computation_cid} if computation_cid else {})
         )
         .add_input_cid(fulltext_ds.cid)   # input A, extracted text from xml
         .add_output_cid(summary_ds.cid)   # output B, summary generated
     )
                  
-    comp.finalize() # finalize returns none. builder pattern to assemble/puttign it all together, simply makign a json claim
-
-    
-computation_details = comp.__getstate__()
-print(computation_details)
-
-generate_manifest("./manifest.json")
-purge_integrity_store()
-
-
-
-
-
-
-
+    with METRICS.timer("register.computation"):
+        comp.finalize() # finalize returns none. builder pattern to assemble/puttign it all together, simply makign a json claim
+    log.info("artifacts: %s", artifacts.stats())
+    return comp
 
 
+# stages. each one reads/writes files so they can run as separate invocations
 
+def issue_url(issue_date: str) -> str:
+    return FEDERAL_REGISTER_URL_TEMPLATE.format(date=issue_date)
 
 
+def issue_text_path(issue_date: str) -> str:
+    return f"fr_{issue_date.replace('-', '_')}_full.txt"
 
 
+def get_stage_cache():
+    if not STAGE_CACHE_DIR:
+        return None
+    from stage_cache import StageCache
+
+    return StageCache(STAGE_CACHE_DIR, STAGE_CACHE_MAX_MB << 20)
 
 
+EXTRACT_PARAMS = {"extractor": "iterparse", "version": 1}
+
+
+def summary_params() -> dict:
+    params = {"model": SUMMARY_MODEL, "mode": SUMMARY_MODE, "max_length": 400, "min_length": 30}
+    if SUMMARY_BACKEND != "fp32":
+        # quantized output differs from fp32, so it must not hit fp32 cache entries
+        from inference import QUANTIZATION
+
+        params.update(backend=SUMMARY_BACKEND, quantization=QUANTIZATION)
+    if SUMMARY_MODE in ("map_reduce", "ranked"):
+        from summarize import MAX_CHUNK_TOKENS, CHUNK_SUMMARY_PARAMS
+
+        params.update(max_chunk_tokens=MAX_CHUNK_TOKENS, chunk_params=CHUNK_SUMMARY_PARAMS)
+    if SUMMARY_MODE == "ranked":
+        from rank import COMMON_DF, MAX_SIMILARITY, METHOD, MIN_WORDS
+
+        params["ranking"] = {"method": METHOD, "budget_tokens": RANK_TOKEN_BUDGET, "min_words": MIN_WORDS,
+                             "max_similarity": MAX_SIMILARITY, "common_df": COMMON_DF}
+    else:
+        params["max_model_chars"] = MAX_MODEL_CHARS
+    return params
+
+
+# download xml (or revalidate the cached copy), returns the local path
+def stage_fetch(url: str) -> str:
+    with METRICS.stage("fetch"):
+        xml_path = fetch_xml(url)
+    METRICS.count("fetch.bytes", os.path.getsize(xml_path))
+    log.info("fetched %s -> %s", url, xml_path)
+    return xml_path
+
+
+# save as plain text for any future manual checks/reviews
+# (streamed paragraph by paragraph instead of building the whole DOM)
+def stage_extract(xml_path: str, text_path: str) -> str:
+    with METRICS.stage("extract"):
+        return _extract(xml_path, text_path)
+
+
+def _extract(xml_path: str, text_path: str) -> str:
+    cache = get_stage_cache()
+    xml_cid = file_digest(xml_path) if cache else None
+    entry = cache and cache.get("extract", xml_cid, EXTRACT_PARAMS)
+    if entry:
+        cache.materialize(entry, text_path)
+        METRICS.count("stage_cache.extract.hit")
+        log.info("extract: cache hit (%s)", entry["output_cid"][:12])
+        return text_path
+
+    extract_to_file(xml_path, text_path)
+    if cache:
+        METRICS.count("stage_cache.extract.miss")
+        cache.put("extract", xml_cid, EXTRACT_PARAMS, text_path)
+    log.info("saved federal register contents")
+    return text_path
+
+
+# summarize the extracted text and write summary + agent metadata to summary_path.
+# model_input is a prefix of the full text or (ranked mode) a selection of its paragraphs,
+# so only its length and the paragraph indices are stored
+def stage_summarize(text_path: str, summary_path: str, src_url: str, load=None) -> dict:
+    with METRICS.stage("summarize"):
+        return _summarize(text_path, summary_path, src_url, load)
+
+
+def _summarize(text_path: str, summary_path: str, src_url: str, load=None) -> dict:
+    cache = get_stage_cache()
+    params = summary_params()
+    text_cid = file_digest(text_path) if cache else None
+    entry = cache and cache.get("summarize", text_cid, params)
+    if entry:
+        # the cached result keeps the metadata (run id etc.) of the run that produced it
+        cache.materialize(entry, summary_path)
+        with open(summary_path, encoding="utf-8") as f:
+            result = json.load(f)
+        result["cache"] = {"key": entry["key"], "computation_cid": entry["computation_cid"]}
+        with open(summary_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        METRICS.count("stage_cache.summarize.hit")
+        log.info("summarize: cache hit (%s), skipped inference", entry["output_cid"][:12])
+        return result
+
+    with open(text_path, encoding="utf-8") as f:
+        full_text = f.read()
+
+    if cache:
+        METRICS.count("stage_cache.summarize.miss")
+    with METRICS.stage("summarize.load_model"):
+        summarizer = (load or load_summarizer)()
+    with METRICS.stage("summarize.inference"):
+        summary, model_input, summary_stats = summarize_text(full_text, summarizer)
+
+    log.info("created federal registry summary")
+    log.debug("--- SUMMARY ---\n%s\n----------------", summary)
+
+    result = {
+        "summary":           summary,
+        "model_input_chars": len(model_input),
+        **({"model_input_paragraphs": [p["index"] for p in summary_stats["ranking"]["selected"]]}
+           if summary_stats and "ranking" in summary_stats else {}),
+        "metadata":          build_agent_info(src_url, summary_stats, summarizer.info),
+    }
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    if cache:
+        entry = cache.put("summarize", text_cid, params, summary_path)
+        result["cache"] = {"key": entry["key"], "computation_cid": None}
+        with open(summary_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    return result
+
+
+# export the integrity store: the full manifest.json, or with manifest_dir only what was
+# added since the last export, as a new shard (manifest_export.py). both read the loose
+# store files, so a store packed with --remove-loose has to be unpacked first
+def export_manifest(manifest_path: str = "./manifest.json", manifest_dir: str = MANIFEST_DIR):
+    from eqty_sdk import generate_manifest
+    from store_pack import packed_only
+
+    missing = packed_only(EQTY_STORE_DIR)
+    if missing:
+        raise RuntimeError(f"{missing} objects in {EQTY_STORE_DIR} are only in packs and would be left out of "
+                           f"the manifest; run `python store_pack.py unpack` first")
+
+    with METRICS.stage("generate_manifest"):
+        if not manifest_dir:
+            generate_manifest(manifest_path)
+            return None
+
+        from manifest_export import ShardedManifest
+
+        sharded = ShardedManifest(manifest_dir)
+        if sharded.needs_contexts:
+            # the JSON-LD contexts only come out of a full export; needed once per shard directory
+            generate_manifest(manifest_path)
+            sharded.seed_contexts(manifest_path)
+        shard = sharded.export(EQTY_STORE_DIR)
+    if shard:
+        METRICS.count("manifest.shard_statements", shard["statements"])
+        METRICS.count("manifest.shard_blobs", shard["blobs"])
+        log.info("manifest shard %s: %d statements, %d blobs", shard["file"], shard["statements"], shard["blobs"])
+    return shard
+
+
+# sign and register the issue, then export the manifest
+def stage_register(issue_date: str, xml_path: str, text_path: str, summary_path: str,
+                   manifest_path: str = "./manifest.json", purge: bool = True, manifest_dir: str = MANIFEST_DIR):
+    with METRICS.stage("register"):
+        return _register(issue_date, xml_path, text_path, summary_path, manifest_path, purge, manifest_dir)
+
+
+# register_issue for a stage_summarize result; a fresh summary's cache entry then
+# remembers the computation, so later cache hits link back to it
+def register_result(issue_date: str, xml_path: str, text_path: str, result: dict, artifacts: ArtifactStore = None):
+    cached = result.get("cache") or {}
+    comp = register_issue(
+        issue_date, xml_path, text_path, result["model_input_chars"],
+        result["summary"], result["metadata"], artifacts, computation_cid=cached.get("computation_cid"),
+    )
+
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("%s", comp.__getstate__())
+    cache = get_stage_cache()
+    if cache and cached.get("key") and not cached.get("computation_cid"):
+        cache.set_computation(cached["key"], comp.cid)
+        log.info("stage cache: %s", cache.stats())
+    return comp
+
+
+def _register(issue_date: str, xml_path: str, text_path: str, summary_path: str,
+              manifest_path: str, purge: bool, manifest_dir: str):
+    from eqty_sdk import purge_integrity_store
+
+    with open(summary_path, encoding="utf-8") as f:
+        result = json.load(f)
+
+    with METRICS.timer("register.init_signer"):
+        init_signer()
+    comp = register_result(issue_date, xml_path, text_path, result)
+    export_manifest(manifest_path, manifest_dir)
+    if purge:
+        purge_integrity_store()
+    return comp
+
+
+def run(issue_date: str, url: str = None, purge: bool = True, manifest_dir: str = MANIFEST_DIR):
+    url = url or issue_url(issue_date)
+    text_path = issue_text_path(issue_date)
+    summary_path = text_path.replace("_full.txt", "_summary.json")
+
+    xml_path = stage_fetch(url)
+    stage_extract(xml_path, text_path)
+    stage_summarize(text_path, summary_path, url)
+    return stage_register(issue_date, xml_path, text_path, summary_path, purge=purge, manifest_dir=manifest_dir)
+
+
+# per-document mode (documents.py): each RULE / PRORULE / NOTICE / PRESDOCU is extracted
+# from its byte range and summarized in a worker process, then registered here as soon
+# as it finishes: its text and summary as their own Datasets, linked by their own
+# Computation. registration stays in this process so the run keeps one signing key.
+# a slow document only holds up itself, and `only` re-processes single documents
+
+_worker_summarizer = None
+
+
+# loaded on the first stage cache miss, then kept for the life of the process (a
+# per-document worker, or a batch backfill)
+def load_summarizer_once():
+    global _worker_summarizer
+    if _worker_summarizer is None:
+        _worker_summarizer = load_summarizer()
+    return _worker_summarizer
+
+
+def _process_document(xml_path: str, document: dict, docs_dir: str, src_url: str):
+    from documents import document_text
+
+    text_path = os.path.join(docs_dir, f"doc-{document['n']:04d}.txt")
+    summary_path = text_path.replace(".txt", "_summary.json")
+    with open(text_path, "w", encoding="utf-8") as f:
+        f.write(document_text(xml_path, document))
+    _summarize(text_path, summary_path, src_url, load=load_summarizer_once)
+    return text_path, summary_path
+
+
+# register one document's text (from its file), summary and computation. returns their CIDs
+def register_document(issue_date: str, document: dict, text_path: str, result: dict,
+                      xml_ds, artifacts: ArtifactStore) -> dict:
+    from eqty_sdk import Computation
+    from documents import FIELDS
+
+    label = f"FR {issue_date} {document['type']} {document.get('document_number', document['n'])}"
+    fields = {k: document[k] for k in (*FIELDS.values(), "document_number") if k in document}
+    computation_cid = (result.get("cache") or {}).get("computation_cid")
+
+    text_ds = artifacts.register_file(
+        text_path,
+        name=f"{label} text",
+        description=document.get("subject") or f"{document['type']} extracted from the issue XML",
+        source_xml=xml_ds.cid,
+        xml_start=document["bytes"][0],
+        xml_end=document["bytes"][1],
+        paragraph_start=document["paragraphs"][0],
+        paragraph_end=document["paragraphs"][1],
+        **fields,
+    )
+    summary_ds = artifacts.register_text(
+        result["summary"],
+        name=f"{label} summary",
+        description=f"summary of {label}",
+        model=SUMMARY_MODEL,
+        run_id=result["metadata"].get("run_id", RUN_ID),
+        **({"produced_by": computation_cid} if computation_cid else {})
+    )
+    # on a stage cache hit the computation is still registered, so the export links
+    # text -> summary, and reused_from names the one that produced the summary
+    comp = (
+        Computation
+        .new(name="fr-summariser v0.1 document run",
+             description=f"{document['type']} text ➜ BART summary, {label}"
+                         + (" (summary reused from the stage cache)" if computation_cid else ""),
+             model=SUMMARY_MODEL,
+             run_id=RUN_ID,
+             document=label,
+             **({"reused_from": computation_cid} if computation_cid else {}))
+        .add_input_cid(text_ds.cid)
+        .add_output_cid(summary_ds.cid)
+    )
+    with METRICS.timer("register.computation"):
+        comp.finalize()
+    cache = get_stage_cache()
+    if cache and (result.get("cache") or {}).get("key") and not computation_cid:
+        cache.set_computation(result["cache"]["key"], comp.cid)
+    return {"text": text_ds.cid, "summary": summary_ds.cid, "computation": comp.cid,
+            **({"reused_from": computation_cid} if computation_cid else {}),
+            "metadata": result["metadata"]}
+
+
+# the per-document records earlier runs registered for this issue XML, by index position
+def _load_registered(path: str, index: dict) -> dict:
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            registered = json.load(f)
+        if registered.get("xml_sha256") == index["xml_sha256"]:
+            return registered["documents"]
+    return {}
+
+
+def run_documents(issue_date: str, url: str = None, workers: int = DOCUMENT_WORKERS, only=None,
+                  manifest_path: str = "./manifest.json", purge: bool = True, manifest_dir: str = MANIFEST_DIR):
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from eqty_sdk import Dataset, purge_integrity_store
+    from documents import load_index
+
+    url = url or issue_url(issue_date)
+    xml_path = stage_fetch(url)
+    docs_dir = issue_text_path(issue_date).replace("_full.txt", "_docs")
+    os.makedirs(docs_dir, exist_ok=True)
+    with METRICS.stage("segment"):
+        index = load_index(xml_path, os.path.join(docs_dir, "index.json"))
+    only = {str(o) for o in only or ()}
+    documents = [d for d in index["documents"] if not only or str(d["n"]) in only or d.get("document_number") in only]
+    log.info("%s documents in the issue, processing %s on %s workers", len(index["documents"]), len(documents), workers)
+
+    with METRICS.timer("register.init_signer"):
+        init_signer()
+    artifacts = ArtifactStore()
+    xml_ds = artifacts.register_file(
+        xml_path, name=f"FR {issue_date} source XML", description="Federal Register issue XML", src_url=url)
+
+    records = []
+    with METRICS.stage("documents"), ProcessPoolExecutor(workers) as pool:
+        futures = {pool.submit(_process_document, xml_path, d, docs_dir, url): d for d in documents}
+        for future in as_completed(futures):
+            document = futures[future]
+            try:
+                text_path, summary_path = future.result()
+            except Exception as e:
+                log.warning("document %s (%s) failed: %s", document["n"], document["type"], e)
+                METRICS.count("documents.failed")
+                records.append({**document, "error": str(e)})
+                continue
+            with open(summary_path, encoding="utf-8") as f:
+                result = json.load(f)
+            with METRICS.timer("register.document"):
+                records.append({**document, **register_document(issue_date, document, text_path, result, xml_ds, artifacts)})
+            METRICS.count("documents.registered")
+            log.info("document %s (%s) registered", document["n"], document["type"])
+
+    records.sort(key=lambda r: r["n"])
+    # the issue index always covers every document: an --only run merges its records
+    # into what earlier runs registered, the rest keep their index metadata only
+    registered_path = os.path.join(docs_dir, "registered.json")
+    registered = _load_registered(registered_path, index)
+    registered.update({str(r["n"]): r for r in records})
+    with open(registered_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"xml_sha256": index["xml_sha256"], "documents": registered}, f, indent=2)
+    os.replace(registered_path + ".tmp", registered_path)
+    with METRICS.timer("register.dataset"):
+        Dataset.from_object(
+            {"xml": ref(xml_ds), "documents": [registered.get(str(d["n"]), d) for d in index["documents"]]},
+            name=f"FR {issue_date} documents",
+            description="per-document index of the Federal Register issue: metadata, byte ranges, "
+                        "text / summary / computation CIDs",
+        )
+    log.info("artifacts: %s", artifacts.stats())
+    export_manifest(manifest_path, manifest_dir)
+    if purge:
+        purge_integrity_store()
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Federal Register scraper / summarizer agent")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def issue_args(p):
+        p.add_argument("--date", default="2025-07-28", help="issue date, YYYY-MM-DD")
+
+    p = sub.add_parser("fetch", help="download the issue XML into the cache")
+    issue_args(p)
+    p.add_argument("--url", help="defaults to the govinfo URL for --date")
+
+    p = sub.add_parser("extract", help="XML -> plain text")
+    issue_args(p)
+    p.add_argument("xml", help="path of the issue XML (see fetch)")
+    p.add_argument("-o", "--out", help="defaults to fr_<date>_full.txt")
+
+    p = sub.add_parser("summarize", help="plain text -> summary json")
+    issue_args(p)
+    p.add_argument("--text", help="defaults to fr_<date>_full.txt")
+    p.add_argument("-o", "--out", help="defaults to fr_<date>_summary.json")
+    p.add_argument("--url", help="source URL recorded in the metadata")
+
+    p = sub.add_parser("register", help="sign + register an extracted and summarized issue")
+    issue_args(p)
+    p.add_argument("xml")
+    p.add_argument("--text")
+    p.add_argument("--summary")
+    p.add_argument("--manifest", default="./manifest.json")
+    p.add_argument("--no-purge", action="store_true", help="keep the local integrity store")
+
+    p = sub.add_parser("run", help="fetch, extract, summarize and register")
+    issue_args(p)
+    p.add_argument("--url")
+    p.add_argument("--no-purge", action="store_true")
+
+    p = sub.add_parser("documents", help="split the issue into its documents and process each one in parallel")
+    issue_args(p)
+    p.add_argument("--url")
+    p.add_argument("--workers", type=int, default=DOCUMENT_WORKERS)
+    p.add_argument("--only", help="comma-separated positions in the index or FR Doc numbers (2025-14123) to (re)process")
+    p.add_argument("--manifest", default="./manifest.json")
+    p.add_argument("--no-purge", action="store_true")
+
+    for name in ("register", "run", "documents"):
+        sub.choices[name].add_argument(
+            "--manifest-dir", default=MANIFEST_DIR,
+            help="export only new statements, as a shard in this directory (see manifest_export.py)")
+
+    for p in sub.choices.values():
+        p.add_argument("-v", "--verbose", action="store_true", help="also log full summary/statement dumps")
+        p.add_argument("-q", "--quiet", action="store_true", help="warnings and errors only")
+        p.add_argument("--report", default=os.environ.get("FR_RUN_REPORT"),
+                       help="write a JSON run report (stage timings, counters, peak memory) here")
+        p.add_argument("--prometheus", default=os.environ.get("FR_PROM_TEXTFILE"),
+                       help="write the same metrics as a Prometheus textfile here")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.WARNING if args.quiet else logging.INFO,
+        format="%(message)s",
+    )
+    try:
+        _dispatch(args)
+    finally:
+        if args.report:
+            METRICS.write_json(args.report)
+        if args.prometheus:
+            METRICS.write_prometheus(args.prometheus)
+
+
+def _dispatch(args):
+    text_path = getattr(args, "text", None) or issue_text_path(args.date)
+    summary_path = text_path.replace("_full.txt", "_summary.json")
+
+    if args.command == "fetch":
+        print(stage_fetch(args.url or issue_url(args.date)))
+    elif args.command == "extract":
+        stage_extract(args.xml, args.out or text_path)
+    elif args.command == "summarize":
+        stage_summarize(text_path, args.out or summary_path, args.url or issue_url(args.date))
+    elif args.command == "register":
+        stage_register(args.date, args.xml, text_path, args.summary or summary_path,
+                       args.manifest, purge=not args.no_purge, manifest_dir=args.manifest_dir)
+    elif args.command == "run":
+        run(args.date, args.url, purge=not args.no_purge, manifest_dir=args.manifest_dir)
+    elif args.command == "documents":
+        only = [o.strip() for o in args.only.split(",")] if args.only else None
+        run_documents(args.date, args.url, args.workers, only, args.manifest,
+                      purge=not args.no_purge, manifest_dir=args.manifest_dir)
 
 
+if __name__ == "__main__":
+    main()
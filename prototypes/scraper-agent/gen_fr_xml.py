@@ -0,0 +1,77 @@
+import random
+from xml.sax.saxutils import escape
+
+# synthetic Federal Register issue XML for benchmarks, no network or source text needed
+#
+#   python gen_fr_xml.py 400 fr_synthetic.xml       (~400 documents, ~5 MB)
+#
+# same shape as the govinfo issue XML the agent parses: a TOC under CNTNTS, then
+# RULES / PRORULES / NOTICES / PRESDOCS sections holding one element per document with
+# a PREAMB (AGENCY, SUBJECT), body paragraphs with inline <E> emphasis, and an FRDOC
+# line. output is deterministic for a given seed
+
+SECTIONS = [("RULES", "RULE"), ("PRORULES", "PRORULE"), ("NOTICES", "NOTICE"), ("PRESDOCS", "PRESDOCU")]
+SECTION_WEIGHTS = [0.2, 0.15, 0.6, 0.05]
+
+AGENCIES = [
+    "Environmental Protection Agency", "Federal Aviation Administration", "Food and Drug Administration",
+    "Securities and Exchange Commission", "Department of Energy", "Federal Communications Commission",
+    "Coast Guard", "Internal Revenue Service", "National Oceanic and Atmospheric Administration",
+]
+WORDS = (
+    "the of and to in a for is that by on this with as be or are under section rule agency "
+    "final proposed comment public notice regulation requirements federal information data "
+    "program safety standard period effective date amendment applicable provisions request "
+    "approval submission review analysis impact economic small entities burden collection "
+    "determination authority statutory action register docket"
+).split()
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 24))]
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraph(rng: random.Random) -> str:
+    words = escape(" ".join(_sentence(rng) for _ in range(rng.randint(2, 6)))).split(" ")
+    if len(words) > 4 and rng.random() < 0.3:
+        words[2] = f'<E T="03">{words[2]}</E>'
+    return " ".join(words)
+
+
+def write_issue_xml(path: str, n_documents: int, paragraphs_per_document: int = 25, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    documents = {tag: [] for _, tag in SECTIONS}
+    for i in range(n_documents):
+        _, tag = rng.choices(SECTIONS, SECTION_WEIGHTS)[0]
+        documents[tag].append((i, rng.choice(AGENCIES), _sentence(rng)))
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<FEDREG>\n<CNTNTS>\n<TOC>\n')
+        for tag, docs in documents.items():
+            for i, agency, subject in docs:
+                f.write(f"<P>{escape(agency)}: {escape(subject[:60])}</P>\n")
+        f.write("</TOC>\n</CNTNTS>\n")
+
+        for section, tag in SECTIONS:
+            f.write(f"<{section}>\n")
+            for i, agency, subject in documents[tag]:
+                f.write(f"<{tag}>\n<PREAMB>\n<AGENCY>{escape(agency)}</AGENCY>\n"
+                        f"<SUBJECT>{escape(subject)}</SUBJECT>\n</PREAMB>\n")
+                for _ in range(rng.randint(paragraphs_per_document // 2, paragraphs_per_document * 3 // 2)):
+                    f.write(f"<P>{_paragraph(rng)}</P>\n")
+                f.write(f"<FRDOC>[FR Doc. 2025-{10000 + i:05d} Filed 7-25-25; 8:45 am]</FRDOC>\n</{tag}>\n")
+            f.write(f"</{section}>\n")
+        f.write("</FEDREG>\n")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="generate a synthetic Federal Register issue XML")
+    parser.add_argument("documents", type=int)
+    parser.add_argument("out")
+    parser.add_argument("--paragraphs", type=int, default=25, help="average paragraphs per document")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write_issue_xml(args.out, args.documents, args.paragraphs, args.seed)
@@ -0,0 +1,117 @@
+import base64
+import hashlib
+import json
+import random
+
+# synthetic manifest.json for benchmarks, shaped like a multi-issue backfill
+#
+#   python gen_manifest.py 2000 manifest_synthetic.json     (~42k statements, ~30 MB)
+#
+# per issue: DataRegistrations for the source XML, the plain text and the summary, an
+# extract and a summarize ComputationRegistration linking them, a MetadataRegistration
+# (with its metadata blob) per dataset and computation, and a CredentialRegistration
+# signing every statement. every `digest_every` issues a digest computation takes the
+# last summaries as inputs, so lineage queries have more than one hop to follow.
+# statement and blob CIDs are fake but unique and deterministic for a given seed
+
+CONTEXT = "urn:cid:bafkr4iagb4u7jqlwqrftw4mn3l634wmgatmpvvzqgntgxaaerzljhggvdu"
+TIMESTAMP = "2025-08-03T01:54:11Z"
+
+
+def _cid(prefix: str, *parts) -> str:
+    digest = hashlib.sha256("\x00".join(map(str, parts)).encode("utf-8")).digest()
+    return prefix + base64.b32encode(digest).decode("ascii").lower().rstrip("=")[:52]
+
+
+def statement_cid(*parts) -> str:
+    return "urn:cid:" + _cid("bagb6qaq6e", "statement", *parts)
+
+
+def data_cid(*parts) -> str:
+    return "urn:cid:" + _cid("bafkr4i", "data", *parts)
+
+
+def blob_cid(*parts) -> str:
+    return _cid("baga6yaq6e", "blob", *parts)
+
+
+class ManifestWriter:
+    def __init__(self, f):
+        self.f = f
+        self.blobs = {}
+        self.statements = 0
+        f.write('{"version": "2", "contexts": {}, "statements": {')
+
+    def _write(self, cid: str, statement: dict) -> None:
+        statement = {"@context": CONTEXT, "@id": cid, **statement}
+        self.f.write(("," if self.statements else "") + f"\n{json.dumps(cid)}: {json.dumps(statement)}")
+        self.statements += 1
+
+    def add(self, kind: str, signer: str, key, **fields) -> str:
+        cid = statement_cid(kind, key)
+        self._write(cid, {"@type": kind, **fields, "registeredBy": signer, "timestamp": TIMESTAMP})
+        self._write(statement_cid("credential", cid), {
+            "@type": "CredentialRegistration",
+            "credential": {
+                "type": ["VerifiableCredential"],
+                "credentialSubject": {"id": cid},
+                "issuer": signer,
+                "issuanceDate": TIMESTAMP,
+                "proof": {"type": "Ed25519Signature2018", "verificationMethod": f"{signer}#{signer[8:]}",
+                          "jws": base64.urlsafe_b64encode(hashlib.sha512(cid.encode()).digest()).decode()},
+            },
+        })
+        return cid
+
+    def metadata(self, signer: str, subject: str, **metadata) -> None:
+        blob = blob_cid(subject)
+        self.blobs[blob] = base64.b64encode(json.dumps(metadata).encode("utf-8")).decode("ascii")
+        self.add("MetadataRegistration", signer, ("metadata", subject),
+                 subject=subject, metadata=f"urn:cid:{blob}")
+
+    def close(self) -> None:
+        self.f.write('\n}, "blobs": {')
+        self.f.write(",".join(f"\n{json.dumps(cid)}: {json.dumps(data)}" for cid, data in self.blobs.items()))
+        self.f.write("\n}}\n")
+
+
+def write_manifest(path: str, n_issues: int, n_signers: int = 4, digest_every: int = 5, seed: int = 0) -> int:
+    """Write a synthetic manifest for n_issues issues; returns the statement count."""
+    rng = random.Random(seed)
+    signers = ["did:key:z6Mk" + _cid("", "signer", seed, i)[:44] for i in range(n_signers)]
+    with open(path, "w", encoding="utf-8") as f:
+        writer = ManifestWriter(f)
+        summaries = []
+        for issue in range(n_issues):
+            signer = rng.choice(signers)
+            date = f"issue-{issue:06d}"
+            xml, text, summary = (data_cid(seed, date, kind) for kind in ("xml", "text", "summary"))
+            for cid, name in ((xml, "raw xml"), (text, "full extraction of text"), (summary, "summary")):
+                writer.add("DataRegistration", signer, cid, data=cid)
+                writer.metadata(signer, cid, name=f"FR {date} {name}")
+            for kind, inputs, outputs in (("extract", [xml], [text]), ("summarize", [text], [summary])):
+                computation = writer.add("ComputationRegistration", signer, (kind, seed, date),
+                                         input=inputs, output=outputs, operatedBy=signer)
+                writer.metadata(signer, computation, name=f"fr-summariser {kind} {date}")
+            summaries.append(summary)
+
+            if digest_every and len(summaries) == digest_every:
+                digest = data_cid(seed, "digest", issue)
+                writer.add("DataRegistration", signer, digest, data=digest)
+                writer.add("ComputationRegistration", signer, ("digest", seed, issue),
+                           input=summaries, output=[digest], operatedBy=signer)
+                summaries = []
+        writer.close()
+    return writer.statements
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="generate a synthetic manifest.json")
+    parser.add_argument("issues", type=int)
+    parser.add_argument("out")
+    parser.add_argument("--signers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(f"{write_manifest(args.out, args.issues, args.signers, seed=args.seed)} statements")
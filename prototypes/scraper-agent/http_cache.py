@@ -0,0 +1,164 @@
+import base64
+import binascii
+import hashlib
+import json
+import mmap
+import os
+from typing import Optional
+
+import requests
+
+# content-addressed on-disk HTTP cache
+#
+#   <cache_dir>/objects/<sha256>      response bodies, named by their digest
+#   <cache_dir>/urls/<url-key>.json   per-URL validators (ETag / Last-Modified) + digest
+#   <cache_dir>/partial/<url-key>     interrupted download, resumed with a Range request
+#
+# bodies are streamed to disk in chunks and never held in memory as one string.
+# if the server sends a sha-256 Repr-Digest (or the older Digest header), the stored
+# body is checked against it: a resumed download that does not match is thrown away
+# and fetched again in full, a full one that does not match raises DigestMismatchError
+
+CHUNK_SIZE = 1 << 20
+
+
+class DigestMismatchError(requests.RequestException):
+    """The downloaded body does not match the digest the server sent for it."""
+
+
+def _expected_sha256(headers) -> Optional[str]:
+    """Hex sha-256 from a Repr-Digest (RFC 9530) or Digest (RFC 3230) header, if any."""
+    if headers.get("Content-Encoding", "identity") != "identity":
+        return None     # the digest covers the encoded bytes, the cache stores decoded ones
+    for name, prefix, suffix in (("Repr-Digest", "sha-256=:", ":"), ("Digest", "sha-256=", "")):
+        for part in headers.get(name, "").split(","):
+            part = part.strip()
+            if part.lower().startswith(prefix) and part.endswith(suffix):
+                try:
+                    return base64.b64decode(part[len(prefix):len(part) - len(suffix)], validate=True).hex()
+                except binascii.Error:
+                    return None
+    return None
+
+
+def _url_key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def _write_json(path: str, data: dict) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _read_json(path: str) -> Optional[dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class HttpCache:
+    def __init__(self, cache_dir: str = ".fr_cache", session: requests.Session = None, chunk_size: int = CHUNK_SIZE):
+        self.cache_dir = cache_dir
+        self.session = session or requests.Session()
+        self.chunk_size = chunk_size
+        for sub in ("objects", "urls", "partial"):
+            os.makedirs(os.path.join(cache_dir, sub), exist_ok=True)
+
+    def object_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, "objects", digest)
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, "urls", key + ".json")
+
+    def _partial_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, "partial", key)
+
+    def fetch(self, url: str, timeout: int = 30) -> str:
+        """
+        Return the path of a local copy of url, downloading only what is needed:
+        a cached copy is revalidated with If-None-Match / If-Modified-Since, and an
+        interrupted download is resumed from where it stopped.
+        """
+        key = _url_key(url)
+        meta = _read_json(self._meta_path(key))
+        partial = self._partial_path(key)
+        partial_meta = _read_json(partial + ".json")
+
+        headers = {}
+        offset = 0
+        if partial_meta and os.path.exists(partial):
+            # resume; If-Range makes the server send the full body if it changed meanwhile
+            offset = os.path.getsize(partial)
+            headers["Range"] = f"bytes={offset}-"
+            validator = partial_meta.get("etag") or partial_meta.get("last_modified")
+            if validator:
+                headers["If-Range"] = validator
+        elif meta and os.path.exists(self.object_path(meta["sha256"])):
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        with self.session.get(url, headers=headers, stream=True, timeout=timeout) as r:
+            if r.status_code == 304:
+                return self.object_path(meta["sha256"])
+            if r.status_code == 416:
+                # our partial is no good (e.g. body shrank), start over
+                self._drop_partial(key)
+                return self.fetch(url, timeout)
+            r.raise_for_status()
+
+            validators = {
+                "etag": r.headers.get("ETag"),
+                "last_modified": r.headers.get("Last-Modified"),
+            }
+            sha = hashlib.sha256()
+            if r.status_code == 206 and r.headers.get("Content-Range", "").startswith(f"bytes {offset}-"):
+                mode = "ab"
+                # the digest has to cover the bytes already on disk
+                with open(partial, "rb") as f:
+                    for block in iter(lambda: f.read(self.chunk_size), b""):
+                        sha.update(block)
+            else:
+                mode = "wb"
+                _write_json(partial + ".json", {"url": url, **validators})
+
+            with open(partial, mode) as f:
+                for block in r.iter_content(self.chunk_size):
+                    sha.update(block)
+                    f.write(block)
+                f.flush()
+                os.fsync(f.fileno())
+
+        digest = sha.hexdigest()
+        expected = _expected_sha256(r.headers)
+        if expected and expected != digest:
+            self._drop_partial(key)
+            if mode == "ab":
+                # the bytes kept from the interrupted download are not what the server has now
+                return self.fetch(url, timeout)
+            raise DigestMismatchError(f"{url}: body sha256 {digest} does not match the server's {expected}")
+        os.replace(partial, self.object_path(digest))
+        self._drop_partial(key)
+        _write_json(self._meta_path(key), {
+            "url": url,
+            "sha256": digest,
+            "size": os.path.getsize(self.object_path(digest)),
+            **validators,
+        })
+        return self.object_path(digest)
+
+    def _drop_partial(self, key: str) -> None:
+        for path in (self._partial_path(key), self._partial_path(key) + ".json"):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+# read-only memory map of a cached body, for callers that want bytes without a copy
+def open_mmap(path: str) -> mmap.mmap:
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
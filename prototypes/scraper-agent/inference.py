@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import re
+import time
+from typing import Dict
+
+from summarize import configure_threads
+
+# CPU inference backends for the summarization pipeline
+#
+#   fp32   the transformers pipeline as loaded: fp32 weights, eager mode
+#   int8   nn.Linear layers dynamically quantized to int8 (torch.ao.quantization.
+#          quantize_dynamic: int8 weights, activations quantized per batch at run time),
+#          generation under torch.inference_mode
+#
+# both backends apply the intra-op / inter-op thread counts before the model loads.
+# quantizing takes a full fp32 load plus a pass over every Linear, so the quantized
+# state_dict is saved to MODEL_CACHE_DIR on first use. later loads build the model from
+# its config, quantize it (no weights to convert yet) and load the cached state_dict
+# with torch.load(weights_only=True), so the cache file is never unpickled as code.
+# the cache file name hashes everything the quantized weights depend on (model,
+# revision, quantization settings, quantized engine, torch and transformers versions);
+# a change to any of them means a new file, never a stale model. a hub checkpoint's
+# revision is its commit hash; a local directory's is its config plus the name, size
+# and mtime of each weight file, so retraining into the same directory is a new revision
+
+BACKENDS = ("fp32", "int8")
+MODEL_CACHE_DIR = os.environ.get("FR_MODEL_CACHE_DIR", ".fr_model_cache")
+QUANTIZATION = {"method": "dynamic", "dtype": "qint8", "modules": ["Linear"]}
+CACHE_FORMAT = "state_dict"
+WEIGHT_SUFFIXES = (".bin", ".safetensors", ".pt", ".pth", ".ckpt", ".h5", ".msgpack", ".index.json")
+
+
+class SummarizationPipeline:
+    """A transformers summarization pipeline plus the settings it runs with.
+    Called like the pipeline; `info` is recorded in each summary's metadata."""
+
+    def __init__(self, pipeline, info: Dict, inference_mode: bool):
+        self.pipeline = pipeline
+        self.info = info
+        self.inference_mode = inference_mode
+
+    @property
+    def tokenizer(self):
+        return self.pipeline.tokenizer
+
+    def __call__(self, *args, **kwargs):
+        if not self.inference_mode:
+            return self.pipeline(*args, **kwargs)
+        import torch
+
+        with torch.inference_mode():
+            return self.pipeline(*args, **kwargs)
+
+
+def quantize(model):
+    import torch
+
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _cache_path(cache_dir: str, model_name: str, revision: str) -> str:
+    import torch
+    import transformers
+
+    key = json.dumps({
+        "model": model_name, "revision": revision, "quantization": QUANTIZATION, "format": CACHE_FORMAT,
+        "engine": torch.backends.quantized.engine, "torch": torch.__version__,
+        "transformers": transformers.__version__,
+    }, sort_keys=True)
+    name = re.sub(r"[^A-Za-z0-9._-]+", "--", model_name).strip("-")
+    return os.path.join(cache_dir, f"{name}.int8.{hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]}.pt")
+
+
+def _revision(model_name: str, config) -> str:
+    commit_hash = getattr(config, "_commit_hash", None)
+    if commit_hash and not os.path.isdir(model_name):
+        return commit_hash
+    key = hashlib.sha256(config.to_json_string().encode("utf-8"))
+    if os.path.isdir(model_name):
+        for name in sorted(os.listdir(model_name)):
+            if name.endswith(WEIGHT_SUFFIXES):
+                st = os.stat(os.path.join(model_name, name))
+                key.update(f"{name}\0{st.st_size}\0{st.st_mtime_ns}\0".encode("utf-8"))
+    return key.hexdigest()
+
+
+def _quantized_from_config(model_name: str, config):
+    """The model quantized with untrained weights, ready for a cached state_dict."""
+    from transformers import AutoModelForSeq2SeqLM, GenerationConfig
+
+    model = AutoModelForSeq2SeqLM.from_config(config)
+    try:
+        # from_pretrained reads generation_config.json too (beams, length penalty, ...)
+        model.generation_config = GenerationConfig.from_pretrained(model_name)
+    except OSError:
+        pass
+    return quantize(model.eval())
+
+
+def _load_quantized(model_name: str, cache_dir: str):
+    """(quantized model, cache file, cache hit)"""
+    import torch
+    from transformers import AutoConfig, AutoModelForSeq2SeqLM
+
+    config = AutoConfig.from_pretrained(model_name)
+    path = _cache_path(cache_dir, model_name, _revision(model_name, config))
+    if os.path.exists(path):
+        model = _quantized_from_config(model_name, config)
+        model.load_state_dict(torch.load(path, weights_only=True))
+        return model, path, True
+
+    model = quantize(AutoModelForSeq2SeqLM.from_pretrained(model_name).eval())
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        torch.save(model.state_dict(), tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return model, path, False
+
+
+def load_summarizer(model_name: str, backend: str = "fp32", threads: int = 0, interop_threads: int = 0,
+                    cache_dir: str = MODEL_CACHE_DIR) -> SummarizationPipeline:
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown inference backend {backend!r}, expected one of {', '.join(BACKENDS)}")
+    configure_threads(threads, interop_threads)
+    import torch
+    from transformers import pipeline
+
+    start = time.perf_counter()
+    info = {"backend": backend}
+    if backend == "fp32":
+        summarizer = pipeline("summarization", model=model_name)
+    else:
+        from transformers import AutoTokenizer
+
+        model, path, cache_hit = _load_quantized(model_name, cache_dir)
+        summarizer = pipeline("summarization", model=model, tokenizer=AutoTokenizer.from_pretrained(model_name))
+        info["quantization"] = {**QUANTIZATION, "engine": torch.backends.quantized.engine,
+                                "cache_file": os.path.basename(path), "cache_hit": cache_hit}
+    info.update({
+        "inference_mode": backend != "fp32",
+        "intra_op_threads": torch.get_num_threads(),
+        "inter_op_threads": torch.get_num_interop_threads(),
+        "load_seconds": round(time.perf_counter() - start, 3),
+    })
+    return SummarizationPipeline(summarizer, info, inference_mode=backend != "fp32")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="load (and cache) a summarization backend")
+    parser.add_argument("--model", default="sshleifer/distilbart-cnn-12-6")
+    parser.add_argument("--backend", choices=BACKENDS, default="int8")
+    parser.add_argument("--cache-dir", default=MODEL_CACHE_DIR)
+    args = parser.parse_args()
+    print(json.dumps(load_summarizer(args.model, args.backend, cache_dir=args.cache_dir).info, indent=2))
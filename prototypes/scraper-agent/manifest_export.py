@@ -0,0 +1,226 @@
+import base64
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from manifest_index import iter_manifest
+
+# incremental manifest export: a directory of JSON Lines shards instead of one manifest.json
+#
+#   manifest.d/index.json           version, contexts, list of shards, exported entry count
+#   manifest.d/exported.txt         the CID of every exported entry, one per line, in order
+#   manifest.d/shard-000001.jsonl   {"type": "statement" | "blob", "cid": ..., "value": ...} per line
+#
+# export() lists the local integrity store (.eqty_sdk/store) by file name only, no stat,
+# writes the statements and blobs whose CID is not in exported.txt yet as one new shard,
+# then appends their CIDs. only the new files are read, so a daily run costs a directory
+# listing plus what that day registered. compact() merges the shards back into the
+# single-file manifest.json format.
+#
+# the store is content-addressed, so a file's name is its identity: which files are new
+# is a set difference, and no file time is trusted. a file restored from a backup with
+# its old mtime, or one whose write finished after a later one, is still exported.
+# exported.txt is appended after the index lists the shard, and the index keeps the
+# count it should have; a list that does not match (a crash before or during the append,
+# or a version 1 index, which kept an mtime high-water mark instead) is rebuilt from
+# the shards the index lists. the JSON-LD contexts are not in the store; they are
+# copied once from a manifest written by generate_manifest (see seed_contexts)
+
+INDEX_VERSION = 2
+MANIFEST_VERSION = "2"
+EXPORTED_FILE = "exported.txt"
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def list_store(store_root: str) -> Iterator[Tuple[str, str, str]]:
+    """Yield (kind, cid, relative path) for every statement and blob file in the store,
+    from the directory listings alone."""
+    statements_dir = os.path.join(store_root, "statements")
+    if os.path.isdir(statements_dir):
+        for sub in sorted(os.listdir(statements_dir)):
+            for name in os.listdir(os.path.join(statements_dir, sub)):
+                if name.endswith(".jsonld"):
+                    yield "statement", "urn:cid:" + name[:-len(".jsonld")], f"statements/{sub}/{name}"
+    blobs_dir = os.path.join(store_root, "json-jcs")
+    if os.path.isdir(blobs_dir):
+        for name in os.listdir(blobs_dir):
+            yield "blob", name, f"json-jcs/{name}"
+
+
+def scan_store(store_root: str) -> Iterator[Tuple[str, str, str, int]]:
+    """Yield (kind, cid, relative path, mtime_ns) for every statement and blob file in the store."""
+    for kind, cid, path in list_store(store_root):
+        yield kind, cid, path, os.stat(os.path.join(store_root, path)).st_mtime_ns
+
+
+class ShardedManifest:
+    def __init__(self, directory: str = "manifest.d"):
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.json")
+        self.exported_path = os.path.join(directory, EXPORTED_FILE)
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding="utf-8") as f:
+                self.index = json.load(f)
+        else:
+            self.index = {"version": INDEX_VERSION, "manifest_version": MANIFEST_VERSION, "contexts": {},
+                          "exported": 0, "shards": []}
+        self._exported: Optional[set] = None
+
+    @property
+    def shards(self) -> List[dict]:
+        return self.index["shards"]
+
+    @property
+    def needs_contexts(self) -> bool:
+        return not self.index["contexts"]
+
+    def _save(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        _atomic_write(self.index_path, json.dumps(self.index, indent=2).encode("utf-8"))
+
+    @property
+    def exported(self) -> set:
+        """CIDs of every entry in the shards the index lists."""
+        if self._exported is None:
+            self._exported = self._load_exported()
+        return self._exported
+
+    def _load_exported(self) -> set:
+        data = ""
+        if os.path.exists(self.exported_path):
+            with open(self.exported_path, encoding="utf-8") as f:
+                data = f.read()
+        cids = data.splitlines()
+        if len(cids) == self.index.get("exported") and data.endswith("\n") == bool(cids):
+            return set(cids)
+
+        cids = [cid for _, cid, _ in self.iter_entries()]
+        os.makedirs(self.directory, exist_ok=True)
+        _atomic_write(self.exported_path, "".join(cid + "\n" for cid in cids).encode("utf-8"))
+        self.index.pop("high_water_mark_ns", None)
+        self.index.pop("recent", None)
+        self.index.update(version=INDEX_VERSION, exported=len(cids))
+        self._save()
+        return set(cids)
+
+    def seed_contexts(self, manifest_path: str) -> None:
+        """Copy the JSON-LD contexts out of a full manifest (e.g. one from generate_manifest)."""
+        contexts = {key: value for section, key, value in iter_manifest(manifest_path) if section == "contexts"}
+        self.index["contexts"].update(contexts)
+        self._save()
+
+    def export(self, store_root: str = ".eqty_sdk/store") -> Optional[dict]:
+        """Write everything added to the store since the last export as a new shard.
+        Returns the shard's index entry, or None when there was nothing new."""
+        exported = self.exported
+        new = [(kind, cid, path) for kind, cid, path in list_store(store_root) if cid not in exported]
+        if not new:
+            return None
+
+        # statements first, then blobs, the same order as manifest.json
+        new.sort(key=lambda item: item[0] != "statement")
+        name = f"shard-{len(self.shards) + 1:06d}.jsonl"
+        shard_path = os.path.join(self.directory, name)
+        os.makedirs(self.directory, exist_ok=True)
+        digest, size, counts = hashlib.sha256(), 0, {"statement": 0, "blob": 0}
+        tmp_path = f"{shard_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as out:
+            for kind, cid, path in new:
+                with open(os.path.join(store_root, path), "rb") as f:
+                    raw = f.read()
+                value = json.loads(raw) if kind == "statement" else base64.b64encode(raw).decode("ascii")
+                line = json.dumps({"type": kind, "cid": cid, "value": value}, separators=(",", ":")).encode("utf-8") + b"\n"
+                out.write(line)
+                digest.update(line)
+                size += len(line)
+                counts[kind] += 1
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, shard_path)
+
+        # the shard is durable before the index points at it; a crash in between leaves an
+        # orphan that the next export overwrites under the same name
+        entry = {"file": name, "created": time.time(), "statements": counts["statement"],
+                 "blobs": counts["blob"], "bytes": size, "sha256": digest.hexdigest()}
+        self.shards.append(entry)
+        self.index["exported"] += len(new)
+        self._save()
+        with open(self.exported_path, "a", encoding="utf-8") as f:
+            f.write("".join(cid + "\n" for _, cid, _ in new))
+            f.flush()
+            os.fsync(f.fileno())
+        exported.update(cid for _, cid, _ in new)
+        return entry
+
+    def iter_entries(self) -> Iterator[Tuple[str, str, object]]:
+        """(kind, cid, value) for every line of every shard, oldest shard first."""
+        for shard in self.shards:
+            with open(os.path.join(self.directory, shard["file"]), "rb") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    yield entry["type"], entry["cid"], entry["value"]
+
+    def compact(self, manifest_path: str) -> Dict[str, int]:
+        """Merge all shards into one manifest.json (the generate_manifest format).
+        Streams the shards twice, statements then blobs, so only the CIDs are held in memory."""
+        counts = {"statement": 0, "blob": 0}
+        tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            out.write('{"version":%s,"contexts":%s' % (
+                json.dumps(self.index["manifest_version"]),
+                json.dumps(self.index["contexts"], separators=(",", ":"))))
+            for kind, section in (("statement", "statements"), ("blob", "blobs")):
+                out.write(',"%s":{' % section)
+                seen = set()
+                for entry_kind, cid, value in self.iter_entries():
+                    if entry_kind != kind or cid in seen:
+                        continue
+                    out.write(("," if seen else "") + json.dumps(cid) + ":" + json.dumps(value, separators=(",", ":")))
+                    seen.add(cid)
+                out.write("}")
+                counts[kind] = len(seen)
+            out.write("}")
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, manifest_path)
+        return {"statements": counts["statement"], "blobs": counts["blob"], "shards": len(self.shards)}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="incremental, sharded manifest export")
+    parser.add_argument("--dir", default="manifest.d", help="shard directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("export", help="write statements/blobs added since the last export as a new shard")
+    p.add_argument("--store", default=".eqty_sdk/store")
+    p.add_argument("--contexts-from", help="full manifest.json to copy the JSON-LD contexts from")
+    p = sub.add_parser("compact", help="merge the shards into a single manifest.json")
+    p.add_argument("-o", "--output", default="manifest.json")
+    sub.add_parser("status", help="shards and exported entries")
+    args = parser.parse_args()
+
+    sharded = ShardedManifest(args.dir)
+    if args.command == "export":
+        if args.contexts_from:
+            sharded.seed_contexts(args.contexts_from)
+        shard = sharded.export(args.store)
+        print(json.dumps(shard) if shard else "nothing new since the last export")
+    elif args.command == "compact":
+        if sharded.needs_contexts:
+            print("warning: no contexts recorded, run export --contexts-from <manifest.json> first")
+        print(json.dumps(sharded.compact(args.output)))
+    else:
+        for shard in sharded.shards:
+            print(f"{shard['file']}  {shard['statements']:>8} statements {shard['blobs']:>7} blobs  {shard['bytes']:>12,} bytes")
+        print(f"exported entries: {len(sharded.exported)}")
@@ -0,0 +1,528 @@
+import base64
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from manifest_index import iter_manifest
+
+# offline manifest verification, parallel and incremental
+#
+#   python manifest_verify.py manifest.json [--workers 4] [--cache .fr_verify_cache.sqlite] [-o report.json]
+#
+# checks, per manifest entry:
+#   statement  the urn:cid is recomputed: blake3 over the URDNA2015 n-quads of the
+#              statement without its @id (multicodec 0xb403)
+#   signature  CredentialRegistration proofs (Ed25519Signature2018, detached JWS with
+#              b64=false) are checked against the issuer's did:key, over
+#              sha256(canonical proof options) + sha256(canonical credential)
+#   binding    every other statement must be the credentialSubject of a
+#              CredentialRegistration whose signature verifies, and its registeredBy /
+#              operatedBy must be that credential's issuer. an unsigned statement with
+#              a correct CID is a failure, not a pass
+#   blob       blob CIDs are recomputed: json-jcs (0xb601) hashes the canonical JSON,
+#              raw (0x55, e.g. sha256_to_content_id) hashes the bytes as stored
+#   context    JSON-LD contexts are read from the manifest, so nothing is fetched, but
+#              each one must match a pinned sha256 of its canonical JSON: a tampered
+#              context could redefine terms (swap input and output) without changing
+#              a statement's n-quads. unpinned contexts are not loaded at all
+#
+# entries are checked in chunks on a process pool. successes are remembered in a
+# SQLite cache keyed by (CID, sha256 of the entry as it was checked), so re-verifying a
+# grown manifest only checks what is new, and an entry whose content changed under a
+# known CID is checked again. the cache records the verified issuer as the signer,
+# never the DID a statement claims. bindings are cheap and are checked on every run,
+# cached or not, so a credential removed from the manifest is noticed.
+# pyld (canonicalization), rfc8785 (JCS), blake3 and cryptography (Ed25519) are
+# optional: checks whose library is missing are reported as skipped rather than passed
+
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+try:
+    from pyld import jsonld
+except ImportError:
+    jsonld = None
+try:
+    import rfc8785
+except ImportError:
+    rfc8785 = None
+try:
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+except ImportError:
+    Ed25519PublicKey = None
+
+CHUNK_SIZE = 256
+CACHE_PATH = os.environ.get("FR_VERIFY_CACHE", ".fr_verify_cache.sqlite")
+
+# sha256 of the canonical JSON of each context the SDK writes into manifests
+PINNED_CONTEXTS = {
+    "https://w3id.org/security/v1": "d87de2ce3ce407bcac481f8af31e211e54beb5cbd7dd459826ed0502302ee234",
+    "https://w3id.org/security/v2": "38a9ef19cf3a75bf856202bd1ed4cbd55c985ad4a809eb7f4ef584ba9d51dc90",
+    "https://www.w3.org/ns/credentials/v2": "3dc3698b1085678a9ea97cb99ca92e486721f93b733b9c7281146d2ee535b3db",
+    "urn:cid:bafkr4iagb4u7jqlwqrftw4mn3l634wmgatmpvvzqgntgxaaerzljhggvdu":
+        "0ed5be9969eff67d92a9771444db41588686e2d389384e546f64ff292e1454b6",
+    "urn:cid:bafkr4iegfox4fmrwmjwyhnmc4rxegbzeosob5iom3tb6pejhzbekw4xk6y":
+        "f4aa51ae163410e3286f124a50ebd9870163012300a07bd516a9fee1d4d6b1f9",
+}
+
+CODEC_RAW = 0x55
+CODEC_JSON_JCS = 0xB601
+CODEC_RDFC = 0xB403
+HASH_SHA2_256 = 0x12
+HASH_BLAKE3 = 0x1E
+ED25519_PUB = b"\xed\x01"
+
+B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_B58_INDEX = {c: i for i, c in enumerate(B58_ALPHABET)}
+
+_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS verified_entries (
+    cid     TEXT NOT NULL,
+    digest  TEXT NOT NULL,
+    signer  TEXT NOT NULL,
+    checked REAL NOT NULL,
+    PRIMARY KEY (cid, digest)
+) WITHOUT ROWID;
+"""
+
+
+class VerifyError(Exception):
+    pass
+
+
+class Skipped(Exception):
+    pass
+
+
+# -- CIDs
+
+def _b58decode(text: str) -> bytes:
+    n = 0
+    for c in text:
+        n = n * 58 + _B58_INDEX[c]
+    pad = len(text) - len(text.lstrip("1"))
+    return b"\x00" * pad + n.to_bytes((n.bit_length() + 7) // 8, "big")
+
+
+def _varint(data: bytes, i: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[i]
+        value |= (byte & 0x7F) << shift
+        i += 1
+        shift += 7
+        if byte < 0x80:
+            return value, i
+
+
+def parse_cid(cid: str) -> Tuple[int, int, bytes]:
+    """(codec, multihash code, digest) of a CIDv1 in base32 ('b...') or base58btc ('z...')."""
+    if cid.startswith("urn:cid:"):
+        cid = cid[len("urn:cid:"):]
+    if cid.startswith("b"):
+        body = cid[1:].upper()
+        data = base64.b32decode(body + "=" * (-len(body) % 8))
+    elif cid.startswith("z"):
+        data = _b58decode(cid[1:])
+    else:
+        raise VerifyError(f"unsupported multibase {cid[:1]!r}")
+    version, i = _varint(data, 0)
+    if version != 1:
+        raise VerifyError(f"unsupported CID version {version}")
+    codec, i = _varint(data, i)
+    code, i = _varint(data, i)
+    length, i = _varint(data, i)
+    return codec, code, data[i:i + length]
+
+
+def _hash(code: int, data: bytes) -> bytes:
+    if code == HASH_SHA2_256:
+        return hashlib.sha256(data).digest()
+    if code == HASH_BLAKE3:
+        if blake3 is None:
+            raise Skipped("blake3 not installed")
+        return blake3.blake3(data).digest()
+    raise Skipped(f"unsupported multihash 0x{code:x}")
+
+
+# RFC 8785: keys sorted by UTF-16 code units, numbers written the way ECMAScript
+# writes IEEE doubles (1.0 -> 1, 1e21 -> 1e+21); json.dumps(sort_keys=True) is neither
+def _jcs(value) -> bytes:
+    if rfc8785 is None:
+        raise Skipped("rfc8785 not installed")
+    return rfc8785.dumps(value)
+
+
+# -- worker side
+
+_CONTEXTS: Dict[str, object] = {}
+
+
+def _init_worker(contexts: Dict[str, object]) -> None:
+    _CONTEXTS.clear()
+    _CONTEXTS.update(contexts)
+    if jsonld is not None:
+        jsonld.set_document_loader(_load_context)
+
+
+def _load_context(url, options=None):
+    if url not in _CONTEXTS:
+        raise jsonld.JsonLdError(f"context {url} is not in the manifest", "jsonld.LoadDocumentError")
+    return {"contextUrl": None, "documentUrl": url, "document": _CONTEXTS[url]}
+
+
+def _canonical(document: dict) -> bytes:
+    if jsonld is None:
+        raise Skipped("pyld not installed")
+    return jsonld.normalize(document, {"algorithm": "URDNA2015", "format": "application/n-quads"}).encode("utf-8")
+
+
+def check_statement(cid: str, statement: dict) -> Optional[str]:
+    """Raise unless cid is the content ID of statement. Returns a warning, if any."""
+    codec, code, digest = parse_cid(cid)
+    if codec != CODEC_RDFC:
+        raise VerifyError(f"unexpected statement codec 0x{codec:x}")
+    body = {k: v for k, v in statement.items() if k != "@id"}
+    if _hash(code, _canonical(body)) == digest:
+        return None
+    if statement.get("@type") == "DidRegistration":
+        # manifests export DidRegistration with did and timestamp in each other's fields;
+        # the CID was computed before the swap
+        body["did"], body["timestamp"] = body.get("timestamp"), body.get("did")
+        if _hash(code, _canonical(body)) == digest:
+            return "did and timestamp fields are swapped"
+    raise VerifyError("statement CID does not match its content")
+
+
+def _public_key(verification_method: str) -> bytes:
+    did = verification_method.split("#", 1)[0]
+    if not did.startswith("did:key:z"):
+        raise VerifyError(f"unsupported verification method {verification_method}")
+    key = _b58decode(did[len("did:key:z"):])
+    if not key.startswith(ED25519_PUB) or len(key) != 34:
+        raise VerifyError("did:key is not an Ed25519 key")
+    return key[2:]
+
+
+def check_signature(statement: dict) -> str:
+    """Raise unless the credential's proof verifies. Returns the issuer DID."""
+    if Ed25519PublicKey is None:
+        raise Skipped("cryptography not installed")
+    credential = dict(statement["credential"])
+    proof = dict(credential.pop("proof"))
+    if proof.get("type") != "Ed25519Signature2018":
+        raise Skipped(f"unsupported proof type {proof.get('type')}")
+    header, _, signature = proof.pop("jws").split(".")
+    if json.loads(base64.urlsafe_b64decode(header + "=" * (-len(header) % 4))).get("b64") is not False:
+        raise VerifyError("only detached b64=false JWS proofs are supported")
+    issuer = credential.get("issuer")
+    issuer = issuer.get("id") if isinstance(issuer, dict) else issuer
+    if not proof.get("verificationMethod", "").startswith(f"{issuer}#"):
+        raise VerifyError("proof is not made with the issuer's key")
+    if statement.get("registeredBy") not in (None, issuer):
+        raise VerifyError("registeredBy is not the credential's issuer")
+
+    proof["@context"] = credential["@context"]
+    payload = hashlib.sha256(_canonical(proof)).digest() + hashlib.sha256(_canonical(credential)).digest()
+    try:
+        Ed25519PublicKey.from_public_bytes(_public_key(proof["verificationMethod"])).verify(
+            base64.urlsafe_b64decode(signature + "=" * (-len(signature) % 4)), header.encode("ascii") + b"." + payload)
+    except InvalidSignature:
+        raise VerifyError("signature does not verify")
+    return issuer
+
+
+def check_binding(claimed: Tuple[str, ...], issuers: Iterable[str], unverified: bool = False) -> str:
+    """Raise unless a verified issuer signs the statement and is every DID it claims
+    (registeredBy, operatedBy). Returns that issuer."""
+    for issuer in sorted(issuers):
+        if all(did == issuer for did in claimed):
+            return issuer
+    if issuers:
+        raise VerifyError(f"signed by {', '.join(sorted(issuers))} but registeredBy/operatedBy is {', '.join(claimed)}")
+    if unverified:
+        raise Skipped("the credential for this statement could not be verified")
+    raise VerifyError("no verified credential signs this statement")
+
+
+def check_context(url: str, document, pins: Dict[str, str]) -> None:
+    if url not in pins:
+        raise VerifyError("context is not pinned")
+    if hashlib.sha256(_jcs(document)).hexdigest() != pins[url]:
+        raise VerifyError("context does not match its pinned digest")
+
+
+def check_blob(cid: str, data: str) -> int:
+    """Raise unless cid is the content ID of the base64 blob. Returns its size."""
+    raw = base64.b64decode(data, validate=True)
+    codec, code, digest = parse_cid(cid)
+    if codec == CODEC_JSON_JCS:
+        # JCS reads every number as a double, integers too
+        content = _jcs(json.loads(raw, parse_int=float))
+    elif codec == CODEC_RAW:
+        content = raw
+    else:
+        raise Skipped(f"unsupported blob codec 0x{codec:x}")
+    if _hash(code, content) != digest:
+        raise VerifyError("blob CID does not match its content")
+    return len(raw)
+
+
+def _check(check: str, fn, *args) -> dict:
+    try:
+        return {"check": check, "status": "ok", "value": fn(*args)}
+    except Skipped as e:
+        return {"check": check, "status": "skipped", "error": str(e)}
+    except Exception as e:
+        return {"check": check, "status": "failed", "error": f"{type(e).__name__}: {e}"}
+
+
+def verify_chunk(entries: List[tuple]) -> List[dict]:
+    """Check (section, cid, value, digest) entries; one result per entry. A credential's
+    signature check returns its verified issuer."""
+    results = []
+    for section, cid, value, digest in entries:
+        if section == "blobs":
+            checks = [_check("blob", check_blob, cid, value)]
+        else:
+            checks = [_check("statement", check_statement, cid, value)]
+            if value.get("@type") == "CredentialRegistration":
+                checks.append(_check("signature", check_signature, value))
+        results.append({"cid": cid, "section": section, "digest": digest, "checks": checks})
+    return results
+
+
+# -- coordinator side
+
+def _digest(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def _subject(value) -> Optional[str]:
+    subject = (value.get("credential") or {}).get("credentialSubject")
+    return subject.get("id") if isinstance(subject, dict) else subject
+
+
+class VerifyCache:
+    def __init__(self, path: str = CACHE_PATH):
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.executescript(_CACHE_SCHEMA)
+
+    def known(self, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], str]:
+        """(cid, digest) keys that were verified before -> their verified signer."""
+        found = {}
+        for i in range(0, len(keys), 400):
+            chunk = keys[i:i + 400]
+            query = "SELECT cid, digest, signer FROM verified_entries WHERE " + \
+                " OR ".join(["(cid = ? AND digest = ?)"] * len(chunk))
+            found.update(((cid, digest), signer) for cid, digest, signer in
+                         self.db.execute(query, [v for key in chunk for v in key]))
+        return found
+
+    def add(self, entries: List[Tuple[str, str, str]]) -> None:
+        """Record (cid, digest, verified signer) entries."""
+        now = time.time()
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO verified_entries VALUES (?, ?, ?, ?)",
+                                [(*entry, now) for entry in entries])
+
+
+def _chunks(entries: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(entries)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def verify_manifest(manifest_path: str, workers: Optional[int] = None, cache: Optional[VerifyCache] = None,
+                    chunk_size: int = CHUNK_SIZE, context_pins: Optional[Dict[str, str]] = None) -> dict:
+    """Verify every statement and blob of a manifest; returns the report dict.
+    workers=0 checks in this process (no pool). context_pins defaults to PINNED_CONTEXTS."""
+    workers = os.cpu_count() or 1 if workers is None else workers
+    pins = PINNED_CONTEXTS if context_pins is None else context_pins
+    start = time.perf_counter()
+    contexts: Dict[str, object] = {}
+    counts = {"statements": 0, "blobs": 0, "cached": 0, "checked": 0}
+    checks: Dict[str, Dict[str, int]] = {}
+    failures, warnings, skipped = [], [], {}
+    blob_bytes = 0
+
+    credentials: Dict[str, Optional[str]] = {}      # credential CID -> subject CID
+    claims: Dict[str, tuple] = {}                   # other statement CID -> (claimed DIDs, digest)
+    issuers: Dict[str, str] = {}                    # credential CID -> verified issuer
+    unverifiable = set()                            # credentials whose signature check was skipped
+    content_ok = set()                              # statements whose CID checked out (or was cached)
+    cached = set()
+
+    def tally(cid: str, check: dict) -> bool:
+        checks.setdefault(check["check"], {"ok": 0, "failed": 0, "skipped": 0})[check["status"]] += 1
+        if check["status"] == "failed":
+            failures.append({"cid": cid, "check": check["check"], "error": check["error"]})
+        elif check["status"] == "skipped":
+            skipped.setdefault(check["check"], check["error"])
+        return check["status"] == "ok"
+
+    def pending_entries():
+        for section, key, value in iter_manifest(manifest_path):
+            if section == "contexts":
+                if tally(key, _check("context", check_context, key, value, pins)):
+                    contexts[key] = value
+            elif section in ("statements", "blobs"):
+                counts[section] += 1
+                digest = _digest(value)
+                if section == "statements":
+                    if value.get("@type") == "CredentialRegistration":
+                        credentials[key] = _subject(value)
+                    else:
+                        claims[key] = (tuple(v for v in (value.get("registeredBy"), value.get("operatedBy")) if v),
+                                       digest)
+                yield section, key, value, digest
+
+    def uncached(chunks):
+        for chunk in chunks:
+            if cache is not None:
+                known = cache.known([(cid, digest) for _, cid, _, digest in chunk])
+                counts["cached"] += len(known)
+                for (cid, _), signer in known.items():
+                    cached.add(cid)
+                    if cid in credentials:
+                        issuers[cid] = signer
+                    elif cid in claims:
+                        content_ok.add(cid)
+                chunk = [entry for entry in chunk if (entry[1], entry[3]) not in known]
+            if chunk:
+                counts["checked"] += len(chunk)
+                yield chunk
+
+    def collect(results):
+        nonlocal blob_bytes
+        passed = []
+        for result in results:
+            cid = result["cid"]
+            ok = all([tally(cid, check) for check in result["checks"]])
+            for check in result["checks"]:
+                if check["status"] == "skipped" and check["check"] == "signature":
+                    unverifiable.add(cid)
+                elif check["status"] != "ok":
+                    continue
+                elif check["check"] == "blob":
+                    blob_bytes += check["value"]
+                elif check["check"] == "statement" and check["value"]:
+                    warnings.append({"cid": cid, "warning": check["value"]})
+            if not ok:
+                continue
+            if result["section"] == "blobs":
+                passed.append((cid, result["digest"], ""))
+            elif cid in credentials:
+                issuers[cid] = result["checks"][-1]["value"]
+                passed.append((cid, result["digest"], issuers[cid]))
+            else:
+                content_ok.add(cid)     # cached once its binding is checked
+        if cache is not None and passed:
+            cache.add(passed)
+
+    # the SDK writes contexts before statements, so the pool can start at the first statement
+    chunks = uncached(_chunks(pending_entries(), chunk_size))
+    if workers == 0:
+        first = next(chunks, None)
+        _init_worker(contexts)
+        for chunk in ([first] if first else []):
+            collect(verify_chunk(chunk))
+        for chunk in chunks:
+            collect(verify_chunk(chunk))
+    else:
+        first = next(chunks, None)
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(contexts,)) as pool:
+            in_flight = set()
+            for chunk in ([first] if first else []):
+                in_flight.add(pool.submit(verify_chunk, chunk))
+            for chunk in chunks:
+                if len(in_flight) >= workers * 4:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(future.result())
+                in_flight.add(pool.submit(verify_chunk, chunk))
+            for future in in_flight:
+                collect(future.result())
+
+    # every statement other than a credential needs a verified credential over it
+    signed_by: Dict[str, set] = {}
+    unverified_subjects = set()
+    for cid, subject in credentials.items():
+        if cid in issuers:
+            signed_by.setdefault(subject, set()).add(issuers[cid])
+        elif cid in unverifiable:
+            unverified_subjects.add(subject)
+    bound = []
+    for cid, (claimed, digest) in claims.items():
+        if cid not in content_ok:
+            continue
+        check = _check("binding", check_binding, claimed, signed_by.get(cid, ()), cid in unverified_subjects)
+        if tally(cid, check) and cid not in cached:
+            bound.append((cid, digest, check["value"]))
+    if cache is not None and bound:
+        cache.add(bound)
+
+    seconds = time.perf_counter() - start
+    signatures = checks.get("signature", {}).get("ok", 0)
+    return {
+        "manifest": manifest_path,
+        "passed": not failures and not skipped,
+        "statements": counts["statements"],
+        "blobs": counts["blobs"],
+        "cached": counts["cached"],
+        "checked": counts["checked"],
+        "checks": checks,
+        "failures": failures,
+        "warnings": warnings,
+        "skipped": skipped,
+        "workers": workers,
+        "seconds": round(seconds, 3),
+        "throughput": {
+            "entries_per_sec": round(counts["checked"] / seconds, 1) if seconds else None,
+            "signatures_per_sec": round(signatures / seconds, 1) if seconds else None,
+            "blob_mb_per_sec": round(blob_bytes / 1e6 / seconds, 2) if seconds else None,
+        },
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="verify a manifest.json offline")
+    parser.add_argument("manifest")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size, 0 = in process (default: CPUs)")
+    parser.add_argument("--cache", default=CACHE_PATH, help='verified entry cache, "" to disable')
+    parser.add_argument("--context-pins", help="JSON file of extra context URL -> sha256 of its canonical JSON")
+    parser.add_argument("-o", "--output", help="write the JSON report here")
+    args = parser.parse_args()
+
+    pins = dict(PINNED_CONTEXTS)
+    if args.context_pins:
+        with open(args.context_pins, encoding="utf-8") as f:
+            pins.update(json.load(f))
+    report = verify_manifest(args.manifest, args.workers, VerifyCache(args.cache) if args.cache else None,
+                             context_pins=pins)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    for failure in report["failures"][:20]:
+        print(f"FAIL {failure['check']:<10} {failure['cid']}  {failure['error']}")
+    for warning in report["warnings"][:20]:
+        print(f"warn {warning['cid']}  {warning['warning']}")
+    for check, reason in report["skipped"].items():
+        print(f"skipped {check}: {reason}")
+    print(f"{'PASS' if report['passed'] else 'FAIL'}: {report['statements']} statements, {report['blobs']} blobs, "
+          f"{report['checked']} checked, {report['cached']} cached, {len(report['failures'])} failed "
+          f"in {report['seconds']} s ({report['throughput']['entries_per_sec']} entries/s)")
+    sys.exit(0 if report["passed"] else 1)
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+# Merkle tree over the paragraphs of an extracted issue
+#
+#   leaf = sha256(0x00 || paragraph utf-8)
+#   node = sha256(0x01 || left || right)        (domain separated, as in RFC 6962)
+#
+# an unpaired node at the end of a level is carried up unchanged. a paragraph can be
+# verified against the root with log2(n) sibling hashes, and a correction only
+# re-hashes the changed leaves and their ancestors. hashing a full issue takes ~10 ms,
+# less than starting a process pool, so leaves are hashed serially
+
+
+def leaf_hash(paragraph: str) -> bytes:
+    return hashlib.sha256(b"\x00" + paragraph.encode("utf-8")).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def hash_paragraphs(paragraphs: Sequence[str]) -> List[bytes]:
+    return [leaf_hash(p) for p in paragraphs]
+
+
+# text.split("\n\n") over a file, reading it in chunks. the unsplit tail is carried
+# into the next chunk, so a separator across a chunk boundary splits the same way
+def iter_file_paragraphs(path: str, chunk_chars: int = 1 << 20) -> Iterator[str]:
+    tail = ""
+    with open(path, encoding="utf-8") as f:
+        for chunk in iter(lambda: f.read(chunk_chars), ""):
+            *paragraphs, tail = (tail + chunk).split("\n\n")
+            yield from paragraphs
+    yield tail
+
+
+def _parent_level(level: List[bytes]) -> List[bytes]:
+    parents = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+    if len(level) % 2:
+        parents.append(level[-1])
+    return parents
+
+
+class MerkleTree:
+    def __init__(self, leaves: List[bytes]):
+        self.levels: List[List[bytes]] = [list(leaves)]
+        while len(self.levels[-1]) > 1:
+            self.levels.append(_parent_level(self.levels[-1]))
+
+    @classmethod
+    def from_paragraphs(cls, paragraphs: Sequence[str]) -> "MerkleTree":
+        return cls(hash_paragraphs(paragraphs))
+
+    @classmethod
+    def from_text(cls, text: str) -> "MerkleTree":
+        return cls.from_paragraphs(text.split("\n\n"))
+
+    # same tree as from_text(open(path).read()), hashed paragraph by paragraph as the
+    # file is read, so only the leaf hashes are kept
+    @classmethod
+    def from_file(cls, path: str) -> "MerkleTree":
+        return cls([leaf_hash(p) for p in iter_file_paragraphs(path)])
+
+    @property
+    def leaves(self) -> List[bytes]:
+        return self.levels[0]
+
+    @property
+    def root(self) -> str:
+        if not self.leaves:
+            return hashlib.sha256(b"").hexdigest()
+        return self.levels[-1][0].hex()
+
+    # sibling hashes from leaf to root; side says where the sibling sits
+    def proof(self, index: int) -> List[Tuple[str, str]]:
+        path = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                path.append(("L" if sibling < index else "R", level[sibling].hex()))
+            index //= 2
+        return path
+
+    # re-hash only the changed leaves and the nodes above them
+    def update(self, changes: Dict[int, str]) -> int:
+        dirty = set()
+        for index, paragraph in changes.items():
+            self.levels[0][index] = leaf_hash(paragraph)
+            dirty.add(index)
+        rehashed = len(dirty)
+
+        for depth in range(1, len(self.levels)):
+            below, level = self.levels[depth - 1], self.levels[depth]
+            parents = set()
+            for index in dirty:
+                parent = index // 2
+                left = 2 * parent
+                level[parent] = node_hash(below[left], below[left + 1]) if left + 1 < len(below) else below[left]
+                parents.add(parent)
+            rehashed += len(parents)
+            dirty = parents
+        return rehashed
+
+    def to_dict(self, leaves: bool = True) -> dict:
+        return {
+            "algorithm": "sha256",
+            "leaf_prefix": "00",
+            "node_prefix": "01",
+            "root": self.root,
+            "leaves": [h.hex() for h in self.leaves] if leaves else [],
+        }
+
+    # json.dumps(self.to_dict()) written leaf by leaf, so the hex copy of the leaves is
+    # never built in memory
+    def write_json(self, path: str) -> None:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self.to_dict(leaves=False))[:-2])   # up to "leaves": [
+            for i, h in enumerate(self.leaves):
+                f.write(f'{", " if i else ""}"{h.hex()}"')
+            f.write("]}")
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MerkleTree":
+        return cls([bytes.fromhex(h) for h in data["leaves"]])
+
+
+def verify_proof(paragraph: str, proof: List[Tuple[str, str]], root: str) -> bool:
+    h = leaf_hash(paragraph)
+    for side, sibling in proof:
+        sibling = bytes.fromhex(sibling)
+        h = node_hash(sibling, h) if side == "L" else node_hash(h, sibling)
+    return h.hex() == root
+
+
+# tree for new_paragraphs, re-hashing only what differs from the old version.
+# same paragraph count -> in-place updates; otherwise the unchanged prefix and
+# suffix leaves are reused and only the middle is hashed
+def rehash_changed(tree: MerkleTree, old: Sequence[str], new: Sequence[str]) -> Tuple[MerkleTree, int]:
+    if len(old) == len(new):
+        changes = {i: p for i, (o, p) in enumerate(zip(old, new)) if o != p}
+        tree.update(changes)
+        return tree, len(changes)
+
+    prefix = 0
+    while prefix < min(len(old), len(new)) and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while (suffix < min(len(old), len(new)) - prefix
+           and old[len(old) - 1 - suffix] == new[len(new) - 1 - suffix]):
+        suffix += 1
+
+    middle = hash_paragraphs(new[prefix:len(new) - suffix])
+    leaves = tree.leaves[:prefix] + middle + tree.leaves[len(old) - suffix:]
+    return MerkleTree(leaves), len(middle)
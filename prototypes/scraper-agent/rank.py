@@ -0,0 +1,149 @@
+import re
+import time
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+# extractive pre-ranking: choose which paragraphs of an issue the abstractive model reads
+#
+# paragraphs become L2-normalised TF-IDF rows of one sparse term matrix (kept as
+# COO arrays: row, term, weight per non-zero), the mean of the rows stands for the issue
+# as a whole, and a paragraph's score is its cosine similarity with that centroid,
+# scaled by (1 - c)^2 where c is the share of its terms that occur in COMMON_DF or more
+# of the scored paragraphs. without that the centroid favours issue-wide boilerplate
+# (Paperwork Reduction Act and comment-submission paragraphs repeat in every notice and
+# are made of the issue's commonest terms).
+# splitting paragraphs into words (and interning them) is the only Python loop;
+# counting, weighting, normalisation and scoring are each a NumPy pass over the non-zeros.
+# select() keeps the best-scoring paragraphs that fit a token budget, minus near
+# duplicates of ones already kept, and returns them in document order. if that keeps
+# nothing (no paragraph reaches MIN_WORDS, or every scored one is over the budget) it
+# falls back to the leading paragraphs that fit, or failing that to all of them, so the
+# model never gets an empty input; "fallback" in the result says which.
+# paragraph indices are positions in text.split("\n\n"), the same as the leaves of the
+# paragraph Merkle tree (merkle.py), so each selected paragraph can be proven against
+# the registered full text
+
+MIN_WORDS = 8       # headings, signatures, page furniture: never worth a model token
+MAX_SIMILARITY = 0.5     # 0.8 let reworded copies of the same boilerplate through
+COMMON_DF = 0.02         # a term in this share of the scored paragraphs is common
+METHOD = "tfidf_centroid_common_penalty"
+WORD = re.compile(r"[a-z][a-z0-9'-]{2,}")
+STOPWORDS = frozenset("""
+    the and for are was were that this with from have has had not but all any can may
+    its their there these those which who whom will would shall should been being into
+    such than then also under upon other each more most only same very our your his her
+    they them what when where while about above after before below between during
+""".split())
+
+
+def _tfidf(paragraphs: Sequence[str]):
+    """(rows, terms, weights, vocabulary size, document frequencies): the non-zeros of the
+    L2-normalised TF-IDF matrix, sorted by row, and the number of scored paragraphs each
+    term occurs in. Paragraphs under MIN_WORDS words have no non-zeros."""
+    words = [[w for w in WORD.findall(p.lower()) if w not in STOPWORDS] for p in paragraphs]
+    lengths = np.fromiter((len(w) for w in words), dtype=np.int64, count=len(words))
+    lengths[lengths < MIN_WORDS] = 0
+    if not lengths.sum():
+        return np.zeros(0, np.int64), np.zeros(0, np.int64), np.zeros(0), 0, np.zeros(0, np.int64)
+
+    # interning words through a dict is several times faster than np.unique on strings
+    vocabulary: Dict[str, int] = {}
+    terms = np.fromiter((vocabulary.setdefault(w, len(vocabulary)) for ws in words if len(ws) >= MIN_WORDS for w in ws),
+                        dtype=np.int64, count=int(lengths.sum()))
+    size = len(vocabulary)
+    rows = np.repeat(np.arange(len(paragraphs)), lengths)
+    # (row, term) pairs -> counts, one entry per non-zero of the term matrix
+    keys, counts = np.unique(rows * size + terms, return_counts=True)
+    rows, terms = keys // size, keys % size
+
+    n_docs = int(np.count_nonzero(lengths))
+    df = np.bincount(terms, minlength=size)
+    weights = (1 + np.log(counts)) * (np.log((1 + n_docs) / (1 + df[terms])) + 1)
+    norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=len(paragraphs)))
+    return rows, terms, weights / norms[rows], size, df
+
+
+def _centroid_scores(rows, terms, weights, size: int, df, n: int) -> np.ndarray:
+    if not size:
+        return np.zeros(n)
+    centroid = np.bincount(terms, weights=weights, minlength=size)
+    centroid /= np.linalg.norm(centroid)
+    similarity = np.bincount(rows, weights=weights * centroid[terms], minlength=n)
+    distinct = np.bincount(rows, minlength=n)
+    common = df >= COMMON_DF * np.count_nonzero(distinct)
+    share = np.bincount(rows, weights=common[terms], minlength=n) / np.maximum(distinct, 1)
+    return similarity * (1 - share) ** 2
+
+
+def score_paragraphs(paragraphs: Sequence[str]) -> np.ndarray:
+    """TF-IDF centroid similarity of every paragraph, down-weighted by its share of common
+    terms; 0 for paragraphs under MIN_WORDS words."""
+    return _centroid_scores(*_tfidf(paragraphs), len(paragraphs))
+
+
+def select(paragraphs: Sequence[str], token_counts: Sequence[int], budget: int,
+           max_similarity: float = MAX_SIMILARITY) -> Dict:
+    """Score the paragraphs and keep the best ones that fit in budget tokens, skipping any
+    whose cosine similarity with one already kept is max_similarity or more (notices repeat
+    boilerplate). Returns the selection (document order, with scores and token counts) and totals."""
+    start = time.perf_counter()
+    rows, terms, weights, size, df = _tfidf(paragraphs)
+    scores = _centroid_scores(rows, terms, weights, size, df, len(paragraphs))
+    bounds = np.searchsorted(rows, np.arange(len(paragraphs) + 1))
+    tokens = np.asarray(token_counts, dtype=np.int64)
+
+    chosen, kept, used, redundant = [], np.zeros((0, size)), 0, 0
+    for i in np.argsort(-scores, kind="stable"):
+        if scores[i] <= 0:
+            break
+        if used + tokens[i] > budget:
+            continue
+        row = slice(bounds[i], bounds[i + 1])
+        if len(chosen) and (kept[:, terms[row]] @ weights[row]).max() >= max_similarity:
+            redundant += 1
+            continue
+        vector = np.zeros((1, size))
+        vector[0, terms[row]] = weights[row]
+        kept = np.vstack([kept, vector])
+        chosen.append(int(i))
+        used += int(tokens[i])
+    fallback = None
+    if not chosen:
+        fallback = {"mode": "prefix", "reason": "no paragraph scored" if not scores.any()
+                    else "no scored paragraph fits the budget"}
+        for i in range(len(paragraphs)):
+            if not tokens[i]:
+                continue
+            if used + tokens[i] > budget:
+                break
+            chosen.append(i)
+            used += int(tokens[i])
+        if not chosen:
+            fallback["mode"] = "full_text"
+            chosen, used = list(range(len(paragraphs))), int(tokens.sum())
+    chosen.sort()
+    return {
+        "method": METHOD,
+        "budget_tokens": budget,
+        "paragraphs": len(paragraphs),
+        "total_tokens": int(tokens.sum()),
+        "selected_tokens": used,
+        "skipped_redundant": redundant,
+        "fallback": fallback,
+        "selected": [{"index": i, "score": round(float(scores[i]), 4), "tokens": int(tokens[i])} for i in chosen],
+        "seconds": round(time.perf_counter() - start, 4),
+    }
+
+
+def rank_text(text: str, tokenizer, budget: int) -> Dict:
+    """select() over the paragraphs of text, with token counts from the model's tokenizer
+    (one batched call). The model input is the selected paragraphs joined by blank lines."""
+    paragraphs = text.split("\n\n")
+    counts = [len(ids) for ids in tokenizer(paragraphs, add_special_tokens=False)["input_ids"]] if paragraphs else []
+    return select(paragraphs, counts, budget)
+
+
+def model_input(text: str, selected: List[Dict]) -> str:
+    paragraphs = text.split("\n\n")
+    return "\n\n".join(paragraphs[p["index"]] for p in selected)
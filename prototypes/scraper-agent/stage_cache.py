@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import time
+from typing import Dict, Optional
+
+from artifacts import file_digest
+
+# persistent memo table for pure pipeline stages
+#
+#   key    = (stage name, input digest, stage params)  e.g. ("summarize", <text sha256>, {model, max_length, ...})
+#   value  = output file, stored once under objects/<output sha256>
+#
+# entries also remember the Computation CID that first registered the output, so a
+# cache hit can point at the original provenance record instead of inventing a new one.
+# total object size is bounded; least recently used entries are evicted first
+
+DEFAULT_MAX_BYTES = 512 << 20
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key             TEXT PRIMARY KEY,
+    stage           TEXT NOT NULL,
+    input_cid       TEXT NOT NULL,
+    params          TEXT NOT NULL,
+    output_cid      TEXT NOT NULL,
+    size            INTEGER NOT NULL,
+    computation_cid TEXT,
+    created         REAL NOT NULL,
+    last_used       REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_used);
+CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+
+def cache_key(stage: str, input_cid: str, params: Dict) -> str:
+    blob = json.dumps({"stage": stage, "input": input_cid, "params": params}, sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class StageCache:
+    def __init__(self, cache_dir: str = ".fr_stage_cache", max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(cache_dir, "objects"), exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(cache_dir, "index.sqlite"), timeout=30)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(_SCHEMA)
+
+    def object_path(self, output_cid: str) -> str:
+        return os.path.join(self.cache_dir, "objects", output_cid)
+
+    def _count(self, name: str, n: int = 1) -> None:
+        self.db.execute(
+            "INSERT INTO counters VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + ?",
+            (name, n, n),
+        )
+
+    # cached entry for the stage run, or None. a hit refreshes the entry's LRU position
+    def get(self, stage: str, input_cid: str, params: Dict) -> Optional[dict]:
+        key = cache_key(stage, input_cid, params)
+        with self.db:
+            row = self.db.execute("SELECT * FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or not os.path.exists(self.object_path(row["output_cid"])):
+                self._count(f"{stage}.miss")
+                return None
+            self.db.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._count(f"{stage}.hit")
+        return dict(row)
+
+    # store the stage output found at path; returns the new entry
+    def put(self, stage: str, input_cid: str, params: Dict, path: str) -> dict:
+        key = cache_key(stage, input_cid, params)
+        output_cid = file_digest(path)
+        target = self.object_path(output_cid)
+        if not os.path.exists(target):
+            shutil.copyfile(path, target + ".tmp")
+            os.replace(target + ".tmp", target)
+
+        now = time.time()
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, NULL, ?, ?)",
+                (key, stage, input_cid, json.dumps(params, sort_keys=True), output_cid,
+                 os.path.getsize(target), now, now),
+            )
+        self.evict()
+        return {"key": key, "output_cid": output_cid, "computation_cid": None}
+
+    # remember which Computation registered this output
+    def set_computation(self, key: str, computation_cid: str) -> None:
+        with self.db:
+            self.db.execute("UPDATE entries SET computation_cid = ? WHERE key = ?", (computation_cid, key))
+
+    def materialize(self, entry: dict, dest: str) -> str:
+        shutil.copyfile(self.object_path(entry["output_cid"]), dest)
+        return dest
+
+    def _total_bytes(self) -> int:
+        row = self.db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT output_cid, size FROM entries)"
+        ).fetchone()
+        return row[0]
+
+    def evict(self) -> int:
+        evicted = 0
+        with self.db:
+            while self._total_bytes() > self.max_bytes:
+                row = self.db.execute("SELECT key, output_cid FROM entries ORDER BY last_used LIMIT 1").fetchone()
+                if row is None:
+                    break
+                self.db.execute("DELETE FROM entries WHERE key = ?", (row["key"],))
+                shared = self.db.execute(
+                    "SELECT 1 FROM entries WHERE output_cid = ? LIMIT 1", (row["output_cid"],)
+                ).fetchone()
+                if not shared and os.path.exists(self.object_path(row["output_cid"])):
+                    os.remove(self.object_path(row["output_cid"]))
+                evicted += 1
+            if evicted:
+                self._count("evictions", evicted)
+        return evicted
+
+    def stats(self) -> dict:
+        counters = {r["name"]: r["value"] for r in self.db.execute("SELECT name, value FROM counters")}
+        entries = self.db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {"entries": entries, "bytes": self._total_bytes(), "max_bytes": self.max_bytes, **counters}
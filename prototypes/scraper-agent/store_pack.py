@@ -0,0 +1,324 @@
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from manifest_export import scan_store
+
+# packed local integrity store: append-only pack files plus a catalogue, instead of one
+# file per statement / blob under .eqty_sdk/store
+#
+#   .eqty_sdk/store/packs/pack-000001.pack     object bytes, back to back
+#   .eqty_sdk/store/packs/catalogue.sqlite     cid -> (pack, offset, length), input/output refs
+#
+#   python store_pack.py pack      # catalogue loose files into packs (what the SDK writes stays loose until then)
+#   python store_pack.py pack --remove-loose   # ... and delete the loose copies
+#   python store_pack.py gc        # rewrite packs that are mostly removed objects
+#   python store_pack.py unpack    # write everything back as loose files, for SDK tools that scan the store
+#
+# a lookup is one primary-key probe plus one pread; a full scan reads each pack
+# sequentially. pack appends and fsyncs the objects before the catalogue commits and
+# only then deletes the loose files (if asked to), so a crash at any point leaves every
+# object readable from one place or the other. removed objects stay in their pack until gc.
+# the SDK's generate_manifest and ShardedManifest.export only read loose files, so by
+# default pack leaves them in place; export refuses a store whose objects are packed
+# only (packed_only) until it has been unpacked. the default therefore adds the packs
+# and catalogue on top of the loose files: it buys indexed lookups and sequential
+# scans, and costs disk. only --remove-loose cuts the file and inode count
+# (bench_store_pack.py reports both layouts)
+
+PACK_MAX_BYTES = 64 << 20
+GC_LIVE_RATIO = 0.5     # gc rewrites packs with less than this fraction of live bytes
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS packs (
+    id         INTEGER PRIMARY KEY,
+    file       TEXT NOT NULL,
+    bytes      INTEGER NOT NULL,
+    live_bytes INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS objects (
+    cid    TEXT PRIMARY KEY,
+    kind   TEXT NOT NULL,
+    path   TEXT NOT NULL,
+    pack   INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS objects_pack ON objects (pack, offset);
+CREATE TABLE IF NOT EXISTS refs (statement TEXT NOT NULL, role TEXT NOT NULL, target TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS refs_target ON refs (target, role);
+CREATE INDEX IF NOT EXISTS refs_statement ON refs (statement);
+"""
+
+
+class PackedStore:
+    def __init__(self, store_root: str = ".eqty_sdk/store"):
+        self.store_root = store_root
+        self.pack_dir = os.path.join(store_root, "packs")
+        os.makedirs(self.pack_dir, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(self.pack_dir, "catalogue.sqlite"), timeout=30)
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.executescript(_SCHEMA)
+        self._readers: Dict[int, int] = {}
+
+    def close(self) -> None:
+        for fd in self._readers.values():
+            os.close(fd)
+        self._readers.clear()
+        self.db.close()
+
+    def _pack_path(self, pack_id: int) -> str:
+        return os.path.join(self.pack_dir, f"pack-{pack_id:06d}.pack")
+
+    def _read(self, pack_id: int, offset: int, length: int) -> bytes:
+        fd = self._readers.get(pack_id)
+        if fd is None:
+            fd = self._readers[pack_id] = os.open(self._pack_path(pack_id), os.O_RDONLY)
+        return os.pread(fd, length, offset)
+
+    # -- lookups
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM objects").fetchone()[0]
+
+    def __contains__(self, cid: str) -> bool:
+        return self.db.execute("SELECT 1 FROM objects WHERE cid = ?", (cid,)).fetchone() is not None
+
+    def get(self, cid: str) -> Optional[bytes]:
+        """Raw bytes of a statement ("urn:cid:...") or blob (bare CID), or None."""
+        row = self.db.execute("SELECT pack, offset, length FROM objects WHERE cid = ?", (cid,)).fetchone()
+        return self._read(*row) if row else None
+
+    def statement(self, cid: str) -> Optional[dict]:
+        raw = self.get(cid)
+        return json.loads(raw) if raw is not None else None
+
+    def iter_objects(self, kind: Optional[str] = None) -> Iterator[Tuple[str, str, bytes]]:
+        """(kind, cid, bytes) for every packed object, in pack order so reads are sequential."""
+        query = "SELECT kind, cid, pack, offset, length FROM objects"
+        params: tuple = ()
+        if kind:
+            query, params = query + " WHERE kind = ?", (kind,)
+        rows = self.db.execute(query + " ORDER BY pack, offset", params).fetchall()
+        for kind_, cid, pack_id, offset, length in rows:
+            yield kind_, cid, self._read(pack_id, offset, length)
+
+    def producers(self, cid: str) -> List[str]:
+        """Computation statements with cid as an output."""
+        return [s for s, in self.db.execute(
+            "SELECT statement FROM refs WHERE target = ? AND role = 'output' ORDER BY 1", (cid,))]
+
+    def consumers(self, cid: str) -> List[str]:
+        """Computation statements with cid as an input."""
+        return [s for s, in self.db.execute(
+            "SELECT statement FROM refs WHERE target = ? AND role = 'input' ORDER BY 1", (cid,))]
+
+    # -- maintenance
+
+    def _writer(self, size: int) -> Tuple[int, int]:
+        """(pack id, fd) of the pack to append size bytes to, starting a new pack when full."""
+        row = self.db.execute("SELECT id, bytes FROM packs ORDER BY id DESC LIMIT 1").fetchone()
+        if row is None or (row[1] and row[1] + size > PACK_MAX_BYTES):
+            pack_id = (row[0] + 1) if row else 1
+            self.db.execute("INSERT INTO packs VALUES (?, ?, 0, 0)", (pack_id, os.path.basename(self._pack_path(pack_id))))
+        else:
+            pack_id = row[0]
+        return pack_id, os.open(self._pack_path(pack_id), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def _append(self, items: List[Tuple[str, str, str, bytes]]) -> int:
+        """Append (kind, cid, path, bytes) objects and catalogue them in one transaction."""
+        written = 0
+        with self.db:
+            i = 0
+            while i < len(items):
+                pack_id, fd = self._writer(len(items[i][3]))
+                try:
+                    offset = os.fstat(fd).st_size   # past any tail a crashed pack left behind
+                    start, rows, refs = offset, [], []
+                    while i < len(items) and (offset == start or offset + len(items[i][3]) <= PACK_MAX_BYTES):
+                        kind, cid, path, data = items[i]
+                        os.write(fd, data)
+                        rows.append((cid, kind, path, pack_id, offset, len(data)))
+                        if kind == "statement":
+                            refs.extend(_io_refs(cid, data))
+                        offset += len(data)
+                        i += 1
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+                replaced = [r[0] for r in rows]
+                self._forget(replaced)
+                self.db.executemany("INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?, ?, ?)", rows)
+                self.db.executemany("INSERT INTO refs VALUES (?, ?, ?)", refs)
+                self.db.execute("UPDATE packs SET bytes = ?, live_bytes = live_bytes + ? WHERE id = ?",
+                                (offset, offset - start, pack_id))
+                written += len(rows)
+        return written
+
+    def _forget(self, cids: List[str]) -> None:
+        for cid in cids:
+            row = self.db.execute("SELECT pack, length FROM objects WHERE cid = ?", (cid,)).fetchone()
+            if row:
+                self.db.execute("UPDATE packs SET live_bytes = live_bytes - ? WHERE id = ?", (row[1], row[0]))
+                self.db.execute("DELETE FROM objects WHERE cid = ?", (cid,))
+                self.db.execute("DELETE FROM refs WHERE statement = ?", (cid,))
+
+    def remove(self, cids: List[str]) -> None:
+        """Drop objects from the catalogue; their bytes are reclaimed by gc."""
+        with self.db:
+            self._forget(cids)
+
+    def pack(self, older_than: float = 0.0, keep_loose: bool = True, batch_bytes: int = 16 << 20) -> Dict[str, int]:
+        """Copy loose store files last modified more than older_than seconds ago into packs,
+        deleting the loose files unless keep_loose."""
+        cutoff = time.time_ns() - int(older_than * 1e9)
+        stats = {"packed": 0, "already_packed": 0, "bytes": 0}
+        batch, batch_size = [], 0
+
+        def flush():
+            stats["packed"] += self._append(batch)
+            if not keep_loose:
+                for _, _, path, _ in batch:
+                    os.remove(os.path.join(self.store_root, path))
+            del batch[:]
+
+        for kind, cid, path, mtime in scan_store(self.store_root):
+            if mtime > cutoff:
+                continue
+            full_path = os.path.join(self.store_root, path)
+            row = self.db.execute("SELECT length FROM objects WHERE cid = ?", (cid,)).fetchone()
+            if row and row[0] == os.stat(full_path).st_size:
+                # catalogued already (keep_loose, or a crash before the loose file was
+                # deleted); the name is the content's CID, so the size check is enough and a
+                # repeated pack does not re-read the store
+                stats["already_packed"] += 1
+                if not keep_loose:
+                    os.remove(full_path)
+                continue
+            with open(full_path, "rb") as f:
+                data = f.read()
+            batch.append((kind, cid, path, data))
+            batch_size += len(data)
+            stats["bytes"] += len(data)
+            if batch_size >= batch_bytes:
+                flush()
+                batch_size = 0
+        flush()
+        return stats
+
+    def gc(self, live_ratio: float = GC_LIVE_RATIO) -> Dict[str, int]:
+        """Copy the live objects out of sparse packs into the current pack, then delete those
+        packs and any pack files the catalogue does not know about."""
+        stats = {"packs_rewritten": 0, "objects_moved": 0, "bytes_reclaimed": 0}
+        sparse = self.db.execute(
+            "SELECT id, bytes, live_bytes FROM packs WHERE bytes > 0 AND live_bytes < bytes * ? ORDER BY id",
+            (live_ratio,)).fetchall()
+        for pack_id, size, live in sparse:
+            rows = self.db.execute("SELECT kind, cid, path, offset, length FROM objects WHERE pack = ? ORDER BY offset",
+                                   (pack_id,)).fetchall()
+            items = [(kind, cid, path, self._read(pack_id, offset, length)) for kind, cid, path, offset, length in rows]
+            with self.db:
+                # retire the pack first so the moved objects are not appended back into it
+                self.db.execute("UPDATE packs SET bytes = ? WHERE id = ?", (PACK_MAX_BYTES, pack_id))
+            self._append(items)
+            with self.db:
+                self.db.execute("DELETE FROM packs WHERE id = ?", (pack_id,))
+            fd = self._readers.pop(pack_id, None)
+            if fd is not None:
+                os.close(fd)
+            os.remove(self._pack_path(pack_id))
+            stats["packs_rewritten"] += 1
+            stats["objects_moved"] += len(items)
+            stats["bytes_reclaimed"] += size - live
+
+        known = {f for f, in self.db.execute("SELECT file FROM packs")}
+        for name in os.listdir(self.pack_dir):
+            if name.endswith(".pack") and name not in known:
+                stats["bytes_reclaimed"] += os.path.getsize(os.path.join(self.pack_dir, name))
+                os.remove(os.path.join(self.pack_dir, name))
+        return stats
+
+    def unpack(self) -> int:
+        """Write every packed object back to its loose path (packs are left in place)."""
+        written = 0
+        for _, cid, path, pack_id, offset, length in self.db.execute(
+                "SELECT kind, cid, path, pack, offset, length FROM objects ORDER BY pack, offset").fetchall():
+            target = os.path.join(self.store_root, path)
+            if not os.path.exists(target):
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(target, "wb") as f:
+                    f.write(self._read(pack_id, offset, length))
+                written += 1
+        return written
+
+    def packed_only(self) -> int:
+        """Number of packed objects whose loose file is gone."""
+        return sum(1 for path, in self.db.execute("SELECT path FROM objects")
+                   if not os.path.exists(os.path.join(self.store_root, path)))
+
+    def stats(self) -> dict:
+        packs = self.db.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0), COALESCE(SUM(live_bytes), 0) FROM packs").fetchone()
+        return {
+            "objects": len(self),
+            "packs": packs[0],
+            "pack_bytes": packs[1],
+            "live_bytes": packs[2],
+            "by_kind": dict(self.db.execute("SELECT kind, COUNT(*) FROM objects GROUP BY kind")),
+        }
+
+
+def packed_only(store_root: str = ".eqty_sdk/store") -> int:
+    """Objects in the store that only exist in packs, 0 for a store that was never packed.
+    Anything that scans the loose files would leave them out."""
+    if not os.path.exists(os.path.join(store_root, "packs", "catalogue.sqlite")):
+        return 0
+    store = PackedStore(store_root)
+    try:
+        return store.packed_only()
+    finally:
+        store.close()
+
+
+def _io_refs(cid: str, data: bytes) -> Iterator[Tuple[str, str, str]]:
+    if b'"ComputationRegistration"' not in data:
+        return
+    statement = json.loads(data)
+    for role in ("input", "output"):
+        for target in statement.get(role) or ():
+            yield cid, role, target
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="pack the local integrity store")
+    parser.add_argument("--store", default=".eqty_sdk/store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("pack", help="copy loose statement/blob files into packs")
+    p.add_argument("--older-than", type=float, default=0.0, help="only files not modified for this many seconds")
+    p.add_argument("--remove-loose", action="store_true",
+                   help="delete the loose files once packed (export then needs `unpack` first)")
+    p = sub.add_parser("gc", help="rewrite sparse packs and drop unknown pack files")
+    p.add_argument("--live-ratio", type=float, default=GC_LIVE_RATIO)
+    sub.add_parser("unpack", help="restore loose files from the packs")
+    sub.add_parser("stats")
+    p = sub.add_parser("get")
+    p.add_argument("cid")
+    args = parser.parse_args()
+
+    store = PackedStore(args.store)
+    if args.command == "pack":
+        print(json.dumps(store.pack(args.older_than, keep_loose=not args.remove_loose)))
+    elif args.command == "gc":
+        print(json.dumps(store.gc(args.live_ratio)))
+    elif args.command == "unpack":
+        print(f"{store.unpack()} files written")
+    elif args.command == "stats":
+        print(json.dumps(store.stats(), indent=2))
+    else:
+        data = store.get(args.cid)
+        if data is None:
+            raise SystemExit(f"{args.cid} is not packed")
+        print(data.decode("utf-8"))
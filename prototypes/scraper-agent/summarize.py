@@ -0,0 +1,113 @@
+import time
+from typing import Dict, List, Tuple
+
+# map-reduce summarization of a whole issue
+#   map:    split text into token-budgeted chunks on paragraph boundaries and
+#           summarize them in batches
+#   reduce: summarize the joined chunk summaries (again in chunks if they are
+#           still too long) until a single summary is left
+
+MAX_CHUNK_TOKENS = 900       # distilbart reads at most 1024 tokens, leave room for special tokens
+CHUNK_SUMMARY_PARAMS = {"max_length": 120, "min_length": 20}
+
+
+# set torch thread pools. must run before the first forward pass,
+# torch refuses to change inter-op threads once it has been used
+def configure_threads(intra_op: int = None, inter_op: int = None) -> None:
+    import torch
+
+    if intra_op:
+        torch.set_num_threads(intra_op)
+    if inter_op:
+        try:
+            torch.set_num_interop_threads(inter_op)
+        except RuntimeError:
+            pass  # already initialised, keep whatever torch started with
+
+
+# pack paragraphs into chunks of at most max_tokens tokens. paragraphs longer than
+# the budget on their own are cut into max_tokens windows
+def chunk_paragraphs(paragraphs: List[str], tokenizer, max_tokens: int = MAX_CHUNK_TOKENS) -> List[str]:
+    paragraphs = [p for p in paragraphs if p.strip()]
+    if not paragraphs:
+        return []
+    # one batched tokenizer call instead of one per paragraph
+    token_ids = tokenizer(paragraphs, add_special_tokens=False)["input_ids"]
+
+    chunks, current, current_len = [], [], 0
+    for paragraph, ids in zip(paragraphs, token_ids):
+        if len(ids) > max_tokens:
+            if current:
+                chunks.append("\n\n".join(current))
+                current, current_len = [], 0
+            for i in range(0, len(ids), max_tokens):
+                chunks.append(tokenizer.decode(ids[i:i + max_tokens]))
+            continue
+        if current_len + len(ids) > max_tokens:
+            chunks.append("\n\n".join(current))
+            current, current_len = [], 0
+        current.append(paragraph)
+        current_len += len(ids)
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def _summarize_batch(summarizer, chunks: List[str], batch_size: int, params: Dict) -> List[str]:
+    results = summarizer(chunks, batch_size=batch_size, truncation=True, do_sample=False, **params)
+    return [r["summary_text"] for r in results]
+
+
+def summarize_map_reduce(
+    text: str,
+    summarizer,
+    batch_size: int = 4,
+    max_chunk_tokens: int = MAX_CHUNK_TOKENS,
+    max_length: int = 400,
+    min_length: int = 30,
+) -> Tuple[str, Dict]:
+    """
+    Summarize the whole text instead of a prefix. Returns the final summary and
+    timing stats (chunk counts, chunks/sec of the map stage, end-to-end latency).
+    """
+    start = time.perf_counter()
+    tokenizer = summarizer.tokenizer
+
+    chunks = chunk_paragraphs(text.split("\n\n"), tokenizer, max_chunk_tokens)
+    map_start = time.perf_counter()
+    if len(chunks) > 1:
+        summaries = _summarize_batch(summarizer, chunks, batch_size, CHUNK_SUMMARY_PARAMS)
+    else:
+        summaries = chunks  # fits in one input, nothing to map
+    map_seconds = time.perf_counter() - map_start
+
+    # reduce until the joined summaries fit in a single model input
+    reduce_rounds = 0
+    reduced_chunks = 0
+    while len(summaries) > 1:
+        joined = "\n\n".join(summaries)
+        if len(tokenizer(joined, add_special_tokens=False)["input_ids"]) <= max_chunk_tokens:
+            summaries = [joined]
+            break
+        parts = chunk_paragraphs(summaries, tokenizer, max_chunk_tokens)
+        summaries = _summarize_batch(summarizer, parts, batch_size, CHUNK_SUMMARY_PARAMS)
+        reduce_rounds += 1
+        reduced_chunks += len(parts)
+
+    final_input = summaries[0] if summaries else ""
+    summary = _summarize_batch(
+        summarizer, [final_input], 1, {"max_length": max_length, "min_length": min_length}
+    )[0] if final_input else ""
+
+    total_seconds = time.perf_counter() - start
+    stats = {
+        "chunks": len(chunks),
+        "max_chunk_tokens": max_chunk_tokens,
+        "batch_size": batch_size,
+        "map_seconds": round(map_seconds, 3),
+        "chunks_per_sec": round(len(chunks) / map_seconds, 3) if len(chunks) > 1 else None,
+        "reduce_rounds": reduce_rounds,
+        "reduce_chunks": reduced_chunks,
+        "latency_seconds": round(total_seconds, 3),
+    }
+    return summary, stats
@@ -0,0 +1,269 @@
+import json
+import logging
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+import requests
+
+# long-lived local summarizer: loads the model once and serves summarization jobs over
+# local HTTP. jobs that arrive within BATCH_WINDOW of each other (and use the same
+# generation params) are run through the pipeline as one batch
+#
+#   python summarizer_service.py --port 8765
+#
+# the agent talks to it through RemoteSummarizer, which quacks like a transformers
+# summarization pipeline, and falls back to loading the model in-process when the
+# service is not running
+#
+# a request waits at most JOB_TIMEOUT for its job and then gets a 503. a worker thread
+# that died is restarted on the next request; one that has been inside a single batch
+# for longer than JOB_TIMEOUT cannot be interrupted, so /health answers 503 (status
+# "stalled") and connect_summarizer stops handing the service out until it recovers
+
+DEFAULT_URL = "http://127.0.0.1:8765"
+BATCH_WINDOW = 0.02     # seconds to wait for more jobs before running a batch
+MAX_BATCH = 8
+JOB_TIMEOUT = 300.0     # seconds a request waits for its job before a 503
+
+log = logging.getLogger("summarizer_service")
+
+
+class _Job:
+    def __init__(self, texts: List[str], params: Dict):
+        self.texts = texts
+        self.params = params
+        self.done = threading.Event()
+        self.result: Optional[List[str]] = None
+        self.error: Optional[str] = None
+        self.abandoned = False      # the request timed out; nobody waits for the result
+
+
+class JobTimeout(Exception):
+    pass
+
+
+class SummarizerService:
+    def __init__(self, model: str, max_batch: int = MAX_BATCH, batch_window: float = BATCH_WINDOW, threads: int = 0,
+                 backend: str = "fp32", job_timeout: float = JOB_TIMEOUT):
+        from inference import load_summarizer
+
+        start = time.perf_counter()
+        self.model = model
+        self.pipeline = load_summarizer(model, backend, threads, 1)
+        self.load_seconds = time.perf_counter() - start
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.job_timeout = job_timeout
+        self.jobs: queue.Queue = queue.Queue()
+        self.batches = 0
+        self.texts = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self.busy_since: Optional[float] = None     # monotonic start of the batch in progress
+        self._lock = threading.Lock()
+        self.worker = threading.Thread(target=self._worker, daemon=True)
+        self.worker.start()
+
+    def summarize(self, texts: List[str], params: Dict) -> List[str]:
+        self._ensure_worker()
+        job = _Job(texts, params)
+        self.jobs.put(job)
+        if not job.done.wait(self.job_timeout):
+            job.abandoned = True
+            self.timeouts += 1
+            raise JobTimeout(f"no result within {self.job_timeout:g}s")
+        if job.error:
+            raise RuntimeError(job.error)
+        return job.result
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self.worker.is_alive():
+                return
+            log.error("summarizer worker died, restarting it")
+            self.busy_since = None
+            self.restarts += 1
+            self.worker = threading.Thread(target=self._worker, daemon=True)
+            self.worker.start()
+
+    def stalled(self) -> bool:
+        busy_since = self.busy_since
+        return not self.worker.is_alive() or (busy_since is not None and
+                                              time.monotonic() - busy_since > self.job_timeout)
+
+    def _collect(self) -> List[_Job]:
+        jobs = [self.jobs.get()]
+        size = len(jobs[0].texts)
+        deadline = time.monotonic() + self.batch_window
+        while size < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                job = self.jobs.get(timeout=timeout)
+            except queue.Empty:
+                break
+            jobs.append(job)
+            size += len(job.texts)
+        return jobs
+
+    def _worker(self):
+        while True:
+            # a job whose request already got its 503 is not worth a forward pass
+            jobs = [job for job in self._collect() if not job.abandoned]
+            # only jobs with identical generation params can share a forward pass
+            groups: Dict[str, List[_Job]] = {}
+            for job in jobs:
+                groups.setdefault(json.dumps(job.params, sort_keys=True), []).append(job)
+
+            for group in groups.values():
+                texts = [t for job in group for t in job.texts]
+                self.busy_since = time.monotonic()
+                try:
+                    results = self.pipeline(texts, batch_size=self.max_batch, **group[0].params)
+                    summaries = [r["summary_text"] for r in results]
+                except Exception as e:
+                    for job in group:
+                        job.error = str(e)
+                        job.done.set()
+                    continue
+                finally:
+                    self.busy_since = None
+                self.batches += 1
+                self.texts += len(texts)
+                offset = 0
+                for job in group:
+                    job.result = summaries[offset:offset + len(job.texts)]
+                    offset += len(job.texts)
+                    job.done.set()
+
+    def health(self) -> dict:
+        return {
+            "status": "stalled" if self.stalled() else "ok",
+            "model": self.model,
+            "backend": self.pipeline.info["backend"],
+            "inference": self.pipeline.info,
+            "load_seconds": round(self.load_seconds, 3),
+            "batches": self.batches,
+            "texts": self.texts,
+            "queued": self.jobs.qsize(),
+            "timeouts": self.timeouts,
+            "worker_restarts": self.restarts,
+        }
+
+
+def make_handler(service: SummarizerService):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: dict, headers: Optional[Dict[str, str]] = None):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/health":
+                health = service.health()
+                self._send(503 if health["status"] != "ok" else 200, health)
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/summarize":
+                self._send(404, {"error": "not found"})
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                summaries = service.summarize(body["texts"], body.get("params", {}))
+            except (ValueError, KeyError) as e:
+                self._send(400, {"error": str(e)})
+                return
+            except JobTimeout as e:
+                log.warning("summarize request timed out: %s", e)
+                self._send(503, {"error": str(e)}, {"Retry-After": str(max(1, int(service.job_timeout)))})
+                return
+            except Exception as e:
+                # anything else (bad "params", a failed batch) still gets a JSON answer
+                # instead of a dropped connection
+                log.exception("summarize request failed")
+                self._send(500, {"error": str(e) or type(e).__name__})
+                return
+            self._send(200, {"summaries": summaries})
+
+    return Handler
+
+
+class RemoteSummarizer:
+    """Client for the service with the call signature of a summarization pipeline."""
+
+    def __init__(self, url: str, model: str, timeout: int = 600, info: Optional[Dict] = None):
+        self.url = url.rstrip("/")
+        self.model = model
+        self.info = info    # the service's backend settings, recorded in summary metadata
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._tokenizer = None
+
+    # map-reduce chunking needs the tokenizer locally; it loads in well under a second
+    @property
+    def tokenizer(self):
+        if self._tokenizer is None:
+            from transformers import AutoTokenizer
+
+            self._tokenizer = AutoTokenizer.from_pretrained(self.model)
+        return self._tokenizer
+
+    def __call__(self, texts, batch_size: int = None, **params):
+        single = isinstance(texts, str)
+        r = self.session.post(
+            f"{self.url}/summarize",
+            json={"texts": [texts] if single else list(texts), "params": params},
+            timeout=self.timeout,
+        )
+        r.raise_for_status()
+        return [{"summary_text": s} for s in r.json()["summaries"]]
+
+
+# return a client if a service for model (on the same inference backend) is answering
+# at url, otherwise None
+def connect_summarizer(url: str, model: str, backend: str = "fp32", timeout: float = 0.5) -> Optional[RemoteSummarizer]:
+    try:
+        r = requests.get(f"{url.rstrip('/')}/health", timeout=timeout)
+        r.raise_for_status()
+        health = r.json()
+        if health.get("model") != model or health.get("backend", "fp32") != backend:
+            return None
+    except (requests.RequestException, ValueError):
+        return None
+    return RemoteSummarizer(url, model, info=health.get("inference"))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="warm local summarizer service")
+    parser.add_argument("--model", default="sshleifer/distilbart-cnn-12-6")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH)
+    parser.add_argument("--batch-window", type=float, default=BATCH_WINDOW)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--backend", choices=("fp32", "int8"), default="fp32", help="see inference.py")
+    parser.add_argument("--job-timeout", type=float, default=JOB_TIMEOUT,
+                        help="seconds a request waits for its job before a 503")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    service = SummarizerService(args.model, args.max_batch, args.batch_window, args.threads, args.backend,
+                                args.job_timeout)
+    print(f"loaded {args.model} ({args.backend}) in {service.load_seconds:.1f}s, serving on http://{args.host}:{args.port}")
+    ThreadingHTTPServer((args.host, args.port), make_handler(service)).serve_forever()
@@ -0,0 +1,115 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import frscraperagent
+from batch import run_batch
+from gen_fr_xml import write_issue_xml
+from stage_cache import StageCache
+
+# run_batch against a local http.server serving gen_fr_xml.py issues: processed
+# issues, a 404 (no issue that day) recorded as missing, a malformed issue recorded as
+# failed, and a re-run that takes the extracted text from the stage cache
+#
+#   python -m pytest test_batch.py     (or python -m unittest test_batch)
+
+# Monday to Friday; run_batch skips weekends
+START, END = date(2025, 7, 28), date(2025, 8, 1)
+ISSUES = ["2025-07-28", "2025-07-29", "2025-07-31"]
+NOT_PUBLISHED = "2025-07-30"
+MALFORMED = "2025-08-01"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = self.server.issues.get(self.path.strip("/").removesuffix(".xml"))
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class RunBatchTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.fixtures = tempfile.mkdtemp()
+        issues = {}
+        for seed, issue_date in enumerate(ISSUES):
+            path = os.path.join(cls.fixtures, f"{issue_date}.xml")
+            write_issue_xml(path, 5, paragraphs_per_document=4, seed=seed)
+            with open(path, "rb") as f:
+                issues[issue_date] = f.read()
+        issues[MALFORMED] = b'<?xml version="1.0"?>\n<FEDREG>\n<RULES>\n<RULE><P>cut off'
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        cls.server.issues = issues
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url_template = f"http://127.0.0.1:{cls.server.server_port}/{{date}}.xml"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        shutil.rmtree(cls.fixtures)
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.stage_cache_dir = frscraperagent.STAGE_CACHE_DIR
+        # the parse workers are forked after this, so they see it too
+        frscraperagent.STAGE_CACHE_DIR = os.path.join(self.tmp, "stage_cache")
+        self.processed = []
+
+    def tearDown(self):
+        frscraperagent.STAGE_CACHE_DIR = self.stage_cache_dir
+        shutil.rmtree(self.tmp)
+
+    def process_issue(self, issue_date, url, xml_path, text_path):
+        with open(text_path, encoding="utf-8") as f:
+            self.processed.append((issue_date, url, f.read()))
+
+    def run_batch(self, out_dir: str) -> dict:
+        os.makedirs(out_dir, exist_ok=True)
+        return run_batch(START, END, self.process_issue, self.url_template, out_dir=out_dir,
+                         cache_dir=os.path.join(self.tmp, "http_cache"), fetch_workers=2, parse_workers=1,
+                         requests_per_second=0)
+
+    def test_backfill(self):
+        report = self.run_batch(os.path.join(self.tmp, "out"))
+        self.assertEqual(report["issues"], 5)
+        self.assertEqual(sorted(d for d, _, _ in self.processed), ISSUES)
+        for issue_date, url, text in self.processed:
+            self.assertEqual(url, self.url_template.format(date=issue_date))
+            self.assertTrue(text.strip(), issue_date)
+        self.assertEqual(report["summarize"]["items"], len(ISSUES))
+
+        self.assertEqual(report["missing"], [NOT_PUBLISHED])
+        self.assertEqual(list(report["failed"]), [MALFORMED])
+        self.assertTrue(report["failed"][MALFORMED].startswith("parse: "), report["failed"])
+        self.assertEqual(report["parse"]["errors"], 1)
+
+    def test_rerun_extracts_from_stage_cache(self):
+        self.run_batch(os.path.join(self.tmp, "first"))
+        cache = StageCache(frscraperagent.STAGE_CACHE_DIR)
+        self.assertEqual(cache.stats()["entries"], len(ISSUES))
+
+        first = {d: text for d, _, text in self.processed}
+        self.processed = []
+        self.run_batch(os.path.join(self.tmp, "second"))
+        self.assertEqual({d: text for d, _, text in self.processed}, first)
+        self.assertEqual(cache.stats()["entries"], len(ISSUES))
+        self.assertEqual(cache.stats()["extract.hit"], len(ISSUES))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import base64
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from http_cache import DigestMismatchError, HttpCache
+
+# HttpCache against a local http.server: full download, revalidation (304), resume of
+# an interrupted download (206) and the digest check
+#
+#   python -m pytest test_http_cache.py     (or python -m unittest test_http_cache)
+
+BODY = b"".join(b"<p>paragraph %d of the issue</p>\n" % i for i in range(4000))
+ETAG = '"v1"'
+
+
+def _repr_digest(data: bytes) -> str:
+    return "sha-256=:" + base64.b64encode(hashlib.sha256(data).digest()).decode("ascii") + ":"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == ETAG:
+            server.statuses.append(304)
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            return
+
+        start = 0
+        byte_range = self.headers.get("Range", "")
+        if byte_range.startswith("bytes=") and self.headers.get("If-Range", ETAG) == ETAG:
+            start = int(byte_range[len("bytes="):].rstrip("-"))
+        body = BODY[start:]
+        server.statuses.append(206 if start else 200)
+        self.send_response(206 if start else 200)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(body)))
+        if start:
+            self.send_header("Content-Range", f"bytes {start}-{len(BODY) - 1}/{len(BODY)}")
+        if server.digest is not None:
+            self.send_header("Repr-Digest", server.digest)
+        self.end_headers()
+        if server.truncate_next:
+            # an interrupted download: half the body, then the connection drops
+            server.truncate_next = False
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+class HttpCacheTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/issue.xml"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.requests, self.server.statuses = [], []
+        self.server.digest, self.server.truncate_next = None, False
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = HttpCache(self.cache_dir, chunk_size=4096)
+
+    def tearDown(self):
+        self.cache.session.close()
+        shutil.rmtree(self.cache_dir)
+
+    def assertCached(self, path: str):
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), BODY)
+        self.assertEqual(os.path.basename(path), hashlib.sha256(BODY).hexdigest())
+        self.assertEqual(os.listdir(os.path.join(self.cache_dir, "partial")), [])
+
+    def interrupted_fetch(self):
+        self.server.truncate_next = True
+        with self.assertRaises(requests.RequestException):
+            self.cache.fetch(self.url)
+        self.assertEqual(len(os.listdir(os.path.join(self.cache_dir, "partial"))), 2)
+
+    def test_download_then_revalidate(self):
+        path = self.cache.fetch(self.url)
+        self.assertCached(path)
+        self.assertEqual(self.cache.fetch(self.url), path)
+        self.assertEqual(self.server.statuses, [200, 304])
+        self.assertEqual(self.server.requests[1].get("If-None-Match"), ETAG)
+
+    def test_resume_interrupted_download(self):
+        self.interrupted_fetch()
+        self.assertCached(self.cache.fetch(self.url))
+        self.assertEqual(self.server.statuses, [200, 206])
+        self.assertEqual(self.server.requests[1].get("If-Range"), ETAG)
+        self.assertTrue(self.server.requests[1].get("Range", "").startswith("bytes="))
+
+    def test_digest_checked(self):
+        self.server.digest = _repr_digest(BODY)
+        self.assertCached(self.cache.fetch(self.url))
+
+    def test_digest_mismatch_on_resume_refetches(self):
+        self.server.digest = _repr_digest(BODY)
+        self.interrupted_fetch()
+        # the kept bytes no longer match what the server has
+        partial = [name for name in os.listdir(os.path.join(self.cache_dir, "partial")) if not name.endswith(".json")]
+        with open(os.path.join(self.cache_dir, "partial", partial[0]), "r+b") as f:
+            f.write(b"X")
+        self.assertCached(self.cache.fetch(self.url))
+        self.assertEqual(self.server.statuses, [200, 206, 200])
+
+    def test_digest_mismatch_raises(self):
+        self.server.digest = _repr_digest(b"something else")
+        with self.assertRaises(DigestMismatchError):
+            self.cache.fetch(self.url)
+        self.assertEqual(os.listdir(os.path.join(self.cache_dir, "objects")), [])
+        self.assertEqual(os.listdir(os.path.join(self.cache_dir, "partial")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import base64
+import binascii
+import importlib.util
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+# verify_manifest on a small manifest signed the way bench_manifest_verify.py signs it:
+# a clean run passes, tampering is reported, JCS blobs are hashed per RFC 8785 and blob
+# base64 is decoded strictly
+#
+#   python -m pytest test_manifest_verify.py     (or python -m unittest test_manifest_verify)
+
+REQUIRES = ("pyld", "rfc8785", "blake3", "cryptography")
+MISSING = [name for name in REQUIRES if importlib.util.find_spec(name) is None]
+CONTEXTS_FROM = os.path.join(os.path.dirname(os.path.abspath(__file__)), "manifest.json")
+
+
+@unittest.skipIf(MISSING, f"needs {', '.join(MISSING)}")
+class VerifyManifestTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        from bench_manifest_verify import write_signed_manifest
+
+        with open(CONTEXTS_FROM, encoding="utf-8") as f:
+            contexts = json.load(f)["contexts"]
+        cls.tmp = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.tmp, "signed.json")
+        cls.statements = write_signed_manifest(cls.path, contexts, 3)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp)
+
+    def test_signed_manifest_passes(self):
+        from manifest_verify import verify_manifest
+
+        report = verify_manifest(self.path, workers=0)
+        self.assertTrue(report["passed"], report["failures"])
+        self.assertEqual(report["statements"], self.statements)
+        self.assertEqual(report["checked"], report["statements"] + report["blobs"])
+
+    def test_tampering_is_reported(self):
+        from manifest_verify import verify_manifest
+
+        with open(self.path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        credential = next(s for s in manifest["statements"].values() if s["@type"] == "CredentialRegistration")
+        credential["credential"]["issuanceDate"] = "2001-01-01T00:00:00Z"
+        manifest["blobs"][next(iter(manifest["blobs"]))] = base64.b64encode(b'{"name":"tampered"}').decode()
+        tampered = os.path.join(self.tmp, "tampered.json")
+        with open(tampered, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+
+        report = verify_manifest(tampered, workers=0)
+        self.assertFalse(report["passed"])
+        # the credential's subject is no longer bound to a verified signature either
+        self.assertEqual(sorted({failure["check"] for failure in report["failures"]}),
+                         ["binding", "blob", "signature", "statement"])
+
+    def test_jcs_blob_numbers(self):
+        from bench_manifest_verify import _cid
+        from manifest_verify import CODEC_JSON_JCS, VerifyError, check_blob
+
+        # RFC 8785 section 3.2.2.3: 1.0 -> 1, 1e21 -> 1e+21, 1e-7 -> 1e-7
+        canonical = b'{"a":[1e+21,1e-7,10],"b":1}'
+        cid = _cid(CODEC_JSON_JCS, canonical)
+        data = base64.b64encode(b'{"b": 1.0, "a": [1E21, 0.0000001, 10]}').decode()
+        self.assertEqual(check_blob(cid, data), 38)
+        with self.assertRaises(VerifyError):
+            check_blob(_cid(CODEC_JSON_JCS, b'{"a":[1e+21,1e-07,10],"b":1.0}'), data)
+
+    def test_blob_base64_is_strict(self):
+        from bench_manifest_verify import _cid
+        from manifest_verify import CODEC_RAW, check_blob
+
+        data = base64.b64encode(b"raw blob").decode()
+        cid = _cid(CODEC_RAW, b"raw blob")
+        self.assertEqual(check_blob(cid, data), 8)
+        with self.assertRaises(binascii.Error):
+            check_blob(cid, data[:4] + "*" + data[4:])
+
+
+if __name__ == "__main__":
+    unittest.main()
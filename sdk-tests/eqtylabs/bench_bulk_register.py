@@ -0,0 +1,67 @@
+# Benchmark: one-by-one statement registration vs bulk import
+#
+# each run registers a synthetic SBOM into a fresh integrity store in its own process.
+# "one-by-one" registers statement by statement like eqty_register_example.py, with no
+# transaction; "bulk" uses the worker pool and the all-or-nothing store transaction.
+#
+#   python bench_bulk_register.py [--components 2000] [--workers 1,4,8]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _child(sbom_path: str, workers: int, transactional: bool) -> None:
+    from eqty_sdk import init, DID, DID_ALGORITHMS
+
+    from bulk_import import build_plan, register_plan
+    from cyclonedx import parse_cyclonedx_components
+    from sbom_index import SbomIndex
+
+    init()
+    DID.new(DID_ALGORITHMS.ED25519, name="Bench signer").set_active()
+    components, dependencies, assessors, attestations, timestamp = parse_cyclonedx_components(sbom_path)
+    index = SbomIndex.from_components(components)
+    plan = build_plan(components, dependencies, assessors, attestations, timestamp, index)
+    print(json.dumps(register_plan(plan, workers, transactional)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="bulk registration benchmark")
+    parser.add_argument("--components", type=int, default=2000)
+    parser.add_argument("--workers", default=f"1,4,{os.cpu_count() or 1}")
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sbom_path, workers, transactional = args.child
+        _child(sbom_path, int(workers), transactional == "1")
+        return
+
+    from gen_sbom import write_sbom
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sbom_path = os.path.join(tmp, "sbom.json")
+        write_sbom(sbom_path, args.components)
+
+        runs = [("one-by-one", 1, "0")] + [("bulk", int(w), "1") for w in args.workers.split(",")]
+        print(f"{'mode':>10} {'workers':>7} {'statements':>10} {'seconds':>8} {'stmt/s':>8}")
+        for label, workers, transactional in runs:
+            store_dir = tempfile.mkdtemp(dir=tmp)
+            result = subprocess.run(
+                [sys.executable, os.path.join(HERE, "bench_bulk_register.py"),
+                 "--child", sbom_path, str(workers), transactional],
+                cwd=store_dir, env={**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [HERE, os.environ.get("PYTHONPATH")]))},
+                check=True, capture_output=True, text=True,
+            )
+            r = json.loads(result.stdout.strip().splitlines()[-1])
+            print(f"{label:>10} {workers:>7} {r['statements']:>10} {r['seconds']:>8.2f} {r['statements_per_sec']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
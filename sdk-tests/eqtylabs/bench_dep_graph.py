@@ -0,0 +1,108 @@
+# Benchmark: dependency graph build, topological order and reachability queries
+#
+# the graph comes from the dependencies section of a synthetic SBOM (component i
+# depends on up to `fanout` random earlier components). reachability is measured on
+# random node pairs, cold (pruned search) and warm (after the source's closure is cached).
+# the same queries then run on the graph with `--back-edges` edges added from early
+# components to later ones, which closes cycles: no topological order, so reaches()
+# searches without rank pruning, or reads a cached closure
+#
+#   python bench_dep_graph.py [--components 100000] [--fanout 3] [--queries 10000] [--back-edges 10]
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from cyclonedx import Dependency, iter_dependencies
+from dep_graph import DependencyCycleError, DependencyGraph
+from gen_sbom import write_sbom
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def per_query_us(fn, pairs):
+    times = []
+    for source, target in pairs:
+        start = time.perf_counter()
+        fn(source, target)
+        times.append((time.perf_counter() - start) * 1e6)
+    times.sort()
+    return statistics.median(times), times[int(len(times) * 0.99)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="dependency graph benchmark")
+    parser.add_argument("--components", type=int, default=100000)
+    parser.add_argument("--fanout", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=10000)
+    parser.add_argument("--sources", type=int, default=100, help="distinct sources for warm queries")
+    parser.add_argument("--back-edges", type=int, default=10, help="edges added for the cyclic run")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sbom_path = os.path.join(tmp, "sbom.json")
+        write_sbom(sbom_path, args.components, fanout=args.fanout, claim_every=args.components)
+        dependencies = list(iter_dependencies(sbom_path))
+
+    graph, build_s = timed(DependencyGraph.from_dependencies, dependencies)
+    _, topo_s = timed(graph.topological_order)
+    _, sort_s = timed(graph.sort_dependencies, dependencies)
+    print(f"{len(graph)} nodes, {graph.edge_count} edges")
+    print(f"build (CSR, both directions): {build_s * 1000:8.1f} ms")
+    print(f"topological order:            {topo_s * 1000:8.1f} ms")
+    print(f"sort dependency records:      {sort_s * 1000:8.1f} ms")
+
+    rng = random.Random(0)
+    n = len(graph)
+    pairs = [(rng.randrange(n), rng.randrange(n)) for _ in range(args.queries)]
+    median, p99 = per_query_us(graph.reaches, pairs)
+    print(f"reaches, cold:                {median:8.1f} us median, {p99:8.1f} us p99")
+
+    sources = [rng.randrange(n) for _ in range(args.sources)]
+    _, closure_s = timed(lambda: [graph.closure(s) for s in sources])
+    warm_pairs = [(rng.choice(sources), rng.randrange(n)) for _ in range(args.queries)]
+    median, p99 = per_query_us(graph.reaches, warm_pairs)
+    print(f"closure, first use:           {closure_s / len(sources) * 1000:8.1f} ms per node")
+    print(f"reaches, closure cached:      {median:8.1f} us median, {p99:8.1f} us p99")
+
+    ref = graph.refs[n // 2]
+    affected, affected_s = timed(graph.affected_by, ref)
+    _, again_s = timed(graph.affected_by, ref)
+    print(f"affected_by ({len(affected)} refs):     {affected_s * 1000:8.1f} ms cold, {again_s * 1000:.1f} ms cached")
+
+    # cyclic: dependencies[i] (early) also depends on dependencies[j] (later), j > i
+    cyclic_deps = list(dependencies)
+    for _ in range(args.back_edges):
+        i = rng.randrange(n // 10)
+        j = rng.randrange(n // 2, n)
+        cyclic_deps[i] = Dependency({"ref": cyclic_deps[i].ref,
+                                     "dependsOn": cyclic_deps[i].depends_on + (cyclic_deps[j].ref,)})
+    cyclic = DependencyGraph.from_dependencies(cyclic_deps)
+    try:
+        cyclic.topological_order()
+        print("cyclic graph: no cycle closed, try more --back-edges")
+        return
+    except DependencyCycleError as e:
+        print(f"cyclic graph: {args.back_edges} back edges, e.g. a cycle of {len(e.cycle) - 1} nodes")
+    cyclic_pairs = [(rng.randrange(n), rng.randrange(n)) for _ in range(args.queries)]
+    median, p99 = per_query_us(cyclic.reaches, cyclic_pairs)
+    print(f"reaches on cyclic graph:      {median:8.1f} us median, {p99:8.1f} us p99 (unpruned search)")
+    for source in sources:
+        cyclic.closure(source)
+    median, p99 = per_query_us(cyclic.reaches, [(rng.choice(sources), rng.randrange(n)) for _ in range(args.queries)])
+    print(f"cyclic, closure cached:       {median:8.1f} us median, {p99:8.1f} us p99")
+    # the search (pairs whose source has no cached closure) against the closure bitsets
+    checked = [(s, t) for s, t in cyclic_pairs[:200] if s not in cyclic._closure]
+    wrong = sum(cyclic.reaches(s, t) != bool(cyclic.closure(s) >> t & 1) for s, t in checked)
+    print(f"cyclic search vs closures:    {wrong} of {len(checked)} differ")
+
+
+if __name__ == "__main__":
+    main()
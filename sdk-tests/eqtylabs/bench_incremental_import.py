@@ -0,0 +1,72 @@
+# Benchmark: full re-import vs incremental re-import of a slightly changed SBOM
+#
+# runs eqty_register_example.py as it runs in CI, each time in its own process:
+#   baseline     full import of revision 1 (saves the import state)
+#   full         revision 2 into a fresh store, registering everything
+#   incremental  revision 2 with EQTY_INCREMENTAL=1 on top of the baseline's state
+# revision 2 changes the SHA-256 of --change (default 1%) of the components, which
+# also changes the computations they take part in and the claims on them.
+# times are the run reports' wall_seconds, so they include parsing and the manifest
+#
+#   python bench_incremental_import.py [--components 10000] [--change 0.01]
+
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SBOM = "cyclonedx_sbom.json"
+
+
+def _run(store_dir: str, sbom_path: str, incremental: bool) -> dict:
+    shutil.copyfile(sbom_path, os.path.join(store_dir, SBOM))
+    env = {**os.environ, "EQTY_INCREMENTAL": "1" if incremental else "0", "EQTY_RUN_REPORT": "run_report.json",
+           "PYTHONPATH": os.pathsep.join(filter(None, [HERE, os.environ.get("PYTHONPATH")]))}
+    subprocess.run([sys.executable, os.path.join(HERE, "eqty_register_example.py")],
+                   cwd=store_dir, env=env, check=True, capture_output=True, text=True)
+    with open(os.path.join(store_dir, "run_report.json")) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="full vs incremental SBOM re-import")
+    parser.add_argument("--components", type=int, default=10000)
+    parser.add_argument("--change", type=float, default=0.01, help="fraction of components whose hash changes")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    from gen_sbom import write_sbom
+
+    changed = random.Random(args.seed).sample(range(args.components), round(args.components * args.change))
+    with tempfile.TemporaryDirectory() as tmp:
+        rev1, rev2 = os.path.join(tmp, "rev1.json"), os.path.join(tmp, "rev2.json")
+        write_sbom(rev1, args.components)
+        write_sbom(rev2, args.components, changed=changed)
+
+        incremental_dir, full_dir = os.path.join(tmp, "incremental"), os.path.join(tmp, "full")
+        os.mkdir(incremental_dir)
+        os.mkdir(full_dir)
+        runs = [("baseline", _run(incremental_dir, rev1, False)),
+                ("full", _run(full_dir, rev2, False)),
+                ("incremental", _run(incremental_dir, rev2, True))]
+
+    print(f"{args.components} components, {len(changed)} changed ({args.change:.1%})")
+    print(f"{'run':<12} {'seconds':>8} {'register s':>10} {'registered':>10} {'skipped':>8} {'peak MB':>8}")
+    for name, report in runs:
+        counters, stages = report["counters"], report["stages"]
+        registered = sum(v for k, v in counters.items() if k.startswith("statements."))
+        skipped = sum(v for k, v in counters.items() if k.startswith("skipped."))
+        register_seconds = sum(s["seconds"] for k, s in stages.items() if k.startswith("register."))
+        print(f"{name:<12} {report['wall_seconds']:>8.2f} {register_seconds:>10.2f} {registered:>10} "
+              f"{skipped:>8} {report['peak_rss_mb']:>8}")
+    full, incremental = runs[1][1], runs[2][1]
+    print(f"incremental re-import: {full['wall_seconds'] / incremental['wall_seconds']:.1f}x faster than full")
+
+
+if __name__ == "__main__":
+    main()
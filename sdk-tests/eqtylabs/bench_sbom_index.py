@@ -0,0 +1,73 @@
+# Benchmark: SBOM content-ID index on a synthetic SBOM
+#
+# "per call" is what eqty_register_example.py used to do: base58.b58encode for every
+# component in each of its three passes. the index converts each digest once, and a
+# second run loads it from disk instead of recomputing.
+#
+#   python bench_sbom_index.py [--components 100000] [--queries 100000]
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import base58
+
+from cyclonedx import iter_components
+from gen_sbom import write_sbom
+from sbom_index import SbomIndex, component_sha256
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def per_call_cids(components, passes=3):
+    for _ in range(passes):
+        for component in components:
+            digest = component_sha256(component)
+            if digest:
+                'z' + base58.b58encode(bytes([0x01, 0x55, 0x12, 0x20]) + bytes.fromhex(digest)).decode('ascii')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SBOM content-ID index benchmark")
+    parser.add_argument("--components", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=100000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sbom_path = os.path.join(tmp, "sbom.json")
+        index_path = os.path.join(tmp, "sbom.index.json")
+        write_sbom(sbom_path, args.components)
+
+        components, parse_s = timed(lambda: list(iter_components(sbom_path)))
+        _, per_call_s = timed(per_call_cids, components)
+        _, cold_s = timed(SbomIndex.load_or_build, sbom_path, index_path, components)
+        index, warm_s = timed(SbomIndex.load_or_build, sbom_path, index_path)
+
+        print(f"{args.components} components (parse {parse_s:.2f} s, index file {os.path.getsize(index_path) / 1e6:.1f} MB)")
+        print(f"per-call CIDs, 3 passes:   {per_call_s:8.2f} s")
+        print(f"index build + save:        {cold_s:8.2f} s (includes sha256 of the SBOM)")
+        print(f"index load (unchanged):    {warm_s:8.2f} s")
+
+        rng = random.Random(0)
+        sample = [rng.choice(index.entries) for _ in range(args.queries)]
+        lookups = {
+            "bom-ref": lambda e: index.content_id(e.bom_ref),
+            "purl": lambda e: index.by_purl(e.purl),
+            "name+version": lambda e: index.by_name_version(e.name, e.version),
+            "sha256": lambda e: index.by_digest(e.sha256),
+            "cid": lambda e: index.by_digest(e.content_id),
+        }
+        for label, lookup in lookups.items():
+            _, elapsed = timed(lambda: [lookup(e) for e in sample])
+            assert all(lookup(e) for e in sample[:100])
+            print(f"lookup by {label:<13}    {elapsed / args.queries * 1e6:8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
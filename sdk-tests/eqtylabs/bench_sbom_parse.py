@@ -0,0 +1,80 @@
+# Benchmark: whole-file SBOM parsing vs streaming batches, at 1k / 10k / 100k components
+#
+# "load" is the previous approach: json.load the file and keep a model object for
+# every component, dependency and claim. "stream" walks the same sections with the
+# iter_* functions in batches and drops each batch when done. Each run is a separate
+# process so peak RSS is per mode.
+#
+#   python bench_sbom_parse.py [--sizes 1000,10000,100000] [--batch 1000]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from gen_sbom import write_sbom
+from instrument import peak_rss_mb
+
+
+
+def _child(mode: str, path: str, batch: int) -> None:
+    import cyclonedx as cdx
+
+    base = peak_rss_mb()
+    start = time.perf_counter()
+    components = 0
+    if mode == "load":
+        with open(path) as f:
+            data = json.load(f)
+        kept = [cdx.Component(c) for c in data["components"]]
+        kept += [cdx.Dependency(d) for d in data["dependencies"]]
+        kept += [cdx.Attestation(a) for a in data["declarations"]["attestations"]]
+        components = len(data["components"])
+    else:
+        for chunk in cdx.batched(cdx.iter_components(path), batch):
+            components += len(chunk)
+        for _ in cdx.batched(cdx.iter_dependencies(path), batch):
+            pass
+        for _ in cdx.iter_attestations(path):
+            pass
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "seconds": elapsed,
+        "components_per_sec": components / elapsed,
+        "rss_mb": peak_rss_mb() - base,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SBOM parse memory/throughput benchmark")
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        mode, path, batch = args.child
+        _child(mode, path, int(batch))
+        return
+
+    print(f"{'components':>10} {'file MB':>8} {'mode':>6} {'seconds':>8} {'comp/s':>10} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in [int(s) for s in args.sizes.split(",")]:
+            path = os.path.join(tmp, f"sbom_{n}.json")
+            write_sbom(path, n)
+            size_mb = os.path.getsize(path) / 1e6
+            for mode in ("load", "stream"):
+                result = subprocess.run(
+                    [sys.executable, __file__, "--child", mode, path, str(args.batch)],
+                    check=True, capture_output=True, text=True,
+                )
+                r = json.loads(result.stdout.strip().splitlines()[-1])
+                print(f"{n:>10} {size_mb:>8.1f} {mode:>6} {r['seconds']:>8.2f} "
+                      f"{r['components_per_sec']:>10.0f} {r['rss_mb']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
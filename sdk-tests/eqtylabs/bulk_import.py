@@ -0,0 +1,364 @@
+import os
+import time
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+from cyclonedx import Assessor, Attestation, Claim, Component, Dependency, parse_cyclonedx_components
+from dep_graph import DependencyCycleError, DependencyGraph
+from eqty_sdk import DID, DID_ALGORITHMS
+from eqty_sdk import Custom
+from eqty_sdk import Computation
+from eqty_sdk import Declaration
+from sbom_index import SbomIndex
+
+# bulk registration of an SBOM import
+#
+# the one-by-one path in eqty_register_example.py interleaves parsing, printing and
+# registration, so a problem in claim 900 is found after 899 statements are already
+# in the store. here every statement is planned and validated first, then registered
+# phase by phase on a worker pool inside a StoreTransaction: on any error the files
+# and directories the import created under .eqty_sdk are removed, and on success they
+# are fsynced together at commit instead of the store's durability depending on each
+# write.
+#
+# signing happens inside the SDK's finalize(), so the pool runs whole registrations.
+# the pool does not keep the topological order of the computations, so they run in
+# dependency waves: each wave only holds computations whose inputs were produced by an
+# earlier wave, and a wave starts once the one before it has finished.
+# it is a thread pool: the active signer is process-global and the Custom objects are
+# needed in-process for add_declaration. this scales with cores when the SDK's native
+# signing releases the GIL, which is why the worker count is configurable
+
+EQTY_DIR = '.eqty_sdk'
+
+
+class ComponentStatement(NamedTuple):
+    component: Component
+    content_id: str
+
+
+class ComputationStatement(NamedTuple):
+    ref: str
+    name: str
+    output_cid: str
+    input_cids: List[str]
+
+
+class DeclarationStatement(NamedTuple):
+    claim: Claim
+    assessor: Optional[str]
+    target: str
+
+
+class ImportPlan(NamedTuple):
+    components: List[ComponentStatement]
+    computations: List[ComputationStatement]
+    assessors: List[Assessor]
+    declarations: List[DeclarationStatement]
+    timestamp: Optional[str]
+
+    def __len__(self):
+        return len(self.components) + len(self.computations) + len(self.assessors) + len(self.declarations)
+
+
+class SbomImportError(ValueError):
+    """The SBOM can not be imported as a whole; nothing was written."""
+
+
+def build_plan(components: Sequence[Component], dependencies: Sequence[Dependency],
+               assessors: Sequence[Assessor], attestations: Sequence[Attestation],
+               timestamp: Optional[str], index: SbomIndex,
+               include_claim: Optional[Callable[[Claim], bool]] = None) -> ImportPlan:
+    """Validate and order everything to register; include_claim selects a subset of the claims."""
+    problems = []
+
+    component_statements = []
+    for component in components:
+        content_id = index.content_id(component.bom_ref)
+        if not content_id:
+            problems.append(f"component {component.bom_ref} has no SHA-256 hash")
+        component_statements.append(ComponentStatement(component, content_id))
+
+    # computations are registered dependencies-first, so each one's inputs are
+    # already in the store when it is signed
+    graph = DependencyGraph.from_dependencies(dependencies)
+    try:
+        dependencies = graph.sort_dependencies(dependencies)
+    except DependencyCycleError as e:
+        problems.append(str(e))
+        dependencies = graph.sort_dependencies(dependencies, allow_cycles=True)
+
+    computations = []
+    for dependency in dependencies:
+        entry = index.get(dependency.ref)
+        if entry is None or not entry.content_id:
+            problems.append(f"dependency {dependency.ref} is not a component with a content ID")
+            continue
+        input_cids = []
+        for dep_ref in dependency.depends_on:
+            dep_cid = index.content_id(dep_ref)
+            if not dep_cid:
+                problems.append(f"{dependency.ref} depends on {dep_ref}, which has no content ID")
+            input_cids.append(dep_cid)
+        computations.append(ComputationStatement(dependency.ref, entry.name, entry.content_id, input_cids))
+
+    declarations = []
+    for attestation in attestations:
+        for claim in attestation.claims:
+            if include_claim and not include_claim(claim):
+                continue
+            if index.get(claim.target) is None:
+                problems.append(f"claim {claim.bom_ref} targets unknown component {claim.target}")
+            declarations.append(DeclarationStatement(claim, attestation.assessor, claim.target))
+
+    if problems:
+        raise SbomImportError(f"{len(problems)} problem(s) in SBOM, first: {problems[0]}")
+    return ImportPlan(component_statements, computations, list(assessors), declarations, timestamp)
+
+
+def computation_waves(computations: Sequence[ComputationStatement]) -> List[List[ComputationStatement]]:
+    """
+    Split topologically ordered computations into waves: a computation goes one wave
+    after the latest wave that produces one of its inputs, so the computations in a
+    wave do not depend on each other.
+    """
+    wave_of: Dict[str, int] = {}
+    waves: List[List[ComputationStatement]] = []
+    for statement in computations:
+        wave = max((wave_of[cid] + 1 for cid in statement.input_cids if cid in wave_of), default=0)
+        if wave == len(waves):
+            waves.append([])
+        waves[wave].append(statement)
+        wave_of[statement.output_cid] = max(wave, wave_of.get(statement.output_cid, 0))
+    return waves
+
+
+def _store_dirs(root: str) -> Dict[str, int]:
+    """
+    mtime_ns of every directory under root. a directory whose link count says it has no
+    subdirectories (st_nlink == 2) is not listed, so the statement and blob directories
+    full of files cost one stat each, not a read of every entry.
+    """
+    dirs = {}
+    pending = [root]
+    while pending:
+        path = pending.pop()
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        dirs[path] = st.st_mtime_ns
+        if st.st_nlink == 2:
+            continue
+        with os.scandir(path) as entries:
+            pending.extend(entry.path for entry in entries if entry.is_dir(follow_symlinks=False))
+    return dirs
+
+
+def _fsync_path(path: str) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class StoreTransaction:
+    """
+    Files and directories created under the SDK directory inside the block are removed
+    if it raises, and fsynced if it completes (the files, then the directories holding
+    them). Files that existed before are left as they are.
+
+    Nothing is listed up front: on exit only the directories whose mtime changed are
+    read, and a file counts as created if its ctime is not older than a marker file
+    touched on entry (the store does not rewrite an object it already has, since the
+    name is the content's CID). The cost follows what the import touched, not the size
+    of the store.
+    """
+
+    def __init__(self, root: str = EQTY_DIR):
+        self.root = root
+        self.before: Dict[str, int] = {}
+        self.start_ns = 0
+        self.created: List[str] = []
+        self.created_dirs: List[str] = []
+        self.new_root = False
+
+    def __enter__(self):
+        self.new_root = not os.path.isdir(self.root)
+        os.makedirs(self.root, exist_ok=True)
+        # start on a fresh tick of the filesystem's clock (coarser than time.time_ns()),
+        # so a file written just before entry cannot share the start timestamp
+        marker = os.path.join(self.root, f".transaction-{os.getpid()}")
+        with open(marker, "w"):
+            pass
+        first = self.start_ns = os.stat(marker).st_ctime_ns
+        while self.start_ns == first:
+            time.sleep(0.001)
+            os.utime(marker)
+            self.start_ns = os.stat(marker).st_ctime_ns
+        os.remove(marker)
+        self.before = _store_dirs(self.root)
+        return self
+
+    def _changes(self):
+        after = _store_dirs(self.root)
+        self.created_dirs = sorted(path for path in after if path not in self.before or
+                                   (path == self.root and self.new_root))
+        created = []
+        for directory, mtime_ns in after.items():
+            if self.before.get(directory) == mtime_ns:
+                continue
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_file(follow_symlinks=False) and entry.stat().st_ctime_ns >= self.start_ns:
+                        created.append(entry.path)
+        self.created = sorted(created)
+
+    def __exit__(self, exc_type, exc, tb):
+        self._changes()
+        if exc_type is not None:
+            for path in self.created:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            # deepest first, so a new directory is empty by the time it is removed
+            for directory in sorted(self.created_dirs, key=len, reverse=True):
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    pass
+            return False
+
+        # a new file's directory entry is durable once its directory is fsynced, and a
+        # new directory's once its parent is
+        for path in self.created:
+            _fsync_path(path)
+        directories = {os.path.dirname(path) for path in self.created} | set(self.created_dirs)
+        directories |= {os.path.dirname(path) for path in self.created_dirs}
+        for directory in sorted(directories):
+            _fsync_path(directory)
+        return False
+
+
+def _register_component(statement: ComponentStatement):
+    component = statement.component
+    component.integrity = Custom.from_cid(statement.content_id, component.type,
+        name=component.name,
+        version=component.version,
+        type=component.type,
+        description=component.description,
+        supplier=component.supplier["name"],
+        licenses=component.licenses[0]["license"]["id"],
+        purl=component.purl,
+        bom_ref=component.bom_ref
+    )
+    return component.integrity
+
+
+def _register_computation(statement: ComputationStatement):
+    computation = Computation.new(name=f"{statement.name} build",
+                                  description=f"The building of {statement.name}")
+    computation.add_output_cid(statement.output_cid)
+    for input_cid in statement.input_cids:
+        computation.add_input_cid(input_cid)
+    computation.finalize()
+    return computation
+
+
+def _register_assessor(assessor: Assessor):
+    return DID.new(DID_ALGORITHMS.ED25519,
+        organization_name=assessor.organization_name,
+        organization_email=assessor.organization_email,
+        individual_name=assessor.individual_name,
+        individual_email=assessor.individual_email,
+        third_party=assessor.third_party,
+        bom_ref=assessor.bom_ref
+    )
+
+
+def _register_declaration(statement: DeclarationStatement):
+    claim = statement.claim
+    declaration = Declaration.new(claim.predicate, claim.reasoning) \
+        .add_extra("target", claim.target) \
+        .add_extra("bom_ref", claim.bom_ref) \
+        .add_extra("mitigation_strategies", claim.mitigation_strategies) \
+        .add_extra("signature", claim.signature)
+    for evidence in claim.evidence:
+        for item in evidence.data_items:
+            item.spill()
+            if item.content_id:
+                declaration.add_attachment_cid(item.content_id)
+    return declaration.finalize()
+
+
+def register_plan(plan: ImportPlan, workers: Optional[int] = None, transactional: bool = True,
+                  record: Optional[Callable[[str, object, object], None]] = None) -> Dict:
+    """
+    Register every statement in the plan. Components go first because declarations
+    attach to their integrity objects, and computations go in dependency waves.
+    record(phase, plan item, statement) is called for each registered statement, in the
+    calling thread. Returns counts, timings and statements/sec.
+    """
+    workers = workers or os.cpu_count() or 1
+    component_map = {statement.component.bom_ref: statement.component for statement in plan.components}
+    phases = {}
+
+    def run_phase(name, fn, items, pool):
+        start = time.perf_counter()
+        results = [fn(item) for item in items] if pool is None else list(pool.map(fn, items))
+        if record:
+            for item, result in zip(items, results):
+                record(name, item, result)
+        phase = phases.setdefault(name, {"statements": 0, "seconds": 0.0})
+        phase["statements"] += len(items)
+        phase["seconds"] = round(phase["seconds"] + time.perf_counter() - start, 3)
+        return results
+
+    start = time.perf_counter()
+    transaction = StoreTransaction() if transactional else None
+    with transaction or nullcontext(), ThreadPoolExecutor(workers) if workers > 1 else nullcontext() as pool:
+        run_phase("components", _register_component, plan.components, pool)
+        waves = computation_waves(plan.computations)
+        for wave in waves:
+            run_phase("computations", _register_computation, wave, pool)
+        phases.setdefault("computations", {"statements": 0, "seconds": 0.0})["waves"] = len(waves)
+        run_phase("assessors", _register_assessor, plan.assessors, pool)
+        declarations = run_phase("declarations", _register_declaration, plan.declarations, pool)
+        for statement, declaration in zip(plan.declarations, declarations):
+            component_map[statement.target].integrity.add_declaration(declaration)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "statements": len(plan),
+        "files_written": len(transaction.created) if transaction else None,
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "statements_per_sec": round(len(plan) / elapsed, 1) if elapsed else None,
+        "phases": phases,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from eqty_sdk import init, generate_manifest
+
+    parser = argparse.ArgumentParser(description="register a CycloneDX SBOM in one all-or-nothing import")
+    parser.add_argument("sbom", nargs="?", default="cyclonedx_sbom.json")
+    parser.add_argument("--workers", type=int, default=None, help="default: all cores")
+    parser.add_argument("--manifest", default="manifest.json")
+    args = parser.parse_args()
+
+    init()
+    did = DID.new(DID_ALGORITHMS.ED25519, name="Build system", description="The build system identifier used to register integrity statements")
+    did.set_active()
+
+    components, dependencies, assessors, attestations, timestamp = parse_cyclonedx_components(args.sbom)
+    index = SbomIndex.load_or_build(args.sbom, components=components)
+    plan = build_plan(components, dependencies, assessors, attestations, timestamp, index)
+    print(json.dumps(register_plan(plan, args.workers), indent=2))
+    generate_manifest(args.manifest)
@@ -0,0 +1,53 @@
+from typing import Iterable, List
+
+# raw-codec CIDv1 for sha256 digests, as used for SBOM components and evidence
+#
+#   <0x01 cidv1><0x55 raw><0x12 sha2-256><0x20 length><digest>, base58btc with 'z' prefix
+
+B58_ALPHABET = b'123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+RAW_SHA256_CID_PREFIX = bytes([0x01, 0x55, 0x12, 0x20])   # CIDv1, raw, sha2-256, 32 bytes
+
+# 58**10 fits in 64 bits: split the number into 10-digit groups with one divmod each
+_B58_GROUP = 58 ** 10
+_B58_PAIRS = [bytes([B58_ALPHABET[i // 58], B58_ALPHABET[i % 58]]) for i in range(58 * 58)]
+
+
+def _b58_group(n: int) -> bytes:
+    # ten base58 digits of n < 58**10, two at a time
+    out = []
+    for _ in range(5):
+        n, r = divmod(n, 58 * 58)
+        out.append(_B58_PAIRS[r])
+    return b''.join(reversed(out))
+
+
+def b58encode(data: bytes) -> str:
+    """base58btc encode, same output as base58.b58encode"""
+    n = int.from_bytes(data, 'big')
+    groups = []
+    while n:
+        n, r = divmod(n, _B58_GROUP)
+        groups.append(_b58_group(r))
+    encoded = b''.join(reversed(groups)).lstrip(b'1')
+    pad = len(data) - len(data.lstrip(b'\0'))
+    return (b'1' * pad + encoded).decode('ascii')
+
+
+def sha256_to_content_id(sha256_hash: str) -> str:
+    """
+    Convert a SHA-256 hash into a proper IPFS CID (Content Identifier).
+
+    CID structure: <cidv1-multicodec><content-type-multicodec><content-multihash>
+    - CIDv1 multicodec: 0x01
+    - Content type multicodec (raw): 0x55
+    - Multihash: <hash-function-code><digest-length><digest>
+      - SHA-256 function code: 0x12
+      - Digest length: 32 bytes (0x20)
+    """
+    return 'z' + b58encode(RAW_SHA256_CID_PREFIX + bytes.fromhex(sha256_hash))
+
+
+def sha256_to_content_ids(sha256_hashes: Iterable[str]) -> List[str]:
+    """Batch version of sha256_to_content_id."""
+    prefix = RAW_SHA256_CID_PREFIX
+    return ['z' + b58encode(prefix + bytes.fromhex(h)) for h in sha256_hashes]
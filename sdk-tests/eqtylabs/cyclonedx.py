@@ -0,0 +1,326 @@
+import base64
+import binascii
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from content_id import sha256_to_content_id
+
+try:
+    import ijson
+except ImportError:  # falls back to json.load, correct but not bounded in memory
+    ijson = None
+
+# CycloneDX SBOM models and parser
+#
+# the record classes use __slots__ so 100k components do not each carry a __dict__,
+# and the iter_* functions stream one section of the file at a time with ijson, so
+# memory scales with the batch being processed rather than with the SBOM
+
+EVIDENCE_CHUNK_BYTES = 1 << 20
+EVIDENCE_SPILL_BYTES = int(os.environ.get('EVIDENCE_SPILL_BYTES', 8 << 20))
+EVIDENCE_SPILL_DIR = os.environ.get('EVIDENCE_SPILL_DIR', '.evidence')
+
+
+class Component:
+    __slots__ = ('name', 'version', 'type', 'description', 'supplier', 'licenses',
+                 'purl', 'bom_ref', 'security', 'integrity')
+
+    def __init__(self, component_data: Dict):
+        self.name = component_data.get('name')
+        self.version = component_data.get('version')
+        self.type = component_data.get('type')
+        self.description = component_data.get('description')
+        self.supplier = component_data.get('supplier')
+        self.licenses = component_data.get('licenses', [])
+        self.purl = component_data.get('purl')
+        self.bom_ref = component_data.get('bom-ref')
+        self.security = ComponentSecurity(component_data, self.bom_ref)
+        self.integrity = None
+
+    def __repr__(self):
+        return f"Component(bom_ref='{self.bom_ref}')"
+
+
+class ComponentSecurity:
+    __slots__ = ('bom_ref', 'hashes', 'signature', 'evidence')
+
+    def __init__(self, component_data: Dict, bom_ref: str):
+        self.bom_ref = bom_ref
+        self.hashes = component_data.get('hashes', [])
+        self.signature = component_data.get('signature')
+        self.evidence = component_data.get('evidence')
+
+    def __repr__(self):
+        return f"ComponentSecurity(bom_ref='{self.bom_ref}')"
+
+
+class Dependency:
+    __slots__ = ('ref', 'depends_on')
+
+    def __init__(self, dependency_data: Dict):
+        self.ref = dependency_data.get('ref')
+        self.depends_on = tuple(dependency_data.get('dependsOn', ()))
+
+    def __repr__(self):
+        return f"Dependency(ref='{self.ref}', depends_on={len(self.depends_on)})"
+
+
+class Assessor:
+    __slots__ = ('bom_ref', 'third_party', 'organization_name', 'organization_email',
+                 'individual_name', 'individual_email')
+
+    def __init__(self, assessor_data: Dict):
+        self.bom_ref = assessor_data.get('bom-ref')
+        self.third_party = assessor_data.get('thirdParty', False)
+        self.organization_name = assessor_data.get('organizationName')
+        self.organization_email = assessor_data.get('organizationEmail')
+
+        # Flatten individual fields
+        individual = assessor_data.get('individual', {})
+        self.individual_name = individual.get('name')
+        self.individual_email = individual.get('email')
+
+    def __repr__(self):
+        return f"Assessor(bom_ref='{self.bom_ref}')"
+
+
+class EvidenceData:
+    """
+    One evidence attachment. The payload stays in its encoded form until first use:
+    raw / view() decode it, decoded_data gives the old UTF-8 string, content_id hashes
+    it in chunks without holding the decoded copy, and spill() streams payloads over
+    EVIDENCE_SPILL_BYTES to a file named by their CID. a payload that is not valid
+    base64 has no content_id; error says why.
+    """
+    __slots__ = ('name', 'media_type', 'encoding', 'data', 'error', '_raw', '_content_id', '_path')
+
+    def __init__(self, data_item: Dict):
+        self.name = data_item.get('name')
+        self.media_type = data_item.get('mediaType')
+        self.encoding = data_item.get('encoding')
+        self.data = data_item.get('data')
+        self.error = None
+        self._raw = None
+        self._content_id = None
+        self._path = None
+
+    @property
+    def size_hint(self) -> int:
+        if not self.data:
+            return 0
+        return len(self.data) * 3 // 4 if self.encoding == 'base64' else len(self.data)
+
+    def iter_chunks(self, chunk_bytes: int = EVIDENCE_CHUNK_BYTES) -> Iterator[bytes]:
+        """Decoded payload in chunks, without materializing all of it."""
+        if not self.data:
+            return
+        if self.encoding != 'base64':
+            encoded = self.data.encode('utf-8')
+            for i in range(0, len(encoded), chunk_bytes):
+                yield encoded[i:i + chunk_bytes]
+            return
+        data = ''.join(self.data.split())    # wrapped base64; chunking needs it contiguous
+        step = chunk_bytes // 3 * 4     # whole base64 quanta
+        for i in range(0, len(data), step):
+            yield base64.b64decode(data[i:i + step], validate=True)
+
+    @property
+    def raw(self) -> bytes:
+        """Decoded payload bytes. Cached unless the payload is over the spill threshold."""
+        if self._raw is not None:
+            return self._raw
+        if self._path:
+            with open(self._path, 'rb') as f:
+                return f.read()
+        raw = b''.join(self.iter_chunks())
+        if len(raw) <= EVIDENCE_SPILL_BYTES:
+            self._raw = raw
+        return raw
+
+    def view(self) -> memoryview:
+        """Binary-safe access; spilled payloads are memory-mapped rather than read."""
+        if self._path and os.path.getsize(self._path):
+            with open(self._path, 'rb') as f:
+                return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        return memoryview(self.raw)
+
+    @property
+    def decoded_data(self) -> Optional[str]:
+        if self.encoding != 'base64' or not self.data:
+            return None
+        try:
+            return self.raw.decode('utf-8')
+        except Exception as e:
+            return f"Failed to decode: {e}"
+
+    @property
+    def content_id(self) -> Optional[str]:
+        """Raw-codec CID of the decoded payload, hashed chunk by chunk. None if it does not decode."""
+        if self._content_id is None and self.data and self.error is None:
+            h = hashlib.sha256()
+            try:
+                for chunk in self.iter_chunks():
+                    h.update(chunk)
+            except binascii.Error as e:
+                self.error = f"invalid base64: {e}"
+                return None
+            self._content_id = sha256_to_content_id(h.hexdigest())
+        return self._content_id
+
+    def spill(self, directory: str = EVIDENCE_SPILL_DIR, threshold: Optional[int] = None) -> Optional[str]:
+        """
+        Stream the decoded payload to <directory>/<cid> if it is larger than threshold
+        (default EVIDENCE_SPILL_BYTES), computing the CID on the way. Returns the path,
+        or None if the payload is small enough to stay in memory or does not decode.
+        """
+        threshold = EVIDENCE_SPILL_BYTES if threshold is None else threshold
+        if self._path or self.error or self.size_hint <= threshold:
+            return self._path
+        os.makedirs(directory, exist_ok=True)
+        h = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in self.iter_chunks():
+                    h.update(chunk)
+                    f.write(chunk)
+            self._content_id = sha256_to_content_id(h.hexdigest())
+            self._path = os.path.join(directory, self._content_id)
+            os.replace(tmp_path, self._path)
+        except binascii.Error as e:
+            os.unlink(tmp_path)
+            self.error = f"invalid base64: {e}"
+            return None
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self._raw = None
+        return self._path
+
+    def __repr__(self):
+        return f"EvidenceData(name='{self.name}')"
+
+
+class Evidence:
+    __slots__ = ('name', 'description', 'data_items')
+
+    def __init__(self, evidence_data: Dict):
+        self.name = evidence_data.get('name')
+        self.description = evidence_data.get('description')
+        self.data_items = [EvidenceData(data_item) for data_item in evidence_data.get('data', [])]
+
+    def __repr__(self):
+        return f"Evidence(name='{self.name}', data_items={len(self.data_items)})"
+
+
+class Claim:
+    __slots__ = ('bom_ref', 'target', 'predicate', 'mitigation_strategies', 'reasoning',
+                 'signature', 'evidence', 'requirement')
+
+    def __init__(self, claim_data: Dict, requirement: Optional[str] = None):
+        self.bom_ref = claim_data.get('bom-ref')
+        self.target = claim_data.get('target')
+        self.predicate = claim_data.get('predicate')
+        self.mitigation_strategies = claim_data.get('mitigationStrategies', [])
+        self.reasoning = claim_data.get('reasoning')
+        self.signature = claim_data.get('signature')
+        self.requirement = requirement
+
+        # Parse evidence objects
+        self.evidence = [Evidence(evidence_data) for evidence_data in claim_data.get('evidence', [])]
+
+    def __repr__(self):
+        return f"Claim(bom_ref='{self.bom_ref}')"
+
+
+class Attestation:
+    __slots__ = ('summary', 'assessor', 'claims')
+
+    def __init__(self, attestation_data: Dict):
+        self.summary = attestation_data.get('summary')
+        self.assessor = attestation_data.get('assessor')
+        self.claims = []
+
+        # Parse claims from map section
+        for map_item in attestation_data.get('map', []):
+            requirement = map_item.get('requirement')
+            for claim_data in map_item.get('claims', []):
+                self.claims.append(Claim(claim_data, requirement))
+
+    def __repr__(self):
+        return f"Attestation(summary='{self.summary}')"
+
+
+def _iter_items(json_file_path: str, prefix: str) -> Iterator:
+    """Yield the elements of the JSON array at prefix (ijson syntax, e.g. 'components.item')."""
+    if ijson is None:
+        with open(json_file_path, 'r') as f:
+            data = json.load(f)
+        node = data
+        for key in prefix.split('.')[:-1]:
+            node = node.get(key, {}) if isinstance(node, dict) else {}
+        yield from node or []
+        return
+
+    with open(json_file_path, 'rb') as f:
+        # use_float keeps numbers as float like json.load (ijson defaults to Decimal)
+        yield from ijson.items(f, prefix, use_float=True)
+
+
+def iter_components(json_file_path: str) -> Iterator[Component]:
+    for component_data in _iter_items(json_file_path, 'components.item'):
+        yield Component(component_data)
+
+
+def iter_dependencies(json_file_path: str) -> Iterator[Dependency]:
+    for dependency_data in _iter_items(json_file_path, 'dependencies.item'):
+        yield Dependency(dependency_data)
+
+
+def iter_assessors(json_file_path: str) -> Iterator[Assessor]:
+    for assessor_data in _iter_items(json_file_path, 'declarations.assessors.item'):
+        yield Assessor(assessor_data)
+
+
+def iter_attestations(json_file_path: str) -> Iterator[Attestation]:
+    for attestation_data in _iter_items(json_file_path, 'declarations.attestations.item'):
+        yield Attestation(attestation_data)
+
+
+def read_timestamp(json_file_path: str) -> Optional[str]:
+    if ijson is None:
+        with open(json_file_path, 'r') as f:
+            return json.load(f).get('metadata', {}).get('timestamp', None)
+
+    with open(json_file_path, 'rb') as f:
+        for timestamp in ijson.items(f, 'metadata.timestamp'):
+            return timestamp
+    return None
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def parse_cyclonedx_components(json_file_path: str) -> Tuple[List[Component], List[Dependency], List[Assessor], List[Attestation], Optional[str]]:
+    """
+    Parse components from a CycloneDX SBOM JSON file and return components with embedded security data, dependencies, assessors, and attestations.
+    Materializes every section; use the iter_* functions to stream large SBOMs.
+    """
+    components = list(iter_components(json_file_path))
+    dependencies = list(iter_dependencies(json_file_path))
+    assessors = list(iter_assessors(json_file_path))
+    attestations = list(iter_attestations(json_file_path))
+    timestamp = read_timestamp(json_file_path)
+
+    return components, dependencies, assessors, attestations, timestamp
@@ -0,0 +1,229 @@
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from cyclonedx import Dependency
+
+# dependency graph over the SBOM's `dependencies` section
+#
+# nodes are integer ids (refs are interned once), edges are stored as CSR adjacency
+# arrays in both directions: out = "depends on", in = "is depended on by".
+# topological order puts dependencies before their dependents, and each node's rank
+# in that order prunes reachability searches: X can only depend on Y if Y ranks lower.
+# a cyclic graph has no such order; reachability then uses the closures below.
+# full transitive closures are bitsets (python ints), computed on first use per node
+# and cached, since the whole closure of a 100k-node graph does not fit in memory
+
+
+_BIT_CHARS = bytes.maketrans(b'\x00\x01', b'01')
+
+
+class DependencyCycleError(ValueError):
+    def __init__(self, cycle: List[str]):
+        super().__init__(f"dependency cycle: {' -> '.join(cycle)}")
+        self.cycle = cycle
+
+
+def _csr(n: int, edges: Sequence[tuple]) -> tuple:
+    counts = array('i', bytes(4 * (n + 1)))
+    for source, _ in edges:
+        counts[source + 1] += 1
+    for i in range(n):
+        counts[i + 1] += counts[i]
+    targets = array('i', bytes(4 * len(edges)))
+    fill = array('i', counts)
+    for source, target in edges:
+        targets[fill[source]] = target
+        fill[source] += 1
+    return counts, targets
+
+
+class DependencyGraph:
+    def __init__(self, refs: List[str], edges: Sequence[tuple]):
+        self.refs = refs
+        self.ids: Dict[str, int] = {ref: i for i, ref in enumerate(refs)}
+        self.out_offsets, self.out_targets = _csr(len(refs), edges)
+        self.in_offsets, self.in_targets = _csr(len(refs), [(t, s) for s, t in edges])
+        self._order: Optional[List[int]] = None
+        self._cycle: Optional[List[str]] = None
+        self._rank: Optional[array] = None
+        self._closure: Dict[int, int] = {}
+        self._reverse_closure: Dict[int, int] = {}
+
+    @classmethod
+    def from_dependencies(cls, dependencies: Iterable[Dependency]) -> "DependencyGraph":
+        ids: Dict[str, int] = {}
+        edges = []
+        for dependency in dependencies:
+            source = ids.setdefault(dependency.ref, len(ids))
+            for dep_ref in dependency.depends_on:
+                edges.append((source, ids.setdefault(dep_ref, len(ids))))
+        return cls(list(ids), edges)
+
+    def __len__(self):
+        return len(self.refs)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.out_targets)
+
+    def depends_on(self, node: int) -> array:
+        return self.out_targets[self.out_offsets[node]:self.out_offsets[node + 1]]
+
+    def depended_on_by(self, node: int) -> array:
+        return self.in_targets[self.in_offsets[node]:self.in_offsets[node + 1]]
+
+    # Kahn's algorithm, dependencies first. on a cycle, the nodes on it and everything
+    # depending on them are left out
+    def _kahn_order(self) -> List[int]:
+        n = len(self.refs)
+        remaining = array('i', (self.out_offsets[i + 1] - self.out_offsets[i] for i in range(n)))
+        order = [i for i in range(n) if remaining[i] == 0]
+        in_offsets, in_targets = self.in_offsets, self.in_targets
+        for node in order:
+            for dependent in in_targets[in_offsets[node]:in_offsets[node + 1]]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    order.append(dependent)
+        return order
+
+    @staticmethod
+    def _ranks(order: List[int]) -> array:
+        rank = array('i', bytes(4 * len(order)))
+        for position, node in enumerate(order):
+            rank[node] = position
+        return rank
+
+    # raises DependencyCycleError on a cycle
+    def topological_order(self) -> List[int]:
+        if self._order is not None:
+            return self._order
+        if self._cycle is not None:
+            raise DependencyCycleError(self._cycle)
+        order = self._kahn_order()
+        if len(order) < len(self.refs):
+            self._cycle = [self.refs[i] for i in self.find_cycle()]
+            raise DependencyCycleError(self._cycle)
+        self._order, self._rank = order, self._ranks(order)
+        return order
+
+    # one cycle as a list of node ids (first node repeated at the end), or [] if acyclic
+    def find_cycle(self) -> List[int]:
+        WHITE, GREY, BLACK = 0, 1, 2
+        color = bytearray(len(self.refs))
+        for start in range(len(self.refs)):
+            if color[start] != WHITE:
+                continue
+            path, stack = [start], [iter(self.depends_on(start))]
+            color[start] = GREY
+            while stack:
+                child = next(stack[-1], None)
+                if child is None:
+                    color[path.pop()] = BLACK
+                    stack.pop()
+                elif color[child] == GREY:
+                    return path[path.index(child):] + [child]
+                elif color[child] == WHITE:
+                    color[child] = GREY
+                    path.append(child)
+                    stack.append(iter(self.depends_on(child)))
+        return []
+
+    def sort_dependencies(self, dependencies: Iterable[Dependency], allow_cycles: bool = False) -> List[Dependency]:
+        """
+        The dependency records in topological order, dependencies before dependents.
+        With allow_cycles, the records on a cycle or depending on one have no such order
+        and come last, in SBOM order, instead of raising DependencyCycleError.
+        """
+        try:
+            self.topological_order()
+            rank = self._rank
+        except DependencyCycleError:
+            if not allow_cycles:
+                raise
+            order = self._kahn_order()
+            placed = bytearray(len(self.refs))
+            for node in order:
+                placed[node] = 1
+            # node ids are in order of first appearance in the SBOM
+            rank = self._ranks(order + [node for node in range(len(self.refs)) if not placed[node]])
+        ids = self.ids
+        return sorted(dependencies, key=lambda dependency: rank[ids[dependency.ref]])
+
+    def _bitset(self, node: int, offsets: array, targets: array, cache: Dict[int, int]) -> int:
+        if node in cache:
+            return cache[node]
+        seen = bytearray(len(self.refs))
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            for child in targets[offsets[current]:offsets[current + 1]]:
+                if not seen[child]:
+                    seen[child] = 1
+                    stack.append(child)
+        # one byte per node -> int with bit i set for node i
+        bits = int(seen.translate(_BIT_CHARS)[::-1] or b'0', 2)
+        cache[node] = bits
+        return bits
+
+    # transitive dependencies of a node, as a bitset over node ids (cached)
+    def closure(self, node: int) -> int:
+        return self._bitset(node, self.out_offsets, self.out_targets, self._closure)
+
+    # everything that transitively depends on a node (cached)
+    def reverse_closure(self, node: int) -> int:
+        return self._bitset(node, self.in_offsets, self.in_targets, self._reverse_closure)
+
+    def reaches(self, source: int, target: int) -> bool:
+        """
+        True if source depends on target, directly or transitively. On a cyclic graph
+        there are no ranks to prune with: a cached closure answers, otherwise a plain
+        depth-first search that stops at target. A node on a cycle reaches itself.
+        """
+        try:
+            self.topological_order()
+            rank = self._rank
+        except DependencyCycleError:
+            rank = None
+        if rank is not None:
+            if source == target or rank[target] >= rank[source]:
+                return False
+        if source in self._closure:
+            return bool(self._closure[source] >> target & 1)
+        if target in self._reverse_closure:
+            return bool(self._reverse_closure[target] >> source & 1)
+
+        # depth-first from source, skipping nodes ranked at or below target's rank,
+        # which can not lead to it (nothing is skipped without ranks)
+        floor = rank[target] if rank is not None else None
+        offsets, targets = self.out_offsets, self.out_targets
+        seen = {source}
+        stack = [source]
+        while stack:
+            current = stack.pop()
+            for child in targets[offsets[current]:offsets[current + 1]]:
+                if child == target:
+                    return True
+                if child not in seen and (floor is None or rank[child] > floor):
+                    seen.add(child)
+                    stack.append(child)
+        return False
+
+    def _refs(self, bits: int) -> List[str]:
+        digits = bin(bits)[:1:-1]       # least significant bit first
+        refs = []
+        node = digits.find('1')
+        while node >= 0:
+            refs.append(self.refs[node])
+            node = digits.find('1', node + 1)
+        return refs
+
+    # ref-level queries
+    def transitive_dependencies(self, ref: str) -> List[str]:
+        return self._refs(self.closure(self.ids[ref]))
+
+    def affected_by(self, ref: str) -> List[str]:
+        """Everything that would need re-registering if ref changes."""
+        return self._refs(self.reverse_closure(self.ids[ref]))
+
+    def depends_on_ref(self, ref: str, dep_ref: str) -> bool:
+        return self.reaches(self.ids[ref], self.ids[dep_ref])
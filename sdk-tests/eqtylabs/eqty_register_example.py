@@ -1,386 +1,337 @@
-import json
-import base58
-import base64
-from typing import Dict, List, Optional
-
+import logging
+import os
+
+from cyclonedx import batched, iter_assessors, iter_attestations, iter_components, iter_dependencies, read_timestamp
+from sbom_index import SbomIndex
+from bulk_import import build_plan, register_plan
+from dep_graph import DependencyCycleError, DependencyGraph
+from instrument import Metrics
+from incremental_import import ImportState, claim_key, diff_sbom, merge_manifest
 from eqty_sdk import init, generate_manifest, purge_integrity_store
 from eqty_sdk import DID, DID_ALGORITHMS
 from eqty_sdk import Custom
 from eqty_sdk import Computation
 from eqty_sdk import Declaration
 
+# EQTY_LOG_LEVEL=DEBUG prints the full component / dependency / claim dumps. at the
+# default INFO level they are skipped entirely, which matters for large SBOMs.
+# EQTY_RUN_REPORT / EQTY_PROM_TEXTFILE write per-stage timings, counters and peak
+# memory as JSON / a Prometheus textfile (see instrument.py).
+# EQTY_INCREMENTAL=1 registers only what was added or changed since the last import,
+# according to the import state in EQTY_IMPORT_STATE (see incremental_import.py), and
+# merges its statements into the existing manifest.json. every run, full or
+# incremental, saves the state for the next one.
+# EQTY_BULK=1 validates everything first and registers it on a worker pool
+# (EQTY_BULK_WORKERS, default all cores) in one all-or-nothing store transaction,
+# instead of statement by statement (see bulk_import.py).
+# components are streamed from the SBOM (cyclonedx.iter_components) in batches of
+# EQTY_COMPONENT_BATCH, once for the import diff and once for registration, so memory
+# does not grow with the component count; only the Custom objects that claims attach
+# to are kept. the other sections are small and read whole. the bulk import validates
+# a complete plan before writing anything, so it reads the components into memory
+logging.basicConfig(level=os.environ.get("EQTY_LOG_LEVEL", "INFO").upper(), format="%(message)s")
+log = logging.getLogger("eqty_register_example")
+verbose = log.isEnabledFor(logging.DEBUG)
+metrics = Metrics("eqty_sbom_import")
+incremental = os.environ.get("EQTY_INCREMENTAL", "0") not in ("", "0")
+state_path = os.environ.get("EQTY_IMPORT_STATE", "cyclonedx_sbom.json.import_state.json")
+bulk = os.environ.get("EQTY_BULK", "0") not in ("", "0")
+bulk_workers = int(os.environ.get("EQTY_BULK_WORKERS", "0")) or None
+component_batch = int(os.environ.get("EQTY_COMPONENT_BATCH", "1000"))
+sbom_path = 'cyclonedx_sbom.json'
+
 init()
 
 did = DID.new(DID_ALGORITHMS.ED25519, name="Build system", description="The build system identifier used to register integrity statements")
 did.set_active()
 
-class Component:
-    def __init__(self, component_data: Dict):
-        self.name = component_data.get('name')
-        self.version = component_data.get('version')
-        self.type = component_data.get('type')
-        self.description = component_data.get('description')
-        self.supplier = component_data.get('supplier')
-        self.licenses = component_data.get('licenses', [])
-        self.purl = component_data.get('purl')
-        self.bom_ref = component_data.get('bom-ref')
-        self.security = ComponentSecurity(component_data, self.bom_ref)
-        self.integrity = None
-
-    def __repr__(self):
-        return f"Component(bom_ref='{self.bom_ref}')"
-
-
-class ComponentSecurity:
-    def __init__(self, component_data: Dict, bom_ref: str):
-        self.bom_ref = bom_ref
-        self.hashes = component_data.get('hashes', [])
-        self.signature = component_data.get('signature')
-        self.evidence = component_data.get('evidence')
-
-    def __repr__(self):
-        return f"ComponentSecurity(bom_ref='{self.bom_ref}')"
-
-
-class Assessor:
-    def __init__(self, assessor_data: Dict):
-        self.bom_ref = assessor_data.get('bom-ref')
-        self.third_party = assessor_data.get('thirdParty', False)
-        self.organization_name = assessor_data.get('organizationName')
-        self.organization_email = assessor_data.get('organizationEmail')
-        
-        # Flatten individual fields
-        individual = assessor_data.get('individual', {})
-        self.individual_name = individual.get('name')
-        self.individual_email = individual.get('email')
-
-    def __repr__(self):
-        return f"Assessor(bom_ref='{self.bom_ref}')"
-
-
-class EvidenceData:
-    def __init__(self, data_item: Dict):
-        self.name = data_item.get('name')
-        self.media_type = data_item.get('mediaType')
-        self.encoding = data_item.get('encoding')
-        self.data = data_item.get('data')
-        
-        # Decode base64 data if present
-        self.decoded_data = None
-        if self.encoding == 'base64' and self.data:
-            try:
-                self.decoded_data = base64.b64decode(self.data).decode('utf-8')
-            except Exception as e:
-                self.decoded_data = f"Failed to decode: {e}"
-
-    def __repr__(self):
-        return f"EvidenceData(name='{self.name}')"
-
-
-class Evidence:
-    def __init__(self, evidence_data: Dict):
-        self.name = evidence_data.get('name')
-        self.description = evidence_data.get('description')
-        self.data_items = []
-        
-        for data_item in evidence_data.get('data', []):
-            evidence_data_obj = EvidenceData(data_item)
-            self.data_items.append(evidence_data_obj)
-
-    def __repr__(self):
-        return f"Evidence(name='{self.name}', data_items={len(self.data_items)})"
-
-
-class Claim:
-    def __init__(self, claim_data: Dict):
-        self.bom_ref = claim_data.get('bom-ref')
-        self.target = claim_data.get('target')
-        self.predicate = claim_data.get('predicate')
-        self.mitigation_strategies = claim_data.get('mitigationStrategies', [])
-        self.reasoning = claim_data.get('reasoning')
-        self.signature = claim_data.get('signature')
-        
-        # Parse evidence objects
-        self.evidence = []
-        for evidence_data in claim_data.get('evidence', []):
-            evidence_obj = Evidence(evidence_data)
-            self.evidence.append(evidence_obj)
-
-    def __repr__(self):
-        return f"Claim(bom_ref='{self.bom_ref}')"
-
-
-class Attestation:
-    def __init__(self, attestation_data: Dict):
-        self.summary = attestation_data.get('summary')
-        self.assessor = attestation_data.get('assessor')
-        self.claims = []
-        
-        # Parse claims from map section
-        for map_item in attestation_data.get('map', []):
-            requirement = map_item.get('requirement')
-            for claim_data in map_item.get('claims', []):
-                claim = Claim(claim_data)
-                claim.requirement = requirement  # Add requirement to claim
-                self.claims.append(claim)
-
-    def __repr__(self):
-        return f"Attestation(summary='{self.summary}')"
-
-
-def parse_cyclonedx_components(json_file_path: str):
-    """
-    Parse components from a CycloneDX SBOM JSON file and return components with embedded security data, dependencies, assessors, and attestations.
-    """
-    with open(json_file_path, 'r') as f:
-        sbom_data = json.load(f)
-    
-    components = []
-    
-    for component_data in sbom_data.get('components', []):
-        component = Component(component_data)
-        components.append(component)
-    
-    dependencies = sbom_data.get('dependencies', [])
-    
-    # Parse declarations section
-    declarations = sbom_data.get('declarations', {})
-    
-    # Parse assessors
-    assessors = []
-    for assessor_data in declarations.get('assessors', []):
-        assessor = Assessor(assessor_data)
-        assessors.append(assessor)
-    
-    # Parse attestations
-    attestations = []
-    for attestation_data in declarations.get('attestations', []):
-        attestation = Attestation(attestation_data)
-        attestations.append(attestation)
-
-    # Parse timestamp
-    timestamp = sbom_data.get('metadata', {}).get('timestamp', None)
-    
-    return components, dependencies, assessors, attestations, timestamp
-
-
-def sha256_to_content_id(sha256_hash: str) -> str:
-    """
-    Convert a SHA-256 hash into a proper IPFS CID (Content Identifier).
-    
-    CID structure: <cidv1-multicodec><content-type-multicodec><content-multihash>
-    - CIDv1 multicodec: 0x01
-    - Content type multicodec (raw): 0x55
-    - Multihash: <hash-function-code><digest-length><digest>
-      - SHA-256 function code: 0x12
-      - Digest length: 32 bytes (0x20)
-    """
-    # Convert hex string to bytes
-    hash_bytes = bytes.fromhex(sha256_hash)
-    
-    # Build multihash: <hash-function-code><digest-length><digest>
-    # SHA-256 function code: 0x12, digest length: 32 (0x20)
-    multihash = bytes([0x12, 0x20]) + hash_bytes
-    
-    # Build CIDv1: <cidv1-multicodec><content-type-multicodec><multihash>
-    # CIDv1 multicodec: 0x01, raw content type: 0x55
-    cid_bytes = bytes([0x01, 0x55]) + multihash
-    
-    # Encode as base58btc with 'z' prefix
-    return 'z' + base58.b58encode(cid_bytes).decode('ascii')
-
-
-# Parse components from the SBOM file
-components, dependencies, assessors, attestations, timestamp = parse_cyclonedx_components('cyclonedx_sbom.json')
-
-# Create a map with bom-ref as key and Component as value
-component_map = {component.bom_ref: component for component in components}
-
-# Create a map with bom-ref as key and content ID as value
-def get_content_id_for_component(component):
-    """Get the content ID for a component if it has a SHA-256 hash."""
-    if component.security.hashes:
-        for hash_data in component.security.hashes:
-            if hash_data.get('alg') == 'SHA-256':
-                return sha256_to_content_id(hash_data.get('content'))
-    return None
-
-content_id_map = {component.bom_ref: get_content_id_for_component(component) for component in components}
+# Parse everything but the components, which are streamed where they are used
+with metrics.stage("parse"):
+    dependencies = list(iter_dependencies(sbom_path))
+    assessors = list(iter_assessors(sbom_path))
+    attestations = list(iter_attestations(sbom_path))
+    timestamp = read_timestamp(sbom_path)
+
+# Content IDs for every component, computed once and cached next to the SBOM
+with metrics.stage("index"):
+    sbom_index = SbomIndex.load_or_build(sbom_path)
+
+# What to register: everything, or only what changed since the last import
+with metrics.stage("diff"):
+    previous_state = ImportState.load(state_path) if incremental else ImportState()
+    if len(previous_state) and not os.path.exists("manifest.json"):
+        # the reused CIDs would point at statements no manifest carries
+        log.warning(f"{state_path} has no manifest.json next to it, registering everything")
+        previous_state = ImportState()
+    import_diff = diff_sbom(previous_state, iter_components(sbom_path), dependencies, assessors, attestations, sbom_index)
 
 # Display the parsed components
-print(f"Parsed {len(components)} components from CycloneDX SBOM:")
-for component in components:
-    print(f"  - {component}")
-    print(f"    name: {component.name}")
-    print(f"    version: {component.version}")
-    print(f"    type: {component.type}")
-    print(f"    description: {component.description}")
-    print(f"    supplier: {component.supplier}")
-    print(f"    licenses: {component.licenses}")
-    print(f"    purl: {component.purl}")
-    print(f"    bom_ref: {component.bom_ref}")
-    print(f"    security: {component.security}")
-    if component.security.hashes:
-        print(f"      hashes: {component.security.hashes}")
-        for hash_data in component.security.hashes:
-            if hash_data.get('alg') == 'SHA-256':
-                content_id = sha256_to_content_id(hash_data.get('content'))
-                print(f"      content_id: {content_id}")
-    if component.security.signature:
-        print(f"      signature: {component.security.signature}")
-    if component.security.evidence:
-        print(f"      evidence: {component.security.evidence}")
-    print()
-
-print(f"\nComponent map has {len(component_map)} entries:")
-for bom_ref, component in component_map.items():
-    print(f"  {bom_ref} -> {component.name} v{component.version}")
-
-# Create data statement for each component
-for component in components:
-    content_id = ""
-    if component.security.hashes:
-        for hash_data in component.security.hashes:
-            if hash_data.get('alg') == 'SHA-256':
-                content_id = sha256_to_content_id(hash_data.get('content'))
-                break
-    
-    data_integrity = Custom.from_cid(content_id, component.type,
-        name=component.name,
-        version=component.version,
-        type=component.type,
-        description=component.description,
-        supplier=component.supplier["name"],
-        licenses=component.licenses[0]["license"]["id"],
-        purl=component.purl,
-        bom_ref=component.bom_ref
-    )
-
-    component.integrity = data_integrity
-
-# Create computation statements from component dependency relationships
-print(f"\nDependency relationships by Content ID:")
-for dependency in dependencies:
-    ref = dependency.get('ref')
-    depends_on = dependency.get('dependsOn', [])
-    
-    ref_content_id = content_id_map.get(ref, 'No Content ID')
-    ref_component = component_map.get(ref)
-    ref_name = ref_component.name if ref_component else 'Unknown'
-
-    computation_kwargs = {
-        "name": f"{ref_name} build",
-        "description": f"The building of {ref_name}"
-    }
-    
-    computation = Computation.new(**computation_kwargs).add_output_cid(ref_content_id)
-    
-    for dep_ref in depends_on:
-        dep_content_id = content_id_map.get(dep_ref, 'No Content ID')
-        dep_component = component_map.get(dep_ref)
-        dep_name = dep_component.name if dep_component else 'Unknown'
-        print(f"    depends on -> {dep_name} ({dep_content_id})")
-
-        computation.add_input_cid(dep_content_id)
-
-    print()
-    
-    computation.finalize()
+log.info(f"Parsed {len(sbom_index)} components, {len(dependencies)} dependencies, "
+         f"{len(assessors)} assessors and {len(attestations)} attestations from CycloneDX SBOM")
+if verbose:
+    for component in iter_components(sbom_path):
+        log.debug(f"  - {component}")
+        log.debug(f"    name: {component.name}")
+        log.debug(f"    version: {component.version}")
+        log.debug(f"    type: {component.type}")
+        log.debug(f"    description: {component.description}")
+        log.debug(f"    supplier: {component.supplier}")
+        log.debug(f"    licenses: {component.licenses}")
+        log.debug(f"    purl: {component.purl}")
+        log.debug(f"    bom_ref: {component.bom_ref}")
+        log.debug(f"    security: {component.security}")
+        if component.security.hashes:
+            log.debug(f"      hashes: {component.security.hashes}")
+            content_id = sbom_index.content_id(component.bom_ref)
+            if content_id:
+                log.debug(f"      content_id: {content_id}")
+        if component.security.signature:
+            log.debug(f"      signature: {component.security.signature}")
+        if component.security.evidence:
+            log.debug(f"      evidence: {component.security.evidence}")
+        log.debug("")
+
+    log.debug(f"\nComponent index has {len(sbom_index)} entries:")
+    for entry in sbom_index.entries:
+        log.debug(f"  {entry.bom_ref} -> {entry.name} v{entry.version}")
+
+# Bulk import: the same statements, validated up front and registered on a worker
+# pool in one all-or-nothing store transaction. everything it registers is recorded
+# in import_diff, so the one-by-one sections below find nothing left to register
+if bulk:
+    bulk_keys = {"components": lambda s: s.component.bom_ref, "computations": lambda s: s.ref,
+                 "assessors": lambda a: a.bom_ref, "declarations": lambda s: claim_key(s.claim)}
+    with metrics.stage("register.bulk"):
+        plan = build_plan(import_diff.select("components", iter_components(sbom_path), lambda c: c.bom_ref),
+                          import_diff.select("computations", dependencies, lambda d: d.ref),
+                          import_diff.select("assessors", assessors, lambda a: a.bom_ref),
+                          attestations, timestamp, sbom_index,
+                          include_claim=lambda claim: import_diff.needs("declarations", claim_key(claim)))
+        bulk_report = register_plan(plan, bulk_workers, record=lambda phase, item, statement: import_diff.record(
+            phase, bulk_keys[phase](item), statement))
+    for phase, counter in (("components", "custom"), ("computations", "computation"),
+                           ("assessors", "did"), ("declarations", "declaration")):
+        metrics.count(f"statements.{counter}", bulk_report["phases"].get(phase, {}).get("statements", 0))
+    log.info(f"bulk registration: {bulk_report['statements']} statements on {bulk_report['workers']} workers, "
+             f"{bulk_report['phases'].get('computations', {}).get('waves', 0)} computation waves, "
+             f"{bulk_report['statements_per_sec']} statements/s")
+
+# Create data statement for each component, batch by batch; declarations attach to
+# the ones claims target, so those are kept by bom-ref
+claim_targets = {claim.target for attestation in attestations for claim in attestation.claims}
+claim_integrity = {}
+with metrics.stage("register.custom"):
+    stream = iter_components(sbom_path) if import_diff.remaining("components") else ()
+    for batch in batched(stream, component_batch):
+        register_components = import_diff.select("components", batch, lambda c: c.bom_ref)
+        for component in register_components:
+            content_id = sbom_index.content_id(component.bom_ref, "")
+
+            data_integrity = Custom.from_cid(content_id, component.type,
+                name=component.name,
+                version=component.version,
+                type=component.type,
+                description=component.description,
+                supplier=component.supplier["name"],
+                licenses=component.licenses[0]["license"]["id"],
+                purl=component.purl,
+                bom_ref=component.bom_ref
+            )
+
+            if component.bom_ref in claim_targets:
+                claim_integrity[component.bom_ref] = data_integrity
+            import_diff.record("components", component.bom_ref, data_integrity)
+        metrics.count("statements.custom", len(register_components))
+
+# Create computation statements from component dependency relationships,
+# dependencies before the components that depend on them. a cycle has no such order,
+# so what is on it (or depends on it) is registered last, in SBOM order
+with metrics.stage("dependency_graph"):
+    dependency_graph = DependencyGraph.from_dependencies(dependencies)
+    register_dependencies = import_diff.select("computations", dependencies, lambda d: d.ref)
+    try:
+        ordered_dependencies = dependency_graph.sort_dependencies(register_dependencies)
+    except DependencyCycleError as e:
+        log.warning(f"{e}; registering the dependencies on or behind it in SBOM order")
+        metrics.count("dependency_cycles")
+        ordered_dependencies = dependency_graph.sort_dependencies(register_dependencies, allow_cycles=True)
+if verbose:
+    log.debug(f"\nDependency relationships by Content ID:")
+with metrics.stage("register.computation"):
+    for dependency in ordered_dependencies:
+        ref = dependency.ref
+        depends_on = dependency.depends_on
+
+        ref_content_id = sbom_index.content_id(ref, 'No Content ID')
+        ref_entry = sbom_index.get(ref)
+        ref_name = ref_entry.name if ref_entry else 'Unknown'
+
+        computation_kwargs = {
+            "name": f"{ref_name} build",
+            "description": f"The building of {ref_name}"
+        }
+
+        computation = Computation.new(**computation_kwargs).add_output_cid(ref_content_id)
+
+        for dep_ref in depends_on:
+            dep_content_id = sbom_index.content_id(dep_ref, 'No Content ID')
+            if verbose:
+                dep_entry = sbom_index.get(dep_ref)
+                dep_name = dep_entry.name if dep_entry else 'Unknown'
+                log.debug(f"    depends on -> {dep_name} ({dep_content_id})")
+
+            computation.add_input_cid(dep_content_id)
+
+        if verbose:
+            log.debug("")
+
+        computation.finalize()
+        import_diff.record("computations", ref, computation)
+    metrics.count("statements.computation", len(ordered_dependencies))
 
 # Create DIDs from assessors
-print(f"\nParsed {len(assessors)} assessors:")
-for assessor in assessors:
-    print(f"  - {assessor}")
-    print(f"    organization_name: {assessor.organization_name}")
-    print(f"    organization_email: {assessor.organization_email}")
-    print(f"    individual_name: {assessor.individual_name}")
-    print(f"    individual_email: {assessor.individual_email}")
-    print(f"    third_party: {assessor.third_party}")
-    print(f"    bom_ref: {assessor.bom_ref}")
-    print()
-
-    DID.new(DID_ALGORITHMS.ED25519,
-        organization_name=assessor.organization_name,
-        organization_email=assessor.organization_email,
-        individual_name=assessor.individual_name,
-        individual_email=assessor.individual_email,
-        third_party=assessor.third_party,
-        bom_ref=assessor.bom_ref
-    )
+if verbose:
+    log.debug(f"\nParsed {len(assessors)} assessors:")
+with metrics.stage("register.did"):
+    register_assessors = import_diff.select("assessors", assessors, lambda a: a.bom_ref)
+    for assessor in register_assessors:
+        if verbose:
+            log.debug(f"  - {assessor}")
+            log.debug(f"    organization_name: {assessor.organization_name}")
+            log.debug(f"    organization_email: {assessor.organization_email}")
+            log.debug(f"    individual_name: {assessor.individual_name}")
+            log.debug(f"    individual_email: {assessor.individual_email}")
+            log.debug(f"    third_party: {assessor.third_party}")
+            log.debug(f"    bom_ref: {assessor.bom_ref}")
+            log.debug("")
+
+        assessor_did = DID.new(DID_ALGORITHMS.ED25519,
+            organization_name=assessor.organization_name,
+            organization_email=assessor.organization_email,
+            individual_name=assessor.individual_name,
+            individual_email=assessor.individual_email,
+            third_party=assessor.third_party,
+            bom_ref=assessor.bom_ref
+        )
+        import_diff.record("assessors", assessor.bom_ref, assessor_did)
+    metrics.count("statements.did", len(register_assessors))
 
 # Create declarations from attestations
-print(f"\nParsed {len(attestations)} attestations:")
-for attestation in attestations:
-    print(f"  - {attestation}")
-    print(f"    summary: {attestation.summary}")
-    print(f"    assessor: {attestation.assessor}")
-    print(f"    claims ({len(attestation.claims)}):")
-    for claim in attestation.claims:
-        print(f"      - {claim}")
-        print(f"        requirement: {claim.requirement}")
-        print(f"        target: {claim.target}")
-        print(f"        predicate: {claim.predicate}")
-        print(f"        reasoning: {claim.reasoning}")
-        print(f"        mitigation_strategies: {claim.mitigation_strategies}")
-        print(f"        evidence: {len(claim.evidence)} items")
-        for evidence in claim.evidence:
-            print(f"          - {evidence}")
-            print(f"            description: {evidence.description}")
-            for data_item in evidence.data_items:
-                print(f"            data: {data_item}")
-                print(f"              name: {data_item.name}")
-                print(f"              media_type: {data_item.media_type}")
-                print(f"              encoding: {data_item.encoding}")
-                print(f"              data: {data_item.data}")
-                if data_item.decoded_data:
-                    print(f"              decoded_data: {data_item.decoded_data}")
-        if claim.signature:
-            print(f"        signature: {claim.signature.get('algorithm', 'N/A')}")
-        
-        # Create EQTY Declaration for each claim
-        target_content_id = content_id_map.get(claim.target, 'No Content ID')
-        
-        # Map CycloneDX claim to EQTY Declaration structure
-        declaration_data = {
-            "type": "declaration",  # CycloneDX.declarations.claims
-            "subjectLine": claim.predicate,  # CycloneDX.declarations.claims.predicate
-            "statement": claim.reasoning,  # CycloneDX.declarations.claims.reasoning
-            "submittedAt": timestamp,  # CycloneDX.metadata.timestamp
-            "submittedBy": f"assessor:{attestation.assessor}",  # CycloneDX.declarations.attestations.assessor
-            "attachmentCid": [item.decoded_data for evidence in claim.evidence for item in evidence.data_items if item.decoded_data],  # CycloneDX.declarations.claims.evidence
-            "controlCid": [claim.requirement],  # CycloneDX.declarations.attestations.map.requirement
-            "extra": {
-                "target": claim.target,
-                "bom_ref": claim.bom_ref,
-                "mitigation_strategies": claim.mitigation_strategies,
-                "signature": claim.signature
+if verbose:
+    log.debug(f"\nParsed {len(attestations)} attestations:")
+with metrics.stage("register.declaration"):
+    for attestation in attestations:
+        if verbose:
+            log.debug(f"  - {attestation}")
+            log.debug(f"    summary: {attestation.summary}")
+            log.debug(f"    assessor: {attestation.assessor}")
+            log.debug(f"    claims ({len(attestation.claims)}):")
+        for claim in attestation.claims:
+            if not import_diff.needs("declarations", claim_key(claim)):
+                continue
+            if verbose:
+                log.debug(f"      - {claim}")
+                log.debug(f"        requirement: {claim.requirement}")
+                log.debug(f"        target: {claim.target}")
+                log.debug(f"        predicate: {claim.predicate}")
+                log.debug(f"        reasoning: {claim.reasoning}")
+                log.debug(f"        mitigation_strategies: {claim.mitigation_strategies}")
+                log.debug(f"        evidence: {len(claim.evidence)} items")
+                for evidence in claim.evidence:
+                    log.debug(f"          - {evidence}")
+                    log.debug(f"            description: {evidence.description}")
+                    for data_item in evidence.data_items:
+                        log.debug(f"            data: {data_item}")
+                        log.debug(f"              name: {data_item.name}")
+                        log.debug(f"              media_type: {data_item.media_type}")
+                        log.debug(f"              encoding: {data_item.encoding}")
+                        log.debug(f"              data: {data_item.data}")
+                        if data_item.decoded_data:
+                            log.debug(f"              decoded_data: {data_item.decoded_data}")
+                if claim.signature:
+                    log.debug(f"        signature: {claim.signature.get('algorithm', 'N/A')}")
+
+            # Create EQTY Declaration for each claim
+            # large payloads are streamed to disk (and hashed on the way) instead of decoded in memory
+            for data_item in (item for evidence in claim.evidence for item in evidence.data_items):
+                data_item.spill()
+                if data_item.content_id is None and data_item.error:
+                    log.warning(f"claim {claim_key(claim)}: skipping attachment {data_item.name}: {data_item.error}")
+                    metrics.count("attachments.invalid")
+            target_content_id = sbom_index.content_id(claim.target, 'No Content ID')
+
+            # Map CycloneDX claim to EQTY Declaration structure
+            declaration_data = {
+                "type": "declaration",  # CycloneDX.declarations.claims
+                "subjectLine": claim.predicate,  # CycloneDX.declarations.claims.predicate
+                "statement": claim.reasoning,  # CycloneDX.declarations.claims.reasoning
+                "submittedAt": timestamp,  # CycloneDX.metadata.timestamp
+                "submittedBy": f"assessor:{attestation.assessor}",  # CycloneDX.declarations.attestations.assessor
+                "attachmentCid": [item.content_id for evidence in claim.evidence for item in evidence.data_items if item.content_id],  # CycloneDX.declarations.claims.evidence
+                "controlCid": [claim.requirement],  # CycloneDX.declarations.attestations.map.requirement
+                "extra": {
+                    "target": claim.target,
+                    "bom_ref": claim.bom_ref,
+                    "mitigation_strategies": claim.mitigation_strategies,
+                    "signature": claim.signature
+                }
             }
-        }
-        
-        print()
-        print(f"        Created Declaration (target_content_id: {target_content_id}):")
-        print(f"          type: {declaration_data['type']}")
-        print(f"          subjectLine: {declaration_data['subjectLine']}")
-        print(f"          statement: {declaration_data['statement']}")
-        print(f"          submittedAt: {declaration_data['submittedAt']}") # TODO
-        print(f"          submittedBy: {declaration_data['submittedBy']}") # TODO
-        print(f"          attachmentCid: {declaration_data['attachmentCid']}") # TODO
-        print(f"          controlCid: {declaration_data['controlCid']}") # TODO
-        print(f"          extra: {declaration_data['extra']}")
-        print()
-
-        declaration = Declaration.new(declaration_data['subjectLine'], declaration_data['statement']) \
-            .add_extra("target", declaration_data['extra']['target']) \
-            .add_extra("bom_ref", declaration_data['extra']['bom_ref']) \
-            .add_extra("mitigation_strategies", declaration_data['extra']['mitigation_strategies']) \
-            .add_extra("signature", declaration_data['extra']['signature']) \
-            .finalize()
-            # .add_attachment_cid(cid) \
-            # .add_control_cid(cid) \
-        component_map.get(declaration_data['extra']['target']).integrity.add_declaration(declaration)
-
-    print()
+
+            # submittedAt, submittedBy and controlCid are logged for reference only:
+            # Declaration.finalize() sets submittedAt / submittedBy to the signing time and
+            # the active signer's DID, and the claim's requirement is a bom-ref, not a CID
+            if verbose:
+                log.debug("")
+                log.debug(f"        Created Declaration (target_content_id: {target_content_id}):")
+                log.debug(f"          type: {declaration_data['type']}")
+                log.debug(f"          subjectLine: {declaration_data['subjectLine']}")
+                log.debug(f"          statement: {declaration_data['statement']}")
+                log.debug(f"          submittedAt: {declaration_data['submittedAt']} (SBOM; not registered)")
+                log.debug(f"          submittedBy: {declaration_data['submittedBy']} (SBOM; not registered)")
+                log.debug(f"          attachmentCid: {declaration_data['attachmentCid']}")
+                log.debug(f"          controlCid: {declaration_data['controlCid']} (bom-ref; not registered)")
+                log.debug(f"          extra: {declaration_data['extra']}")
+                log.debug("")
+
+            declaration = Declaration.new(declaration_data['subjectLine'], declaration_data['statement']) \
+                .add_extra("target", declaration_data['extra']['target']) \
+                .add_extra("bom_ref", declaration_data['extra']['bom_ref']) \
+                .add_extra("mitigation_strategies", declaration_data['extra']['mitigation_strategies']) \
+                .add_extra("signature", declaration_data['extra']['signature'])
+            for attachment_cid in declaration_data['attachmentCid']:
+                declaration.add_attachment_cid(attachment_cid)
+            declaration = declaration.finalize()
+            claim_integrity[declaration_data['extra']['target']].add_declaration(declaration)
+            import_diff.record("declarations", claim_key(claim), declaration)
+            metrics.count("statements.declaration")
+            metrics.count("attachments", len(declaration_data['attachmentCid']))
+
+        if verbose:
+            log.debug("")
 
 # Export manifest
-generate_manifest("manifest.json")
-purge_integrity_store()
\ No newline at end of file
+with metrics.stage("generate_manifest"):
+    if len(import_diff.previous):
+        generate_manifest("manifest.delta.json")
+        merge_manifest("manifest.json", "manifest.delta.json")
+    else:
+        generate_manifest("manifest.json")
+purge_integrity_store()
+import_diff.next_state(sbom_index.sbom_sha256).save(state_path)
+
+# What was registered and what kept its CID from an earlier import
+diff_summary = import_diff.summary()
+for kind, counts in diff_summary["kinds"].items():
+    metrics.count(f"skipped.{kind}", counts["skipped"])
+    log.info(f"{kind}: registered {counts['registered']} ({counts['added']} added, {counts['changed']} changed"
+             + (f", {diff_summary['reopened_components']} reopened for new declarations" if kind == "components" else "")
+             + (f", {diff_summary['reattached_declarations']} reattached to registered components" if kind == "declarations" else "")
+             + f"), skipped {counts['skipped']} unchanged, dropped {counts['removed']} removed")
+if verbose:
+    log.debug(f"\nImport diff: {import_diff.details()}")
+
+report = metrics.write_json(os.environ["EQTY_RUN_REPORT"]) if os.environ.get("EQTY_RUN_REPORT") else metrics.report()
+if os.environ.get("EQTY_PROM_TEXTFILE"):
+    metrics.write_prometheus(os.environ["EQTY_PROM_TEXTFILE"])
+log.info(f"Registered {sum(v for k, v in report['counters'].items() if k.startswith('statements.'))} statements "
+         f"in {report['wall_seconds']}s, peak memory {report['peak_rss_mb']} MB")
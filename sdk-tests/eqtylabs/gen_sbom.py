@@ -0,0 +1,98 @@
+import base64
+import hashlib
+import json
+import random
+from typing import Iterable
+
+# synthetic CycloneDX 1.6 SBOMs shaped like cyclonedx_sbom.json, for benchmarks
+#
+#   python gen_sbom.py 100000 sbom_100k.json
+#
+# written item by item, so generating a huge SBOM does not need it in memory.
+# component i depends on up to `fanout` earlier components, so the dependency graph
+# is a DAG; every `claim_every`-th component gets an attestation claim with evidence.
+# `changed` components get a different SHA-256, as in a later revision of the same SBOM
+
+
+def _component(i: int, changed: bool = False) -> dict:
+    name = f"component-{i}"
+    version = f"{i % 7}.{i % 13}.{i % 5}"
+    return {
+        "type": "library",
+        "bom-ref": f"{name}@{version}",
+        "name": name,
+        "version": version,
+        "description": f"Synthetic component {i}",
+        "supplier": {"name": f"Supplier {i % 50}"},
+        "licenses": [{"license": {"id": ("MIT", "Apache-2.0", "BSD-3-Clause")[i % 3]}}],
+        "purl": f"pkg:generic/supplier{i % 50}/{name}@{version}",
+        "hashes": [{"alg": "SHA-256", "content": hashlib.sha256(f"{name}@{version}{'+1' if changed else ''}".encode()).hexdigest()}],
+        "signature": {
+            "algorithm": "Ed25519",
+            "keyId": f"supplier-{i % 50}-signing-key",
+            "value": base64.b64encode(hashlib.sha256(str(i).encode()).digest()).decode(),
+        },
+        "evidence": {"identity": {"field": "purl", "confidence": 1.0}},
+    }
+
+
+def _bom_ref(i: int) -> str:
+    return f"component-{i}@{i % 7}.{i % 13}.{i % 5}"
+
+
+def write_sbom(path: str, n_components: int, fanout: int = 3, claim_every: int = 100,
+               evidence_bytes: int = 256, seed: int = 0, changed: Iterable[int] = ()) -> None:
+    rng = random.Random(seed)
+    changed = set(changed)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"bomFormat": "CycloneDX", "specVersion": "1.6", '
+                '"serialNumber": "urn:uuid:00000000-0000-0000-0000-000000000000", "version": 1, '
+                '"metadata": {"timestamp": "2025-06-26T18:06:17.347826Z"},\n')
+
+        f.write('"components": [\n')
+        for i in range(n_components):
+            f.write((",\n" if i else "") + json.dumps(_component(i, i in changed)))
+        f.write("\n],\n")
+
+        f.write('"dependencies": [\n')
+        for i in range(n_components):
+            depends_on = sorted({_bom_ref(rng.randrange(i)) for _ in range(min(fanout, i))})
+            f.write((",\n" if i else "") + json.dumps({"ref": _bom_ref(i), "dependsOn": depends_on}))
+        f.write("\n],\n")
+
+        assessors = [
+            {"bom-ref": "synthetic-security-team", "thirdParty": False,
+             "organizationName": "Synthetic Security Team", "organizationEmail": "security@example.com",
+             "individual": {"name": "Jane Security", "email": "jane@example.com"}},
+            {"bom-ref": "synthetic-auditor", "thirdParty": True,
+             "organizationName": "Synthetic Auditor", "organizationEmail": "audit@example.com"},
+        ]
+        f.write('"declarations": {"assessors": ' + json.dumps(assessors) + ', "attestations": [\n')
+        f.write('{"summary": "Synthetic assessment", "assessor": "synthetic-security-team", "map": [\n')
+        for n, i in enumerate(range(0, n_components, claim_every)):
+            payload = base64.b64encode(json.dumps({"component": i, "pad": "x" * evidence_bytes}).encode()).decode()
+            claim = {
+                "bom-ref": f"claim-{i}",
+                "target": _bom_ref(i),
+                "predicate": "No critical vulnerabilities found",
+                "mitigationStrategies": [{"name": "Regular updates", "description": "Automated patching"}],
+                "reasoning": "Synthetic scan",
+                "evidence": [{"name": "Scan report", "description": "Synthetic scan output",
+                              "data": [{"name": f"scan-{i}.json", "mediaType": "application/json",
+                                        "encoding": "base64", "data": payload}]}],
+            }
+            f.write((",\n" if n else "") + json.dumps({"requirement": f"req-{i % 10}", "claims": [claim]}))
+        f.write("\n]}\n]}\n}\n")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="generate a synthetic CycloneDX SBOM")
+    parser.add_argument("components", type=int)
+    parser.add_argument("out")
+    parser.add_argument("--fanout", type=int, default=3)
+    parser.add_argument("--claim-every", type=int, default=100)
+    parser.add_argument("--evidence-bytes", type=int, default=256)
+    args = parser.parse_args()
+    write_sbom(args.out, args.components, args.fanout, args.claim_every, args.evidence_bytes)
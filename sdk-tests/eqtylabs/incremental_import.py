@@ -0,0 +1,254 @@
+import hashlib
+import json
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, TypeVar
+
+from cyclonedx import Assessor, Attestation, Claim, Component, Dependency
+from sbom_index import SbomIndex
+
+# diff-based re-import of an SBOM revision
+#
+# a full import registers every component, dependency computation, assessor DID and
+# claim declaration again, although between two builds most of them are unchanged.
+# the import state, saved next to the SBOM after each run, keeps a fingerprint and the
+# statement CID of every item the store has seen:
+#   components    bom-ref -> the content ID and metadata Custom.from_cid registers
+#   computations  ref -> the output CID and the sorted input CIDs (the dependency
+#                 edge set in content-ID terms, so a changed hash changes every
+#                 computation it is an input or output of)
+#   assessors     bom-ref -> the DID fields
+#   declarations  claim bom-ref -> predicate, reasoning, extras, evidence CIDs and the
+#                 target's content ID
+# diff_sbom() fingerprints the new revision and marks only added or changed items for
+# registration; unchanged ones keep the CIDs they were registered under, and items
+# gone from the SBOM are dropped from the state. a declaration is attached to its
+# target's Custom object, so a component that gets a new declaration is registered
+# again with it ("reopened" in the summary), and a component that is registered again
+# for any reason gets its unchanged declarations registered again too ("reattached"),
+# since the new Custom statement would otherwise carry only the changed ones.
+# an incremental run's store holds only what it registered, so its manifest is merged
+# into the previous one (merge_manifest) rather than replacing it; the reused CIDs
+# resolve through the statements the earlier runs exported.
+# an empty state makes every item "added", which is what a full import records, so
+# any run can be the baseline for the next incremental one
+
+STATE_VERSION = 1
+KINDS = ("components", "computations", "assessors", "declarations")
+
+T = TypeVar("T")
+
+
+def _fingerprint(fields) -> str:
+    data = json.dumps(fields, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def component_fingerprint(component: Component, content_id: Optional[str]) -> str:
+    supplier = component.supplier["name"] if component.supplier else None
+    license_id = component.licenses[0]["license"].get("id") if component.licenses else None
+    return _fingerprint([content_id, component.name, component.version, component.type,
+                         component.description, supplier, license_id, component.purl])
+
+
+def computation_fingerprint(name: Optional[str], output_cid: Optional[str], input_cids: Iterable[str]) -> str:
+    return _fingerprint([name, output_cid, sorted(cid or "" for cid in input_cids)])
+
+
+def assessor_fingerprint(assessor: Assessor) -> str:
+    return _fingerprint([assessor.organization_name, assessor.organization_email, assessor.individual_name,
+                         assessor.individual_email, assessor.third_party])
+
+
+def claim_fingerprint(claim: Claim, assessor: Optional[str], target_cid: Optional[str]) -> str:
+    attachments = [item.content_id for evidence in claim.evidence for item in evidence.data_items]
+    return _fingerprint([claim.predicate, claim.reasoning, claim.target, target_cid, claim.mitigation_strategies,
+                         claim.signature, claim.requirement, assessor, attachments])
+
+
+def claim_key(claim: Claim) -> str:
+    return claim.bom_ref or f"{claim.target}|{claim.predicate}"
+
+
+class ImportState:
+    """Fingerprint and statement CID of every item registered so far, per kind."""
+
+    def __init__(self, items: Optional[Dict[str, Dict[str, list]]] = None, sbom_sha256: Optional[str] = None,
+                 imported_at: Optional[float] = None):
+        self.items = {kind: dict((items or {}).get(kind, {})) for kind in KINDS}
+        self.sbom_sha256 = sbom_sha256
+        self.imported_at = imported_at
+
+    @classmethod
+    def load(cls, path: str) -> "ImportState":
+        """The saved state, or an empty one if there is none (or it is from another version)."""
+        if not os.path.exists(path):
+            return cls()
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("version") != STATE_VERSION:
+            return cls()
+        return cls(data["items"], data.get("sbom_sha256"), data.get("imported_at"))
+
+    def save(self, path: str) -> None:
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({"version": STATE_VERSION, "sbom_sha256": self.sbom_sha256, "imported_at": self.imported_at,
+                       "items": self.items}, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def __len__(self):
+        return sum(len(items) for items in self.items.values())
+
+
+class ImportDiff:
+    """
+    What an import of a new revision has to register. Registration code asks needs()
+    or select() for each item, then record()s the statement CID it got; a recorded item
+    is not needed again. next_state() merges the recorded CIDs with the reused CIDs of
+    the unchanged items.
+    """
+
+    def __init__(self, previous: ImportState, fingerprints: Dict[str, Dict[str, str]]):
+        self.previous = previous
+        self.fingerprints = fingerprints
+        self.added: Dict[str, List[str]] = {}
+        self.changed: Dict[str, List[str]] = {}
+        self.unchanged: Dict[str, List[str]] = {}
+        self.removed: Dict[str, List[str]] = {}
+        self.reopened: List[str] = []
+        self.reattached: List[str] = []
+        for kind in KINDS:
+            old, new = previous.items[kind], fingerprints[kind]
+            self.added[kind] = [key for key in new if key not in old]
+            self.changed[kind] = [key for key, fp in new.items() if key in old and old[key][0] != fp]
+            self.unchanged[kind] = [key for key, fp in new.items() if key in old and old[key][0] == fp]
+            self.removed[kind] = [key for key in old if key not in new]
+        self._register = {kind: set(self.added[kind]) | set(self.changed[kind]) for kind in KINDS}
+        self.registered: Dict[str, Dict[str, Optional[str]]] = {kind: {} for kind in KINDS}
+
+    def reopen(self, bom_ref: str) -> None:
+        if bom_ref in self.fingerprints["components"] and bom_ref not in self._register["components"]:
+            self._register["components"].add(bom_ref)
+            self.reopened.append(bom_ref)
+
+    def reattach(self, key: str) -> None:
+        if key in self.fingerprints["declarations"] and key not in self._register["declarations"]:
+            self._register["declarations"].add(key)
+            self.reattached.append(key)
+
+    def needs(self, kind: str, key: str) -> bool:
+        return key in self._register[kind] and key not in self.registered[kind]
+
+    def remaining(self, kind: str) -> int:
+        """How many items of kind still need registering."""
+        return len(self._register[kind] - self.registered[kind].keys())
+
+    def select(self, kind: str, items: Iterable[T], key: Callable[[T], str]) -> List[T]:
+        return [item for item in items if self.needs(kind, key(item))]
+
+    def skipped(self, kind: str) -> List[str]:
+        return [key for key in self.unchanged[kind] if key not in self._register[kind]]
+
+    def record(self, kind: str, key: str, statement) -> None:
+        self.registered[kind][key] = getattr(statement, "cid", None)
+
+    def next_state(self, sbom_sha256: Optional[str] = None) -> ImportState:
+        items = {}
+        for kind in KINDS:
+            old = self.previous.items[kind]
+            items[kind] = {key: [fp, self.registered[kind][key] if key in self.registered[kind] else old[key][1]]
+                           for key, fp in self.fingerprints[kind].items()
+                           if key in self.registered[kind] or (key in old and key not in self._register[kind])}
+        return ImportState(items, sbom_sha256, time.time())
+
+    def summary(self) -> Dict:
+        return {
+            "baseline": {"sbom_sha256": self.previous.sbom_sha256, "imported_at": self.previous.imported_at,
+                         "items": len(self.previous)},
+            "kinds": {kind: {"registered": len(self._register[kind]), "added": len(self.added[kind]),
+                             "changed": len(self.changed[kind]), "skipped": len(self.skipped(kind)),
+                             "removed": len(self.removed[kind])} for kind in KINDS},
+            "reopened_components": len(self.reopened),
+            "reattached_declarations": len(self.reattached),
+        }
+
+    def details(self) -> Dict:
+        """Every key, by kind and outcome."""
+        return {kind: {"added": self.added[kind], "changed": self.changed[kind],
+                       "skipped": self.skipped(kind),
+                       "removed": self.removed[kind],
+                       **({"reopened": self.reopened} if kind == "components" else {}),
+                       **({"reattached": self.reattached} if kind == "declarations" else {})} for kind in KINDS}
+
+
+def diff_sbom(previous: ImportState, components: Iterable[Component], dependencies: Sequence[Dependency],
+              assessors: Sequence[Assessor], attestations: Sequence[Attestation], index: SbomIndex) -> ImportDiff:
+    fingerprints = {kind: {} for kind in KINDS}
+    for component in components:
+        fingerprints["components"][component.bom_ref] = component_fingerprint(component, index.content_id(component.bom_ref))
+    for dependency in dependencies:
+        entry = index.get(dependency.ref)
+        fingerprints["computations"][dependency.ref] = computation_fingerprint(
+            entry.name if entry else None, index.content_id(dependency.ref),
+            (index.content_id(dep_ref) for dep_ref in dependency.depends_on))
+    for assessor in assessors:
+        fingerprints["assessors"][assessor.bom_ref] = assessor_fingerprint(assessor)
+    for attestation in attestations:
+        for claim in attestation.claims:
+            fingerprints["declarations"][claim_key(claim)] = claim_fingerprint(
+                claim, attestation.assessor, index.content_id(claim.target))
+
+    diff = ImportDiff(previous, fingerprints)
+    for attestation in attestations:
+        for claim in attestation.claims:
+            if diff.needs("declarations", claim_key(claim)):
+                diff.reopen(claim.target)
+    for attestation in attestations:
+        for claim in attestation.claims:
+            if diff.needs("components", claim.target):
+                diff.reattach(claim_key(claim))
+    return diff
+
+
+def merge_manifest(path: str, delta_path: str) -> Dict[str, int]:
+    """
+    Merge the manifest an incremental run exported (delta_path) into the one at path,
+    in place, and remove delta_path. Returns the section sizes of the merged manifest.
+    """
+    with open(delta_path) as f:
+        delta = json.load(f)
+    if os.path.exists(path):
+        with open(path) as f:
+            merged = json.load(f)
+        for section, entries in delta.items():
+            if isinstance(entries, dict):
+                merged.setdefault(section, {}).update(entries)
+            else:
+                merged[section] = entries
+    else:
+        merged = delta
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(merged, f)
+    os.replace(tmp_path, path)
+    os.remove(delta_path)
+    return {section: len(entries) for section, entries in merged.items() if isinstance(entries, dict)}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from cyclonedx import parse_cyclonedx_components
+
+    parser = argparse.ArgumentParser(description="show what an incremental import of an SBOM would register")
+    parser.add_argument("sbom", nargs="?", default="cyclonedx_sbom.json")
+    parser.add_argument("--state", help="default: <sbom>.import_state.json")
+    parser.add_argument("--details", action="store_true", help="list the keys, not only the counts")
+    args = parser.parse_args()
+
+    components, dependencies, assessors, attestations, timestamp = parse_cyclonedx_components(args.sbom)
+    index = SbomIndex.load_or_build(args.sbom, components=components)
+    diff = diff_sbom(ImportState.load(args.state or args.sbom + '.import_state.json'),
+                     components, dependencies, assessors, attestations, index)
+    print(json.dumps({**diff.summary(), **({"details": diff.details()} if args.details else {})}, indent=2))
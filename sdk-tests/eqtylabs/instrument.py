@@ -0,0 +1 @@
+../../common/instrument.py
\ No newline at end of file
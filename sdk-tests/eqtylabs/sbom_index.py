@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from content_id import sha256_to_content_ids
+from cyclonedx import Component, iter_components
+
+# content-ID index over the components of a CycloneDX SBOM
+#
+# built in one pass over the components; every SHA-256 is converted to a CID exactly
+# once (in a batch), and entries can then be looked up by bom-ref, purl, name+version
+# or digest. the index is saved next to the SBOM, keyed by the SBOM file's sha256, so
+# a re-run over an unchanged SBOM loads it instead of recomputing
+
+INDEX_VERSION = 1
+
+
+def component_sha256(component: Component) -> Optional[str]:
+    for hash_data in component.security.hashes:
+        if hash_data.get('alg') == 'SHA-256':
+            return hash_data.get('content').lower()
+    return None
+
+
+class IndexEntry(NamedTuple):
+    bom_ref: str
+    name: Optional[str]
+    version: Optional[str]
+    purl: Optional[str]
+    sha256: Optional[str]
+    content_id: Optional[str]
+
+
+class SbomIndex:
+    def __init__(self, entries: List[IndexEntry], sbom_sha256: Optional[str] = None):
+        self.entries = entries
+        self.sbom_sha256 = sbom_sha256
+        self._by_ref: Dict[str, IndexEntry] = {}
+        self._by_purl: Dict[str, IndexEntry] = {}
+        self._by_name_version: Dict[Tuple[str, str], IndexEntry] = {}
+        self._by_digest: Dict[str, IndexEntry] = {}
+        for entry in entries:
+            self._by_ref[entry.bom_ref] = entry
+            if entry.purl:
+                self._by_purl[entry.purl] = entry
+            self._by_name_version[(entry.name, entry.version)] = entry
+            if entry.sha256:
+                self._by_digest[entry.sha256] = entry
+                self._by_digest[entry.content_id] = entry
+
+    @classmethod
+    def from_components(cls, components: Iterable[Component], sbom_sha256: Optional[str] = None) -> "SbomIndex":
+        rows = [(c.bom_ref, c.name, c.version, c.purl, component_sha256(c)) for c in components]
+        content_ids = iter(sha256_to_content_ids(row[4] for row in rows if row[4]))
+        entries = [IndexEntry(*row, next(content_ids) if row[4] else None) for row in rows]
+        return cls(entries, sbom_sha256)
+
+    @classmethod
+    def build(cls, sbom_path: str) -> "SbomIndex":
+        return cls.from_components(iter_components(sbom_path), _file_sha256(sbom_path))
+
+    # load the saved index if it was built from this exact SBOM, otherwise build and save.
+    # pass already-parsed components to avoid reading the SBOM a second time on a miss
+    @classmethod
+    def load_or_build(cls, sbom_path: str, index_path: Optional[str] = None,
+                      components: Optional[Iterable[Component]] = None) -> "SbomIndex":
+        index_path = index_path or sbom_path + '.index.json'
+        sbom_sha256 = _file_sha256(sbom_path)
+        if os.path.exists(index_path):
+            index = cls.load(index_path)
+            if index.sbom_sha256 == sbom_sha256:
+                return index
+        if components is None:
+            components = iter_components(sbom_path)
+        index = cls.from_components(components, sbom_sha256)
+        index.save(index_path)
+        return index
+
+    def save(self, index_path: str) -> None:
+        tmp_path = index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': INDEX_VERSION, 'sbom_sha256': self.sbom_sha256,
+                       'entries': [list(entry) for entry in self.entries]}, f, separators=(',', ':'))
+        os.replace(tmp_path, index_path)
+
+    @classmethod
+    def load(cls, index_path: str) -> "SbomIndex":
+        with open(index_path) as f:
+            data = json.load(f)
+        if data.get('version') != INDEX_VERSION:
+            return cls([], None)
+        return cls([IndexEntry(*row) for row in data['entries']], data['sbom_sha256'])
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, bom_ref: str) -> Optional[IndexEntry]:
+        return self._by_ref.get(bom_ref)
+
+    def content_id(self, bom_ref: str, default: Optional[str] = None) -> Optional[str]:
+        entry = self._by_ref.get(bom_ref)
+        return entry.content_id if entry and entry.content_id else default
+
+    def by_purl(self, purl: str) -> Optional[IndexEntry]:
+        return self._by_purl.get(purl)
+
+    def by_name_version(self, name: str, version: str) -> Optional[IndexEntry]:
+        return self._by_name_version.get((name, version))
+
+    # sha256 hex digest or the CID derived from it
+    def by_digest(self, digest: str) -> Optional[IndexEntry]:
+        return self._by_digest.get(digest if digest.startswith('z') else digest.lower())
+
+
+def _file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()